@@ -0,0 +1,145 @@
+"""
+Benchmark de integración del backplane entre workers
+Lanza N procesos, cada uno con su ConnectionManager, un UnixSocketBackplane y
+sockets de prueba suscritos a la misma subasta. El worker 0 hace los broadcasts
+y se mide que todos los sockets de todos los workers reciban cada mensaje.
+Se mide a ritmo fijo (latencia de extremo a extremo) y a máxima velocidad (caudal).
+
+Uso: python benchmarks/backplane_workers.py
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORKER_COUNTS = [1, 2, 4]
+RATES = [200, None]  # broadcasts por segundo; None = máxima velocidad
+SUBSCRIBERS_PER_WORKER = 20
+MESSAGES = 1_000
+AUCTION_ID = "a"
+
+
+class _FakeWebSocket:
+    """WebSocket de prueba: cuenta frames y mide latencia en el primer socket del worker"""
+
+    scope = {}
+
+    def __init__(self, probe: bool):
+        self.probe = probe
+        self.received = 0
+        self.latencies = []
+        self.done = asyncio.Event()
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, payload: str):
+        self.received += 1
+        if self.probe:
+            sent_at = json.loads(payload)["data"]["sentAt"]
+            self.latencies.append(time.time() - sent_at)
+        if self.received == MESSAGES:
+            self.done.set()
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def _worker(index: int, path: str, rate, barrier, results) -> None:
+    from src.shared.backplane import UnixSocketBackplane
+    from src.shared.websocket_manager import ConnectionManager
+
+    # Al terminar, los workers ven caer al broker: no interesa en la salida
+    logging.disable(logging.WARNING)
+    manager = ConnectionManager(max_queue_size=MESSAGES)
+    manager.set_backplane(UnixSocketBackplane(path))
+    await manager.start_backplane()
+
+    sockets = [_FakeWebSocket(probe=(i == 0)) for i in range(SUBSCRIBERS_PER_WORKER)]
+    for websocket in sockets:
+        await manager.connect(websocket, AUCTION_ID)
+
+    # Esperar a que todos los workers estén unidos al backplane
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, barrier.wait)
+    await asyncio.sleep(0.2)
+
+    start = time.time()
+    if index == 0:
+        for i in range(MESSAGES):
+            await manager.broadcast({
+                "type": "donation_update",
+                "auctionId": AUCTION_ID,
+                "data": {"seq": i + 1, "sentAt": time.time()}
+            }, AUCTION_ID)
+            if rate:
+                await asyncio.sleep(max(0.0, start + (i + 1) / rate - time.time()))
+            elif i % 50 == 0:
+                await asyncio.sleep(0)
+
+    try:
+        await asyncio.wait_for(asyncio.gather(*(ws.done.wait() for ws in sockets)), 30)
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.time() - start
+
+    latencies = sorted(sockets[0].latencies)
+    results.put({
+        "worker": index,
+        "delivered": sum(ws.received for ws in sockets),
+        "elapsed": elapsed,
+        "p50": latencies[len(latencies) // 2] if latencies else None,
+        "p99": latencies[int(len(latencies) * 0.99)] if latencies else None,
+    })
+    # No salir hasta que todos hayan terminado (el broker debe seguir reenviando)
+    await loop.run_in_executor(None, barrier.wait)
+    await manager.stop_backplane()
+
+
+def _run_worker(index: int, path: str, rate, barrier, results) -> None:
+    asyncio.run(_worker(index, path, rate, barrier, results))
+
+
+def _run(workers: int, rate) -> None:
+    ctx = multiprocessing.get_context("spawn")
+    path = os.path.join(tempfile.mkdtemp(), "backplane.sock")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=_run_worker, args=(i, path, rate, barrier, results)) for i in range(workers)]
+    for process in processes:
+        process.start()
+    rows = [results.get(timeout=60) for _ in processes]
+    for process in processes:
+        process.join()
+
+    expected = workers * SUBSCRIBERS_PER_WORKER * MESSAGES
+    delivered = sum(row["delivered"] for row in rows)
+    elapsed = max(row["elapsed"] for row in rows)
+    p50 = statistics.median(row["p50"] for row in rows) * 1000
+    p99 = max(row["p99"] for row in rows) * 1000
+    print(
+        f"{rate or 'máx':>7}{workers:>8}{delivered:>10}/{expected:<10}{MESSAGES / elapsed:>10.0f}"
+        f"{delivered / elapsed:>14.0f}{p50:>10.2f}{p99:>10.2f}"
+    )
+
+
+def main() -> None:
+    print(f"{SUBSCRIBERS_PER_WORKER} sockets por worker, {MESSAGES} broadcasts desde el worker 0\n")
+    print(
+        f"{'ritmo':>7}{'workers':>8}{'frames entregados':>21}{'msg/s':>10}"
+        f"{'frames/s':>14}{'p50 ms':>10}{'p99 ms':>10}"
+    )
+    for rate in RATES:
+        for workers in WORKER_COUNTS:
+            _run(workers, rate)
+
+
+if __name__ == "__main__":
+    main()
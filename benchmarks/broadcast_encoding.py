@@ -0,0 +1,96 @@
+"""
+Micro-benchmark de serialización en broadcast
+Compara serializar el mensaje una vez por conexión (send_json) frente a
+serializarlo una sola vez y enviar el mismo frame a todos los suscriptores.
+
+Uso: python benchmarks/broadcast_encoding.py
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.shared import serialization
+from src.shared.serialization import encode_json
+
+SUBSCRIBERS = [10, 100, 1_000]
+ROUNDS = 200
+
+
+class _FakeWebSocket:
+    """WebSocket falso: send_json serializa igual que Starlette, send_text no hace nada"""
+
+    async def send_json(self, data):
+        json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+    async def send_text(self, data):
+        pass
+
+
+def _donation_message(auction_id: str) -> dict:
+    return {
+        "type": "donation_update",
+        "auctionId": auction_id,
+        "data": {
+            "auctionId": auction_id,
+            "topDonors": [
+                {
+                    "username": f"usuario_{rank}",
+                    "profilePicture": f"https://p16-sign.tiktokcdn.com/avatar/{rank}.webp",
+                    "totalAmount": 1000.0 * (6 - rank),
+                    "donationCount": 10 * rank,
+                    "lastDonation": "2025-11-07T10:35:00",
+                    "rank": rank
+                }
+                for rank in range(1, 6)
+            ],
+            "totalDonations": 15000.0,
+            "totalDonors": 250
+        }
+    }
+
+
+async def _per_connection(connections, message) -> None:
+    """Broadcast anterior: send_json por conexión"""
+    for connection in connections:
+        await connection.send_json(message)
+
+
+async def _single_encoding(connections, message) -> None:
+    """Broadcast actual: una serialización y el mismo frame para todos"""
+    payload = encode_json(message)
+    for connection in connections:
+        await connection.send_text(payload)
+
+
+async def _bench(subscribers: int):
+    connections = [_FakeWebSocket() for _ in range(subscribers)]
+    message = _donation_message("bench-auction")
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        await _per_connection(connections, message)
+    per_connection = (time.perf_counter() - start) / ROUNDS * 1e6
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        await _single_encoding(connections, message)
+    single = (time.perf_counter() - start) / ROUNDS * 1e6
+    return per_connection, single
+
+
+def main():
+    encoder = "orjson" if serialization.orjson is not None else "json"
+    print(f"Mensaje donation_update (top 5), encoder: {encoder}\n")
+    print(f"{'suscriptores':>12} | {'por conexión µs':>16} | {'una vez µs':>11} | {'mejora':>7}")
+    print("-" * 56)
+    for subscribers in SUBSCRIBERS:
+        per_connection, single = asyncio.run(_bench(subscribers))
+        print(f"{subscribers:>12,} | {per_connection:>16.1f} | {single:>11.1f} | {per_connection / single:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark de ingesta de donaciones: una a una frente a lotes
+Mide donaciones por segundo registrando el mismo flujo:
+  - servicio, por llamada: AuctionService._on_donation_received (el callback de TikTok)
+  - servicio, por lote: AuctionService.add_donations_batch (lo que usa el endpoint)
+  - tracker, por llamada / por lote: DonationTracker.add_donation / add_donations
+
+El camino por llamada se mide con el logging desactivado, para comparar solo el
+trabajo de registro. Las sumas por grupo usan numpy si está instalado.
+
+Uso: python benchmarks/donation_batch.py
+"""
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.auction.application.dtos import DonationBatchDTO, DonationBatchItemDTO
+from src.modules.auction.application.service import AuctionService
+from src.modules.auction.domain.auction import Auction, AuctionStatus
+from src.modules.auction.domain.donation import DonationTracker
+from src.modules.auction.domain.donation_log import numpy
+from src.modules.auction.infrastructure.repository import AuctionRepository
+
+DONATIONS = 200_000
+BATCH_SIZES = [1_000, 10_000]
+DONORS = 5_000
+GIFTS = [("Rose", 1), ("TikTok", 1), ("Finger Heart", 5), ("Doughnut", 30), ("Lion", 29_999)]
+AUCTION_ID = "bench"
+
+
+def _rows() -> list:
+    rng = random.Random(0)
+    rows = []
+    for _ in range(DONATIONS):
+        donor = rng.randrange(DONORS)
+        gift_name, amount = rng.choice(GIFTS)
+        rows.append((f"usuario_{donor}", amount, gift_name, f"https://p16-sign.tiktokcdn.com/avatar/{donor}.webp"))
+    return rows
+
+
+def _service() -> AuctionService:
+    repository = AuctionRepository()
+    auction = Auction(id=AUCTION_ID, name_streamer="bench", titulo_subasta="bench", timer_minutes=60, status=AuctionStatus.DRAFT)
+    auction.start()
+    repository.save(auction)
+    service = AuctionService(repository, tiktok_connector=None)
+    service.donation_trackers[AUCTION_ID] = DonationTracker(AUCTION_ID)
+    return service
+
+
+def _rate(run) -> float:
+    start = time.perf_counter()
+    run()
+    return DONATIONS / (time.perf_counter() - start)
+
+
+def _batches(rows: list, size: int) -> list:
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+
+def main() -> None:
+    logging.disable(logging.CRITICAL)
+    rows = _rows()
+    print(f"{DONATIONS} donaciones, {DONORS} donadores, numpy: {'sí' if numpy is not None else 'no'}\n")
+    print(f"{'camino':<34}{'donaciones/s':>14}{'mejora':>10}")
+
+    service = _service()
+    per_call = _rate(lambda: [service._on_donation_received(AUCTION_ID, *row) for row in rows])
+    print(f"{'servicio, por llamada':<34}{per_call:>14,.0f}{'':>10}")
+    for size in BATCH_SIZES:
+        # El DTO se construye fuera: es lo que FastAPI valida antes de llamar al servicio
+        dtos = [
+            DonationBatchDTO(donations=[
+                DonationBatchItemDTO(username=u, amount=a, giftName=g, profilePicture=p) for u, a, g, p in batch
+            ])
+            for batch in _batches(rows, size)
+        ]
+        service = _service()
+        rate = _rate(lambda: [service.add_donations_batch(AUCTION_ID, dto) for dto in dtos])
+        print(f"{f'servicio, lotes de {size}':<34}{rate:>14,.0f}{rate / per_call:>9.1f}x")
+
+    tracker = DonationTracker(AUCTION_ID)
+    per_call = _rate(lambda: [tracker.add_donation(*row) for row in rows])
+    print(f"{'tracker, por llamada':<34}{per_call:>14,.0f}{'':>10}")
+    for size in BATCH_SIZES:
+        batches = _batches(rows, size)
+        tracker = DonationTracker(AUCTION_ID)
+        rate = _rate(lambda: [tracker.add_donations(batch) for batch in batches])
+        print(f"{f'tracker, lotes de {size}':<34}{rate:>14,.0f}{rate / per_call:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
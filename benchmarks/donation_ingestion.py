@@ -0,0 +1,114 @@
+"""
+Benchmark de la cola de ingesta de donaciones
+Entrega ráfagas de donaciones a AuctionService._on_donation_received dentro del event
+loop (como lo hace el conector de TikTok Live) y mide µs por donación hasta que el
+leaderboard queda publicado:
+  - directo: cada donación se aplica en el callback (INGEST_QUEUE_SIZE=0)
+  - cola: las donaciones se encolan y se aplican en micro-lotes con distintos tamaños
+
+Los broadcasts van a un WebSocket manager falso y el logging está a nivel INFO hacia
+un handler nulo.
+
+Uso: python benchmarks/donation_ingestion.py
+"""
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.auction.application.leaderboard_stream import LeaderboardStream
+from src.modules.auction.application.service import AuctionService
+from src.modules.auction.domain.auction import Auction, AuctionStatus
+from src.modules.auction.domain.donation import DonationTracker
+from src.modules.auction.infrastructure.repository import AuctionRepository
+
+DONATIONS = 50_000
+DONORS = 2_000
+# Donaciones que llegan en la misma vuelta del event loop (un mensaje de TikTok trae varios regalos)
+BURST = 50
+GIFTS = [("Rose", 1), ("Finger Heart", 5), ("Doughnut", 30), ("Lion", 29_999)]
+AUCTION_ID = "bench"
+
+
+class _NullWebSocketManager:
+    """Cuenta los broadcasts sin enviarlos"""
+
+    def __init__(self):
+        self.deltas = 0
+
+    async def broadcast_donation_delta(self, auction_id, delta):
+        self.deltas += 1
+
+
+def _rows() -> list:
+    rng = random.Random(0)
+    rows = []
+    for _ in range(DONATIONS):
+        donor = rng.randrange(DONORS)
+        gift_name, amount = rng.choice(GIFTS)
+        rows.append((f"usuario_{donor}", float(amount), gift_name, f"https://p16-sign.tiktokcdn.com/avatar/{donor}.webp"))
+    return rows
+
+
+def _service(queue_size: int, batch_size: int = 256) -> AuctionService:
+    repository = AuctionRepository()
+    auction = Auction(id=AUCTION_ID, name_streamer="bench", titulo_subasta="bench", timer_minutes=60, status=AuctionStatus.DRAFT)
+    auction.start()
+    repository.save(auction)
+    service = AuctionService(
+        repository,
+        tiktok_connector=None,
+        donation_flush_ms=100,
+        ingest_queue_size=queue_size,
+        ingest_batch_size=batch_size,
+        ingest_linger_ms=1
+    )
+    service.donation_trackers[AUCTION_ID] = DonationTracker(AUCTION_ID)
+    service.leaderboard_streams[AUCTION_ID] = LeaderboardStream(AUCTION_ID)
+    service.set_websocket_manager(_NullWebSocketManager())
+    return service
+
+
+async def _run(service: AuctionService, rows: list) -> float:
+    start = time.perf_counter()
+    for offset in range(0, len(rows), BURST):
+        for row in rows[offset:offset + BURST]:
+            service._on_donation_received(AUCTION_ID, *row)
+        # Ceder el loop entre ráfagas, como entre mensajes del WebSocket de TikTok
+        await asyncio.sleep(0)
+    await service.stop_ingestion()
+    elapsed = time.perf_counter() - start
+    tracker = service.donation_trackers[AUCTION_ID]
+    assert tracker.donation_count == len(rows), tracker.donation_count
+    return elapsed / len(rows)
+
+
+def main() -> None:
+    rows = _rows()
+    root = logging.getLogger()
+    root.handlers = [logging.NullHandler()]
+    root.setLevel(logging.INFO)
+    print(f"{DONATIONS} donaciones, {DONORS} donadores, ráfagas de {BURST}\n")
+    print(f"{'modo':<22}{'µs/donación':>13}{'lotes':>8}{'tamaño medio':>14}{'máx. espera ms':>16}")
+    for label, queue_size, batch_size in (
+        ("directo", 0, 0),
+        ("cola, lotes de 64", 10_000, 64),
+        ("cola, lotes de 256", 10_000, 256),
+        ("cola, lotes de 1024", 10_000, 1024),
+    ):
+        service = _service(queue_size, batch_size)
+        cost = asyncio.run(_run(service, rows))
+        stats = service.get_ingestion_stats()
+        if stats:
+            avg = stats["processed"] / max(1, stats["batches"])
+            print(f"{label:<22}{cost * 1e6:>13.2f}{stats['batches']:>8}{avg:>14.1f}{stats['maxLagMs']:>16.2f}")
+        else:
+            print(f"{label:<22}{cost * 1e6:>13.2f}{'-':>8}{'-':>14}{'-':>16}")
+
+
+if __name__ == "__main__":
+    main()
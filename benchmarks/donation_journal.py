@@ -0,0 +1,114 @@
+"""
+Benchmark del journal de donaciones
+  - coste por donación de registrarla en el journal (solo el buffer en memoria)
+  - coste amortizado de la escritura agrupada (write + fsync por grupo)
+  - tiempo de reconstrucción del tracker desde el fichero (mmap) con millones de registros
+
+Uso: python benchmarks/donation_journal.py
+"""
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.auction.domain.auction import Auction
+from src.modules.auction.domain.donation_log import now_micros
+from src.modules.auction.infrastructure.journal import AuctionJournal, DonationJournal
+
+RECORD_ROUNDS = 200_000
+GROUP_SIZES = [100, 1_000]  # donaciones por fsync
+REPLAY_COUNTS = [1_000_000, 3_000_000]
+DONORS = 5_000
+GIFTS = [("Rose", 1), ("TikTok", 1), ("Finger Heart", 5), ("Doughnut", 30), ("Lion", 29_999)]
+AUCTION_ID = "bench"
+
+
+def _rows(count: int) -> list:
+    rng = random.Random(count)
+    usernames = [f"usuario_{i}" for i in range(DONORS)]
+    pictures = [f"https://p16-sign.tiktokcdn.com/avatar/{i}.webp" for i in range(DONORS)]
+    rows = []
+    for _ in range(count):
+        donor = rng.randrange(DONORS)
+        gift_name, amount = rng.choice(GIFTS)
+        rows.append((usernames[donor], amount, gift_name, pictures[donor]))
+    return rows
+
+
+def _journal(directory: str) -> DonationJournal:
+    journal = DonationJournal(directory)
+    journal.record_state(Auction(id=AUCTION_ID, name_streamer="bench", titulo_subasta="bench", timer_minutes=60))
+    return journal
+
+
+def _record_cost(directory: str) -> float:
+    journal = _journal(directory)
+    rows = _rows(RECORD_ROUNDS)
+    timestamp = now_micros()
+    start = time.perf_counter()
+    for username, amount, gift_name, picture in rows:
+        journal.record_donation(AUCTION_ID, timestamp, username, amount, gift_name, picture)
+    elapsed = time.perf_counter() - start
+    asyncio.run(journal.stop())
+    return elapsed / RECORD_ROUNDS
+
+
+def _flush_cost(directory: str, group: int) -> float:
+    journal = _journal(directory)
+    rows = _rows(20 * group)
+    timestamp = now_micros()
+
+    async def run() -> float:
+        start = time.perf_counter()
+        for i in range(0, len(rows), group):
+            journal.record_donations(AUCTION_ID, timestamp, rows[i:i + group])
+            await journal.flush()
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(run())
+    asyncio.run(journal.stop())
+    return elapsed / len(rows)
+
+
+def _replay(directory: str, count: int) -> tuple:
+    journal = _journal(directory)
+    rows = _rows(count)
+    timestamp = now_micros()
+    for i in range(0, count, 10_000):
+        journal.record_donations(AUCTION_ID, timestamp, rows[i:i + 10_000])
+    asyncio.run(journal.stop())
+    path = os.path.join(directory, f"{AUCTION_ID}.journal")
+
+    start = time.perf_counter()
+    _, tracker = AuctionJournal(path).replay()
+    elapsed = time.perf_counter() - start
+    assert tracker.donation_count == count
+    return os.path.getsize(path), elapsed
+
+
+def main() -> None:
+    directory = tempfile.mkdtemp()
+    try:
+        print(f"Registrar una donación (buffer en memoria): {_record_cost(directory) * 1e6:.2f} µs")
+        for group in GROUP_SIZES:
+            shutil.rmtree(directory)
+            os.makedirs(directory)
+            print(f"Registrar + write/fsync en grupos de {group}: {_flush_cost(directory, group) * 1e6:.2f} µs por donación")
+
+        print(f"\n{'registros':>12}{'MB':>8}{'replay s':>10}{'registros/s':>14}")
+        for count in REPLAY_COUNTS:
+            shutil.rmtree(directory)
+            os.makedirs(directory)
+            size, elapsed = _replay(directory, count)
+            print(f"{count:>12}{size / 1e6:>8.1f}{elapsed:>10.2f}{count / elapsed:>14,.0f}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
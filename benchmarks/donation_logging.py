@@ -0,0 +1,123 @@
+"""
+Benchmark del coste del logging por donación
+Registra el mismo flujo de donaciones con AuctionService._on_donation_received
+y mide µs por donación con distintas configuraciones de logging (salida a /dev/null):
+  - banner anterior: 5 logger.info con f-strings, handler síncrono
+  - JSON síncrono: una línea estructurada, escrita en el event loop
+  - JSON en cola: setup_logging (QueueHandler + hilo escritor)
+  - JSON en cola con muestreo 1/100 de la categoría donation
+
+Con /dev/null escribir nunca bloquea, así que la cola no mejora el tiempo del loop aquí;
+lo que evita es que el loop se detenga cuando la salida se atasca (pipe lleno, disco lento).
+
+Uso: python benchmarks/donation_logging.py
+"""
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.auction.application.service import AuctionService
+from src.modules.auction.domain.auction import Auction, AuctionStatus
+from src.modules.auction.domain.donation import DonationTracker
+from src.modules.auction.infrastructure.repository import AuctionRepository
+from src.shared import structured_logging
+from src.shared.structured_logging import setup_logging, stop_logging
+
+DONATIONS = 50_000
+DONORS = 2_000
+GIFTS = [("Rose", 1), ("Finger Heart", 5), ("Doughnut", 30), ("Lion", 29_999)]
+AUCTION_ID = "bench"
+
+legacy_logger = logging.getLogger("bench.legacy")
+
+
+def _rows() -> list:
+    rng = random.Random(0)
+    rows = []
+    for _ in range(DONATIONS):
+        donor = rng.randrange(DONORS)
+        gift_name, amount = rng.choice(GIFTS)
+        rows.append((f"usuario_{donor}", amount, gift_name, f"https://p16-sign.tiktokcdn.com/avatar/{donor}.webp"))
+    return rows
+
+
+def _service() -> AuctionService:
+    repository = AuctionRepository()
+    auction = Auction(id=AUCTION_ID, name_streamer="bench", titulo_subasta="bench", timer_minutes=60, status=AuctionStatus.DRAFT)
+    auction.start()
+    repository.save(auction)
+    service = AuctionService(repository, tiktok_connector=None)
+    service.donation_trackers[AUCTION_ID] = DonationTracker(AUCTION_ID)
+    return service
+
+
+def _legacy_banner(service: AuctionService, username, amount, gift_name, profile_picture) -> None:
+    """Registro con el banner multilínea anterior"""
+    tracker = service.donation_trackers[AUCTION_ID]
+    tracker.add_donation(username, amount, gift_name, profile_picture)
+    donor_stats = tracker.get_donor_stats(username)
+    legacy_logger.info(f"✅ DONACIÓN REGISTRADA:")
+    legacy_logger.info(f"   Usuario: {username}")
+    legacy_logger.info(f"   Monto esta donación: {amount} coins")
+    legacy_logger.info(f"   Total acumulado: {donor_stats.total_amount} coins")
+    legacy_logger.info(f"   Número de donaciones: {donor_stats.donation_count}")
+
+
+def _sync_logging(devnull) -> None:
+    stop_logging()
+    root = logging.getLogger()
+    root.handlers = [logging.StreamHandler(devnull)]
+    root.handlers[0].setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    root.setLevel(logging.INFO)
+    structured_logging.sampler.rates = {}
+
+
+def _queued_logging(devnull, sampling: str = "") -> None:
+    root = logging.getLogger()
+    root.handlers = []
+    setup_logging("info", sampling=sampling)
+    # El hilo escritor también escribe a /dev/null
+    structured_logging._listener.handlers[0].setStream(devnull)
+
+
+def _per_donation(run, rows) -> float:
+    start = time.perf_counter()
+    for row in rows:
+        run(*row)
+    elapsed = time.perf_counter() - start
+    stop_logging()  # vaciar la cola antes de la siguiente medición (fuera del tiempo)
+    return elapsed / len(rows)
+
+
+def main() -> None:
+    rows = _rows()
+    print(f"{DONATIONS} donaciones, {DONORS} donadores\n")
+    print(f"{'configuración':<36}{'µs/donación (loop)':>20}")
+    with open(os.devnull, "w") as devnull:
+        _sync_logging(devnull)
+        service = _service()
+        cost = _per_donation(lambda *row: _legacy_banner(service, *row), rows)
+        print(f"{'banner anterior, síncrono':<36}{cost * 1e6:>20.2f}")
+
+        _sync_logging(devnull)
+        service = _service()
+        cost = _per_donation(lambda *row: service._on_donation_received(AUCTION_ID, *row), rows)
+        print(f"{'JSON, síncrono':<36}{cost * 1e6:>20.2f}")
+
+        _queued_logging(devnull)
+        service = _service()
+        cost = _per_donation(lambda *row: service._on_donation_received(AUCTION_ID, *row), rows)
+        print(f"{'JSON, en cola':<36}{cost * 1e6:>20.2f}")
+
+        _queued_logging(devnull, "donation=100")
+        service = _service()
+        cost = _per_donation(lambda *row: service._on_donation_received(AUCTION_ID, *row), rows)
+        print(f"{'JSON, en cola, muestreo 1/100':<36}{cost * 1e6:>20.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark de memoria del historial de donaciones
+Registra N donaciones repartidas entre donadores y mide con tracemalloc los bytes
+retenidos por donación:
+  - objetos: el tracker anterior (un Donation con su datetime por donación, en
+    all_donations y otra vez en la lista del donador)
+  - columnar: DonationTracker con DonationLog
+
+Los nombres de regalo y las URLs de avatar se crean nuevos en cada evento, como
+llegan decodificados desde TikTok Live.
+
+Uso: python benchmarks/donation_memory.py
+"""
+import gc
+import os
+import random
+import sys
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.auction.domain.donation import DonationTracker
+
+DONATIONS = [100_000, 1_000_000]
+DONORS = 5_000
+GIFTS = [("Rose", 1), ("TikTok", 1), ("Finger Heart", 5), ("Doughnut", 30), ("Lion", 29_999)]
+
+
+class _LegacyDonation:
+    def __init__(self, username, amount, gift_name=None, profile_picture=None):
+        self.username = username
+        self.amount = amount
+        self.gift_name = gift_name
+        self.profile_picture = profile_picture
+        self.timestamp = datetime.now()
+
+
+class _LegacyDonorStats:
+    def __init__(self, username, profile_picture=None):
+        self.username = username
+        self.profile_picture = profile_picture
+        self.total_amount = 0.0
+        self.donation_count = 0
+        self.last_donation = None
+        self.donations = []
+
+    def add_donation(self, donation):
+        self.total_amount += donation.amount
+        self.donation_count += 1
+        self.last_donation = donation.timestamp
+        self.donations.append(donation)
+        if donation.profile_picture:
+            self.profile_picture = donation.profile_picture
+
+
+class _LegacyTracker:
+    """Estructura del DonationTracker anterior (sin ranking ni agregados)"""
+
+    def __init__(self):
+        self.donors = {}
+        self.all_donations = []
+
+    def add_donation(self, username, amount, gift_name=None, profile_picture=None):
+        donation = _LegacyDonation(username, amount, gift_name, profile_picture)
+        if username not in self.donors:
+            self.donors[username] = _LegacyDonorStats(username, profile_picture)
+        self.donors[username].add_donation(donation)
+        self.all_donations.append(donation)
+
+
+def _events(count: int):
+    rng = random.Random(count)
+    usernames = [f"usuario_{i}" for i in range(DONORS)]
+    for _ in range(count):
+        donor = rng.randrange(DONORS)
+        gift_name, amount = rng.choice(GIFTS)
+        # Cadenas nuevas por evento, como las entrega el decodificador
+        yield (
+            usernames[donor],
+            amount,
+            gift_name.encode().decode(),
+            f"https://p16-sign.tiktokcdn.com/avatar/{donor}.webp".encode().decode()
+        )
+
+
+def _retained_bytes(factory, count: int) -> int:
+    events = _events(count)
+    next(events, None)  # crear los usernames fuera de la medición
+    gc.collect()
+    tracemalloc.start()
+    tracker = factory()
+    # Los eventos se generan dentro de la medición: cuentan las cadenas que el tracker retiene
+    for username, amount, gift_name, picture in events:
+        tracker.add_donation(username, amount, gift_name, picture)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del tracker
+    return retained
+
+
+def main() -> None:
+    print(f"Bytes retenidos por donación ({DONORS} donadores)\n")
+    print(f"{'donaciones':>12}{'objetos':>12}{'columnar':>12}{'reducción':>12}")
+    for count in DONATIONS:
+        legacy = _retained_bytes(_LegacyTracker, count) / count
+        columnar = _retained_bytes(lambda: DonationTracker("bench"), count) / count
+        print(f"{count:>12}{legacy:>12.1f}{columnar:>12.1f}{legacy / columnar:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
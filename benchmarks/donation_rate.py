@@ -0,0 +1,71 @@
+"""
+Benchmark de ventanas deslizantes de donaciones
+Compara el coste de responder "coins y donador más fuerte de los últimos 5 minutos":
+  - anillos de buckets (DonationRate): coste fijo por consulta, O(1) por donación
+  - recorrido del historial (DonationLog) filtrando por timestamp: O(N) por consulta
+
+La consulta con anillos depende de los buckets de la ventana y de los donadores
+distintos en cada uno, no del total de donaciones registradas.
+
+Uso: python benchmarks/donation_rate.py
+"""
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.auction.domain.donation import DonationTracker
+from src.modules.auction.domain.donation_log import now_micros
+
+DONATIONS = [10_000, 100_000, 1_000_000]
+DONORS = 5_000
+WINDOW = 300
+QUERIES = 200
+
+
+def _tracker(count: int) -> DonationTracker:
+    rng = random.Random(count)
+    tracker = DonationTracker("bench")
+    for _ in range(count):
+        tracker.add_donation(f"usuario_{rng.randrange(DONORS)}", rng.choice((1, 5, 30, 99)), "Rose")
+    return tracker
+
+
+def _scan(tracker: DonationTracker, now: int) -> tuple:
+    log = tracker.log
+    since = now - WINDOW * 1_000_000
+    donors: Counter = Counter()
+    total = 0
+    for timestamp, donor_id, amount in zip(log.timestamps, log.donor_ids, log.amounts):
+        if timestamp > since:
+            total += amount
+            donors[donor_id] += amount
+    return total, donors.most_common(1)
+
+
+def _per_query(run) -> float:
+    start = time.perf_counter()
+    for _ in range(QUERIES):
+        run()
+    return (time.perf_counter() - start) / QUERIES
+
+
+def main() -> None:
+    print(f"Ventana de {WINDOW} s, {DONORS} donadores\n")
+    print(f"{'donaciones':>12}{'alta µs':>10}{'anillos ms':>12}{'recorrido ms':>14}")
+    for count in DONATIONS:
+        start = time.perf_counter()
+        tracker = _tracker(count)
+        add_cost = (time.perf_counter() - start) / count
+        now = now_micros()
+        rings = _per_query(lambda: tracker.get_rate(WINDOW, now))
+        scan = _per_query(lambda: _scan(tracker, now)) if count <= 100_000 else None
+        scan_text = f"{scan * 1e3:>14.2f}" if scan is not None else f"{'(omitido)':>14}"
+        print(f"{count:>12}{add_cost * 1e6:>10.2f}{rings * 1e3:>12.2f}{scan_text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark del handler de GiftEvent del conector compartido
+Mide el coste por evento sobre GiftEvent sintéticos de TikTokLive (combos de Rose con
+sus eventos intermedios y regalos sin combo) de:
+  - anterior: el on_gift previo (cadena de getattr, tres campos de avatar y 8-15
+    líneas de log por evento; registraba también los eventos intermedios)
+  - actual: TikTokLiveSource.decode (catálogo de regalos, caché de avatares) seguido de
+    TikTokLiveConnector._handle_gift (una donación por combo completado)
+
+Se mide con el logging a nivel INFO (hacia un handler nulo) y desactivado.
+
+Uso: python benchmarks/gift_handler.py
+"""
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from TikTokLive.events import GiftEvent
+from TikTokLive.proto.custom_proto import ExtendedGift, ExtendedUser
+from TikTokLive.proto.tiktok_proto import ImageModel
+
+from src.shared.event_sources import TikTokLiveSource
+from src.shared.tiktok_connector import TikTokLiveConnector
+
+EVENTS = 50_000
+USERS = 2_000
+SESSION = "bench"
+# (id, nombre, diamonds, admite combo)
+GIFTS = [(5655, "Rose", 1, True), (5827, "Finger Heart", 5, True), (5879, "Doughnut", 30, False), (6369, "Lion", 29_999, False)]
+
+logger = logging.getLogger("bench.legacy")
+
+
+def _events() -> list:
+    rng = random.Random(0)
+    users = [
+        ExtendedUser(
+            id=i,
+            nick_name=f"Usuario {i}",
+            username=f"usuario_{i}",
+            avatar_thumb=ImageModel(m_urls=[f"https://p16-sign.tiktokcdn.com/avatar/{i}.webp"])
+        )
+        for i in range(USERS)
+    ]
+    gifts = [(ExtendedGift(id=gift_id, name=name, diamond_count=diamonds, type=1 if combo else 2), combo)
+             for gift_id, name, diamonds, combo in GIFTS]
+    events = []
+    group_id = 0
+    while len(events) < EVENTS:
+        user = rng.choice(users)
+        gift, combo = rng.choice(gifts)
+        group_id += 1
+        if not combo:
+            events.append(GiftEvent(from_user=user, m_gift=gift, repeat_count=1, repeat_end=1, group_id=group_id))
+            continue
+        # Combo: un evento por repetición y uno final con el mismo contador
+        length = rng.randint(1, 30)
+        for count in range(1, length + 1):
+            events.append(GiftEvent(from_user=user, m_gift=gift, repeat_count=count, repeat_end=0, group_id=group_id))
+        events.append(GiftEvent(from_user=user, m_gift=gift, repeat_count=length, repeat_end=1, group_id=group_id))
+    return events[:EVENTS]
+
+
+def _legacy_on_gift(event, callback) -> None:
+    """Lógica del on_gift anterior (sin los bloques de depuración de errores)"""
+    gift = event.gift
+    user = event.user
+    gift_name = getattr(gift, 'name', 'Regalo desconocido')
+    gift_id = getattr(gift, 'id', 0)
+    diamond_count = getattr(gift, 'diamond_count', 0)
+    if diamond_count == 0:
+        diamond_count = getattr(gift, 'diamonds', 0)
+    if diamond_count == 0:
+        diamond_count = getattr(gift, 'value', 1)
+    count = getattr(event, 'count', 1)
+    if count == 0:
+        count = getattr(gift, 'count', 1)
+    total_value = count * diamond_count
+    logger.info(f"💎 DONACIÓN RECIBIDA:")
+    logger.info(f"   Regalo: {gift_name} (ID: {gift_id})")
+    logger.info(f"   Valor unitario: {diamond_count} diamonds")
+    logger.info(f"   Cantidad: {count}")
+    logger.info(f"   Total calculado: {total_value} coins ({count} × {diamond_count})")
+    username = getattr(user, 'nickname', 'Usuario desconocido')
+    unique_id = getattr(user, 'unique_id', '')
+    if not username or username == 'Usuario desconocido':
+        username = unique_id if unique_id else 'Usuario desconocido'
+    profile_picture = ''
+    for field in ('avatar_thumb', 'avatar_medium', 'avatar_large'):
+        if not profile_picture and hasattr(user, field) and getattr(user, field):
+            avatar = getattr(user, field)
+            if hasattr(avatar, 'm_urls') and avatar.m_urls:
+                profile_picture = str(avatar.m_urls[0])
+                logger.info(f"✅ Avatar extraído de {field}: {profile_picture[:80]}...")
+    logger.info(f"👤 Usuario: {username} (@{unique_id})")
+    if profile_picture:
+        logger.info(f"🖼️  Avatar: {profile_picture[:80]}...")
+    if total_value > 0:
+        logger.info(f"✅ Registrando {total_value} coins para {username}")
+        callback(username, float(total_value), gift_name, profile_picture)
+
+
+def _measure(events: list, handler) -> tuple:
+    calls = []
+    callback = lambda *args: calls.append(args)
+    run = handler(callback)
+    start = time.perf_counter()
+    for event in events:
+        run(event)
+    elapsed = time.perf_counter() - start
+    return elapsed / len(events), len(calls), sum(args[1] for args in calls)
+
+
+def _legacy(callback):
+    return lambda event: _legacy_on_gift(event, callback)
+
+
+def _current(callback):
+    source = TikTokLiveSource()
+    connector = TikTokLiveConnector(source=source)
+    upstream = connector.attach(SESSION, SESSION, callback)
+    return lambda event: connector._handle_gift(upstream.unique_id, source.decode(event))
+
+
+def main() -> None:
+    events = _events()
+    print(f"{len(events)} GiftEvent, {USERS} usuarios\n")
+    print(f"{'handler':<12}{'logging':<14}{'µs/evento':>11}{'donaciones':>12}{'coins':>12}")
+    root = logging.getLogger()
+    root.handlers = [logging.NullHandler()]
+    for label, level in (("INFO", logging.INFO), ("desactivado", logging.CRITICAL + 1)):
+        root.setLevel(level)
+        for name, handler in (("anterior", _legacy), ("actual", _current)):
+            cost, donations, coins = _measure(events, handler)
+            print(f"{name:<12}{label:<14}{cost * 1e6:>11.2f}{donations:>12}{coins:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark del ranking de donadores: top-K incremental frente a ordenar todo
+Con D donadores ya registrados, mide por donación el coste de registrarla y leer
+el top 5 (lo que hace cada flush del leaderboard):
+  - sorted(): el get_top_donors anterior, que ordenaba a todos los donadores
+  - incremental: DonationTracker con Leaderboard
+
+Uso: python benchmarks/leaderboard_topk.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.auction.domain.donation import DonationTracker
+
+DONOR_COUNTS = [1_000, 100_000, 1_000_000]
+TOP = 5
+AMOUNTS = [1, 1, 1, 5, 10, 30, 99, 199, 500, 1000]
+
+
+def _tracker(donors: int) -> DonationTracker:
+    rng = random.Random(donors)
+    tracker = DonationTracker("bench")
+    for i in range(donors):
+        tracker.add_donation(f"usuario_{i}", rng.choice(AMOUNTS))
+    return tracker
+
+
+def _sorted_top(tracker: DonationTracker, limit: int) -> list:
+    return sorted(tracker.donors.values(), key=lambda d: d.total_amount, reverse=True)[:limit]
+
+
+def _measure(tracker: DonationTracker, top, rounds: int) -> float:
+    rng = random.Random(0)
+    donors = len(tracker.donors)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        tracker.add_donation(f"usuario_{rng.randrange(donors)}", rng.choice(AMOUNTS))
+        top(tracker, TOP)
+    return (time.perf_counter() - start) / rounds
+
+
+def main() -> None:
+    print(f"Coste por donación (registrar + leer top {TOP})\n")
+    print(f"{'donadores':>10}{'sorted() µs':>16}{'incremental µs':>18}{'mejora':>10}")
+    for donors in DONOR_COUNTS:
+        tracker = _tracker(donors)
+        baseline = _measure(tracker, _sorted_top, max(3, 100_000 // donors))
+        incremental = _measure(tracker, lambda t, limit: t.get_top_donors(limit), 50_000)
+        # Ambos caminos deben dar el mismo ranking
+        assert [d.username for d in tracker.get_top_donors(TOP)] == [d.username for d in _sorted_top(tracker, TOP)]
+        print(f"{donors:>10}{baseline * 1e6:>16.1f}{incremental * 1e6:>18.2f}{baseline / incremental:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark del pipeline completo sin red: fuente de eventos -> conector -> ingesta ->
+leaderboard -> fan-out WebSocket
+Crea AUCTIONS subastas del mismo streamer (una sola conexión compartida) con
+SUBSCRIBERS clientes WebSocket falsos cada una y entrega EVENTS GiftEvents a máxima
+velocidad desde:
+  - synthetic: SyntheticSource (combos con sus eventos intermedios y regalos sueltos)
+  - record: la misma fuente sintética grabándose en NDJSON con RecordingSource
+  - replay: la grabación reproducida con ReplaySource
+
+Mide eventos por segundo y µs por evento de principio a fin (hasta que la cola de
+ingesta queda vacía y los deltas están encolados en los clientes).
+
+Uso: python benchmarks/pipeline.py
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.auction.application.dtos import CreateAuctionDTO
+from src.modules.auction.application.service import AuctionService
+from src.modules.auction.infrastructure.repository import AuctionRepository
+from src.shared.event_sources import RecordingSource, ReplaySource, SyntheticSource
+from src.shared.tiktok_connector import TikTokLiveConnector
+from src.shared.websocket_manager import ConnectionManager
+
+EVENTS = 50_000
+DONORS = 2_000
+AUCTIONS = 4
+SUBSCRIBERS = 50
+STREAMER = "bench"
+
+
+class _NullWebSocket:
+    """WebSocket que acepta y descarta los frames"""
+
+    def __init__(self):
+        self.scope = {"subprotocols": []}
+        self.frames = 0
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, payload):
+        self.frames += 1
+
+    async def send_bytes(self, payload):
+        self.frames += 1
+
+    async def close(self, code=1000):
+        pass
+
+
+async def _run(source) -> tuple:
+    connector = TikTokLiveConnector(source=source)
+    manager = ConnectionManager(max_queue_size=1024)
+    service = AuctionService(AuctionRepository(), connector, ingest_queue_size=10_000)
+    service.set_websocket_manager(manager)
+    sockets = []
+    for index in range(AUCTIONS):
+        auction = service.create_auction(CreateAuctionDTO(tituloSubasta=f"bench {index}", nameStreamer=STREAMER, timer=60))
+        for _ in range(SUBSCRIBERS):
+            websocket = _NullWebSocket()
+            await manager.connect(websocket, auction.id)
+            sockets.append(websocket)
+        service.start_auction(auction.id)
+
+    start = time.perf_counter()
+    while not source.exhausted:
+        await asyncio.sleep(0.001)
+    await service.stop_ingestion()
+    elapsed = time.perf_counter() - start
+
+    # Dejar que el coalescedor publique el estado final y los clientes envíen lo pendiente
+    await asyncio.sleep(0.3)
+    donations = sum(tracker.donation_count for tracker in service.donation_trackers.values()) // AUCTIONS
+    frames = sum(websocket.frames for websocket in sockets)
+    await connector.disconnect_all()
+    return elapsed, donations, frames, service.get_ingestion_stats()
+
+
+def main() -> None:
+    logging.getLogger().setLevel(logging.WARNING)
+    print(f"{EVENTS} GiftEvents, {DONORS} donadores, {AUCTIONS} subastas × {SUBSCRIBERS} clientes WebSocket\n")
+    print(f"{'fuente':<12}{'eventos/s':>12}{'µs/evento':>12}{'donaciones':>12}{'lotes':>8}{'frames':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "events.ndjson")
+        # Cada fuente se crea al llegar su turno: replay lee la grabación de record
+        runs = (
+            ("synthetic", lambda: SyntheticSource(speed=0, donors=DONORS, limit=EVENTS, seed=0)),
+            ("record", lambda: RecordingSource(SyntheticSource(speed=0, donors=DONORS, limit=EVENTS, seed=0), path)),
+            ("replay", lambda: ReplaySource(path, speed=0)),
+        )
+        for label, create in runs:
+            source = create()
+            elapsed, donations, frames, stats = asyncio.run(_run(source))
+            source.close()
+            print(f"{label:<12}{EVENTS / elapsed:>12,.0f}{elapsed / EVENTS * 1e6:>12.2f}"
+                  f"{donations:>12}{stats['batches']:>8}{frames:>10}")
+
+
+if __name__ == "__main__":
+    main()
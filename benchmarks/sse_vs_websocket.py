@@ -0,0 +1,170 @@
+"""
+Benchmark de transporte: SSE frente a WebSocket con suscriptores inactivos
+Arranca la aplicación real con uvicorn en un proceso aparte, abre N suscriptores
+a una subasta y mide en el proceso servidor:
+  - memoria residente (RSS) añadida por cada 1.000 suscriptores
+  - CPU consumida durante una ventana sin eventos (solo ping / keep-alive)
+
+Uso: python benchmarks/sse_vs_websocket.py
+"""
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SUBSCRIBERS = 1_000
+IDLE_SECONDS = 15
+KEEPALIVE_SECONDS = 5  # mismo intervalo para ping WebSocket y keep-alive SSE
+
+
+def _serve(port: int) -> None:
+    """Proceso servidor: la app real sin conexión a TikTok"""
+    import logging
+    import uvicorn
+    logging.disable(logging.WARNING)
+    import main
+
+    async def _no_tiktok(*args, **kwargs):
+        return True
+
+    main.tiktok_connector.connect = _no_tiktok
+    main.tiktok_connector.disconnect = _no_tiktok
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="error")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _http(method: str, url: str, body: dict = None) -> dict:
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def _rss_bytes(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def _cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as stat:
+        fields = stat.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def _websocket_client(port: int, auction_id: str, ready: asyncio.Event, stop: asyncio.Event, counter: list):
+    import websockets
+    async with websockets.connect(f"ws://127.0.0.1:{port}/ws/auction/{auction_id}?since=0") as ws:
+        await ws.recv()  # snapshot
+        counter[0] += 1
+        if counter[0] == SUBSCRIBERS:
+            ready.set()
+        while not stop.is_set():
+            try:
+                message = json.loads(await asyncio.wait_for(ws.recv(), 1.0))
+            except asyncio.TimeoutError:
+                continue
+            if message.get("type") == "ping":
+                await ws.send('{"type":"pong"}')
+
+
+async def _sse_client(port: int, auction_id: str, ready: asyncio.Event, stop: asyncio.Event, counter: list):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"GET /sse/auction/{auction_id} HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+        f"Accept: text/event-stream\r\n\r\n".encode()
+    )
+    await writer.drain()
+    # Cabeceras + primer evento (snapshot)
+    while b"data: " not in await reader.readline():
+        pass
+    counter[0] += 1
+    if counter[0] == SUBSCRIBERS:
+        ready.set()
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(reader.readline(), 1.0)
+        except asyncio.TimeoutError:
+            continue
+    writer.close()
+
+
+async def _measure(transport: str) -> dict:
+    port = _free_port()
+    env = dict(
+        os.environ,
+        WS_PING_INTERVAL=str(KEEPALIVE_SECONDS),
+        SSE_KEEPALIVE_SECONDS=str(KEEPALIVE_SECONDS),
+    )
+    server = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", str(port)],
+        env=env, cwd=ROOT
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        for _ in range(100):
+            try:
+                _http("GET", f"{base}/health")
+                break
+            except OSError:
+                time.sleep(0.1)
+        auction = _http("POST", f"{base}/api/auctions", {"tituloSubasta": "bench", "nameStreamer": "bench", "timer": 60})
+        _http("POST", f"{base}/api/auctions/{auction['id']}/start")
+        await asyncio.sleep(0.5)
+
+        rss_before = _rss_bytes(server.pid)
+        client = _websocket_client if transport == "websocket" else _sse_client
+        ready, stop, counter = asyncio.Event(), asyncio.Event(), [0]
+        tasks = []
+        for _ in range(SUBSCRIBERS):
+            tasks.append(asyncio.create_task(client(port, auction["id"], ready, stop, counter)))
+            await asyncio.sleep(0)
+        await asyncio.wait_for(ready.wait(), 120)
+        await asyncio.sleep(1.0)
+
+        rss_after = _rss_bytes(server.pid)
+        cpu_start = _cpu_seconds(server.pid)
+        await asyncio.sleep(IDLE_SECONDS)
+        cpu_idle = _cpu_seconds(server.pid) - cpu_start
+
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return {
+            "rss_per_1000": (rss_after - rss_before) / SUBSCRIBERS * 1000,
+            "cpu_ms_per_s": cpu_idle / IDLE_SECONDS * 1000 * 1000 / SUBSCRIBERS,
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    print(
+        f"{SUBSCRIBERS} suscriptores inactivos, ventana de {IDLE_SECONDS} s, "
+        f"ping/keep-alive cada {KEEPALIVE_SECONDS} s\n"
+    )
+    print(f"{'transporte':<12}{'RSS MB / 1000':>15}{'CPU ms/s / 1000':>18}")
+    for transport in ("websocket", "sse"):
+        result = asyncio.run(_measure(transport))
+        print(f"{transport:<12}{result['rss_per_1000'] / 1e6:>15.2f}{result['cpu_ms_per_s']:>18.2f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--serve":
+        _serve(int(sys.argv[2]))
+    else:
+        main()
@@ -0,0 +1,113 @@
+"""
+Benchmark del aislamiento de los clientes de TikTok en procesos worker
+Una fuente de prueba decodifica GiftEvents protobuf reales (GiftEvent().parse sobre
+bytes serializados, como hace TikTokLive con cada mensaje del WebSocket) en ráfagas.
+Mientras tanto, en el proceso web, una sonda duerme 10 ms en bucle y mide cuánto se
+retrasa cada despertar: es el retraso que sufrirían los timers y las respuestas de las
+demás subastas.
+  - en proceso: la fuente corre en el event loop del proceso web
+  - worker: la misma fuente corre en un ProcessPoolSource de 1 worker
+
+Uso: python benchmarks/tiktok_workers.py
+"""
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from TikTokLive.events import GiftEvent
+from TikTokLive.proto.custom_proto import ExtendedGift, ExtendedUser
+from TikTokLive.proto.tiktok_proto import ImageModel
+
+from src.shared.event_sources import EventSource, TikTokLiveSource
+from src.shared.tiktok_connector import TikTokLiveConnector
+from src.shared.tiktok_workers import ProcessPoolSource
+
+SECONDS = 5
+# GiftEvents por ráfaga (un frame del WebSocket de TikTok trae varios mensajes) y ráfagas por segundo
+BURST = 20
+BURSTS_PER_SECOND = 5
+USERS = 500
+PROBE_INTERVAL = 0.010
+
+
+class _ProtoGiftSource(EventSource):
+    """Ráfagas de GiftEvents serializados que se decodifican como en TikTokLive"""
+
+    name = "proto"
+
+    async def run(self, unique_id, on_gift, on_connect) -> None:
+        decoder = TikTokLiveSource()
+        payloads = [
+            bytes(GiftEvent(
+                from_user=ExtendedUser(
+                    id=i,
+                    nick_name=f"Usuario {i}",
+                    username=f"usuario_{i}",
+                    avatar_thumb=ImageModel(m_urls=[f"https://p16-sign.tiktokcdn.com/avatar/{i}.webp"])
+                ),
+                m_gift=ExtendedGift(id=5655, name="Rose", diamond_count=1, type=2),
+                repeat_count=1,
+                repeat_end=1,
+                group_id=i
+            ))
+            for i in range(USERS)
+        ]
+        on_connect()
+        index = 0
+        while True:
+            for _ in range(BURST):
+                on_gift(decoder.decode(GiftEvent().parse(payloads[index % USERS])))
+                index += 1
+            await asyncio.sleep(1 / BURSTS_PER_SECOND)
+
+
+def _proto_source() -> EventSource:
+    return _ProtoGiftSource()
+
+
+async def _probe(seconds: float) -> list:
+    """Retraso (ms) de cada despertar de un sleep de PROBE_INTERVAL"""
+    lags = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append((time.perf_counter() - start - PROBE_INTERVAL) * 1000)
+    return lags
+
+
+async def _run(source: EventSource) -> tuple:
+    connector = TikTokLiveConnector(source=source)
+    donations = []
+    await connector.connect("bench", "bench", lambda *args: donations.append(args))
+    # Esperar a la primera donación (el worker tarda en arrancar) antes de medir
+    while not donations:
+        await asyncio.sleep(0.05)
+    start = len(donations)
+    lags = await _probe(SECONDS)
+    received = len(donations) - start
+    await connector.disconnect_all()
+    return lags, received
+
+
+def main() -> None:
+    logging.getLogger().setLevel(logging.ERROR)
+    print(f"{BURST * BURSTS_PER_SECOND} GiftEvents/s en ráfagas de {BURST}, sonda cada {PROBE_INTERVAL * 1000:.0f} ms durante {SECONDS} s\n")
+    print(f"{'modo':<14}{'p50 ms':>9}{'p99 ms':>9}{'máx ms':>9}{'donaciones/s':>15}")
+    for label, source in (
+        ("en proceso", _ProtoGiftSource()),
+        ("worker", ProcessPoolSource(1, source_factory=_proto_source, log_level="error")),
+    ):
+        lags, received = asyncio.run(_run(source))
+        lags.sort()
+        p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+        print(f"{label:<14}{statistics.median(lags):>9.2f}{p99:>9.2f}{lags[-1]:>9.2f}{received / SECONDS:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark de deriva del temporizador de subastas
+Ejecuta una subasta de 30 minutos sobre un reloj virtual y compara:
+  - modelo anterior: contador decrementado tras cada asyncio.sleep(1)
+  - modelo actual: deadline monotónico + AuctionTimer (rueda de tiempos)
+
+Uso: python benchmarks/timer_drift.py
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.virtual_clock import VirtualClock, run_virtual
+from src.modules.auction.application.dtos import CreateAuctionDTO
+from src.modules.auction.application.service import AuctionService
+from src.modules.auction.application.timer import AuctionTimer, TICK_MODE
+from src.modules.auction.domain.auction import Auction
+from src.modules.auction.infrastructure.repository import AuctionRepository
+
+AUCTION_MINUTES = 30
+# Retraso por tick: latencia del scheduler + trabajo de broadcast
+LAGS = [0.0, 0.001, 0.005, 0.020]
+
+
+class _NullConnector:
+    async def connect(self, *args, **kwargs):
+        return True
+
+    async def disconnect(self, *args, **kwargs):
+        return None
+
+
+class _LaggyManager:
+    """WebSocket manager falso: cada broadcast consume `lag` segundos virtuales"""
+
+    def __init__(self, clock: VirtualClock, lag: float):
+        self.clock = clock
+        self.lag = lag
+        self.completed_at = None
+
+    async def broadcast_time_update(self, auction_id, remaining_seconds):
+        self.clock.advance(self.lag)
+
+    async def broadcast_clock_sync(self, auction_id, clock_data):
+        self.clock.advance(self.lag)
+
+    async def broadcast_status_change(self, auction_id, status):
+        if status == "completed":
+            self.completed_at = self.clock.now
+
+
+def legacy_model(lag: float) -> float:
+    """Bucle anterior: remaining -= 1 después de cada sleep(1)"""
+    clock = VirtualClock()
+
+    async def run():
+        remaining = AUCTION_MINUTES * 60
+        while remaining > 0:
+            await asyncio.sleep(1)
+            clock.advance(lag)
+            remaining -= 1
+        return clock.now
+
+    return run_virtual(run(), clock)
+
+
+def deadline_model(lag: float) -> float:
+    """Modelo actual: AuctionTimer real sobre una entidad con deadline"""
+    clock = VirtualClock()
+    manager = _LaggyManager(clock, lag)
+
+    async def run():
+        repository = AuctionRepository()
+        service = AuctionService(repository, _NullConnector())
+        timer = AuctionTimer(service, manager, mode=TICK_MODE)
+        service.set_websocket_manager(manager)
+        service.set_timer(timer)
+
+        created = service.create_auction(
+            CreateAuctionDTO(tituloSubasta="bench", nameStreamer="bench", timer=AUCTION_MINUTES)
+        )
+        # Sustituir la entidad por una con el reloj virtual
+        auction = Auction(created.id, "bench", "bench", AUCTION_MINUTES, clock=clock)
+        repository.save(auction)
+
+        timer.start()
+        service.start_auction(auction.id)
+        started_at = clock.now
+        while manager.completed_at is None:
+            await asyncio.sleep(1)
+        await timer.stop()
+        return manager.completed_at - started_at
+
+    return run_virtual(run(), clock)
+
+
+def main():
+    expected = AUCTION_MINUTES * 60
+    print(f"Subasta de {AUCTION_MINUTES} min ({expected} s) sobre reloj virtual\n")
+    print(f"{'lag/tick':>10} | {'anterior (s)':>14} | {'deriva':>9} | {'deadline (s)':>14} | {'deriva':>9}")
+    print("-" * 68)
+    for lag in LAGS:
+        legacy = legacy_model(lag)
+        deadline = deadline_model(lag)
+        print(
+            f"{lag * 1000:>8.1f}ms | {legacy:>14.3f} | {legacy - expected:>+8.3f}s | "
+            f"{deadline:>14.3f} | {deadline - expected:>+8.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
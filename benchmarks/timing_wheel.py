@@ -0,0 +1,78 @@
+"""
+Benchmark de la rueda de tiempos del reloj de subastas
+Mide el coste por tick con 10 a 50.000 subastas programadas y lo compara con
+el sondeo anterior (recorrer todas las subastas en cada tick).
+
+Uso: python benchmarks/timing_wheel.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.shared.timing_wheel import TimingWheel
+
+AUCTION_COUNTS = [10, 100, 1_000, 10_000, 50_000]
+RESOLUTION = 0.05
+MEASURED_TICKS = 5_000
+# Subastas que vencen (y se reprograman) en cada tick, igual para todos los tamaños
+DUE_PER_TICK = 5
+
+
+class _Auction:
+    __slots__ = ("id", "deadline", "active")
+
+    def __init__(self, auction_id: str, deadline: float):
+        self.id = auction_id
+        self.deadline = deadline
+        self.active = True
+
+
+def wheel_cost(count: int) -> float:
+    """Coste medio por tick (µs) de avanzar la rueda y reprogramar lo vencido"""
+    rng = random.Random(count)
+    wheel = TimingWheel(resolution=RESOLUTION)
+    # Deadlines repartidos entre 1 y 24 horas (subastas largas en curso)
+    for i in range(count):
+        wheel.schedule(("deadline", f"a{i}"), rng.uniform(3_600, 86_400))
+    # Ticks periódicos que vencen en cada slot medido
+    for i in range(DUE_PER_TICK):
+        wheel.schedule(("tick", f"t{i}"), RESOLUTION)
+
+    now = 0.0
+    start = time.perf_counter()
+    for _ in range(MEASURED_TICKS):
+        now += RESOLUTION
+        for key, _ in wheel.advance(now):
+            wheel.schedule(key, now + RESOLUTION)
+    return (time.perf_counter() - start) / MEASURED_TICKS * 1e6
+
+
+def polling_cost(count: int) -> float:
+    """Coste medio por tick (µs) del sondeo: revisar cada subasta en cada tick"""
+    rng = random.Random(count)
+    auctions = [_Auction(f"a{i}", rng.uniform(3_600, 86_400)) for i in range(count)]
+    ticks = max(20, MEASURED_TICKS * 100 // max(count, 100))
+
+    now = 0.0
+    start = time.perf_counter()
+    for _ in range(ticks):
+        now += RESOLUTION
+        for auction in auctions:
+            if auction.active and auction.deadline <= now:
+                auction.active = False
+    return (time.perf_counter() - start) / ticks * 1e6
+
+
+def main():
+    print(f"Resolución {RESOLUTION * 1000:.0f} ms, {DUE_PER_TICK} vencimientos por tick\n")
+    print(f"{'subastas':>10} | {'rueda µs/tick':>14} | {'sondeo µs/tick':>15}")
+    print("-" * 46)
+    for count in AUCTION_COUNTS:
+        print(f"{count:>10,} | {wheel_cost(count):>14.2f} | {polling_cost(count):>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
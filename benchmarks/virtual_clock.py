@@ -0,0 +1,54 @@
+"""
+Reloj virtual para benchmarks
+Event loop de asyncio cuyo tiempo avanza al instante cuando no hay trabajo pendiente
+"""
+import asyncio
+import selectors
+
+
+class VirtualClock:
+    """Reloj monotónico controlado manualmente"""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        """Avanza el reloj (simula tiempo consumido o retrasos del scheduler)"""
+        self.now += seconds
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    """Selector que, en lugar de bloquear, salta el reloj hasta el siguiente timer"""
+
+    def __init__(self, clock: VirtualClock):
+        super().__init__()
+        self._clock = clock
+
+    def select(self, timeout=None):
+        events = super().select(0)
+        if not events and timeout:
+            self._clock.advance(timeout)
+        return events
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """Event loop con tiempo virtual: loop.time(), sleep y call_at usan el VirtualClock"""
+
+    def __init__(self, clock: VirtualClock):
+        super().__init__(selector=_VirtualSelector(clock))
+        self.clock = clock
+
+    def time(self) -> float:
+        return self.clock.now
+
+
+def run_virtual(coro, clock: VirtualClock):
+    """Ejecuta una corutina sobre un loop de tiempo virtual"""
+    loop = VirtualTimeLoop(clock)
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
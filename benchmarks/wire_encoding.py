@@ -0,0 +1,121 @@
+"""
+Benchmark de codificación en el cable: JSON frente a MessagePack
+Mide bytes por frame y tiempo de serialización por tipo de mensaje.
+
+Uso: python benchmarks/wire_encoding.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.shared import serialization
+from src.shared.serialization import encode_json, encode_msgpack
+
+AUCTION_ID = "550e8400-e29b-41d4-a716-446655440000"
+ROUNDS = 20_000
+
+
+def _top_donors() -> list:
+    return [
+        {
+            "username": f"usuario_{rank}",
+            "profilePicture": f"https://p16-sign.tiktokcdn.com/avatar/{rank}.webp",
+            "totalAmount": 1000.0 * (6 - rank),
+            "donationCount": 10 * rank,
+            "lastDonation": "2025-11-07T10:35:00",
+            "rank": rank
+        }
+        for rank in range(1, 6)
+    ]
+
+
+MESSAGES = {
+    "time_update": {
+        "type": "time_update",
+        "auctionId": AUCTION_ID,
+        "data": {"remainingSeconds": 240}
+    },
+    "status_change": {
+        "type": "status_change",
+        "auctionId": AUCTION_ID,
+        "data": {"status": "paused"}
+    },
+    "donation_update": {
+        "type": "donation_update",
+        "auctionId": AUCTION_ID,
+        "data": {
+            "auctionId": AUCTION_ID,
+            "topDonors": _top_donors(),
+            "totalDonations": 15000.0,
+            "totalDonors": 250,
+            "seq": 41
+        }
+    },
+    "initial_data": {
+        "type": "initial_data",
+        "auctionId": AUCTION_ID,
+        "data": {
+            "nameStreamer": "santiago",
+            "tituloSubasta": "Subasta online",
+            "status": "active",
+            "remainingSeconds": 300,
+            "timerMinutes": 5,
+            "remainingMs": 299512,
+            "deadline": 1762511760000,
+            "serverTime": 1762511460488
+        }
+    },
+    "clock_sync": {
+        "type": "clock_sync",
+        "auctionId": AUCTION_ID,
+        "data": {
+            "status": "active",
+            "remainingSeconds": 240,
+            "remainingMs": 239512,
+            "deadline": 1762511700000,
+            "serverTime": 1762511460488
+        }
+    },
+    "donation_delta": {
+        "type": "donation_delta",
+        "auctionId": AUCTION_ID,
+        "data": {
+            "seq": 42,
+            "upserts": [{"username": "usuario_2", "totalAmount": 4020.0, "donationCount": 21}],
+            "removed": [],
+            "totalDonations": 15020.0,
+            "totalDonors": 250
+        }
+    },
+}
+
+
+def _time_per_call(encoder, message) -> float:
+    """Microsegundos por serialización"""
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        encoder(message)
+    return (time.perf_counter() - start) / ROUNDS * 1e6
+
+
+def main() -> None:
+    json_impl = "orjson" if serialization.orjson is not None else "json"
+    msgpack_impl = "msgpack" if serialization.msgpack is not None else "puro Python"
+    print(f"JSON: {json_impl} | MessagePack: {msgpack_impl} | {ROUNDS} rondas por mensaje\n")
+    print(f"{'mensaje':<16}{'JSON B':>8}{'MP B':>8}{'ahorro':>8}{'JSON µs':>10}{'MP µs':>10}")
+    for name, message in MESSAGES.items():
+        json_bytes = len(encode_json(message).encode("utf-8"))
+        msgpack_bytes = len(encode_msgpack(message))
+        saving = 1 - msgpack_bytes / json_bytes
+        json_us = _time_per_call(encode_json, message)
+        msgpack_us = _time_per_call(encode_msgpack, message)
+        print(
+            f"{name:<16}{json_bytes:>8}{msgpack_bytes:>8}{saving:>7.0%}"
+            f"{json_us:>10.2f}{msgpack_us:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
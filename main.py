@@ -3,11 +3,13 @@ Aplicación principal FastAPI - TiktokCraft
 Sistema modular de overlays para TikTok Live Studio
 """
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
 import asyncio
+import json
+import logging
 import os
 from typing import Optional
 
@@ -15,14 +17,90 @@ from typing import Optional
 from src.modules.auction.application.service import AuctionService
 from src.modules.auction.infrastructure.repository import AuctionRepository
 from src.modules.auction.infrastructure.controller import AuctionController
+from src.modules.auction.application.timer import AuctionTimer
+from src.modules.auction.application.rate_publisher import RatePublisher
+from src.modules.auction.infrastructure.journal import DonationJournal
 from src.shared.websocket_manager import websocket_manager
+from src.shared.client_connection import OverflowPolicy
+from src.shared.backplane import create_backplane
+from src.shared.sse import encode_sse, parse_event_id
 from src.shared.tiktok_connector import tiktok_connector
+from src.shared.event_sources import create_event_source, DEFAULT_GIFT_MIX
+from src.shared.tiktok_workers import ProcessPoolSource
+from src.shared.structured_logging import setup_logging, stop_logging
 
 
 # Configuración desde variables de entorno
 BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*").split(",")
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+# Logging: nivel, formato ("text" o "json", una línea por registro) y muestreo por categoría
+# bajo carga (p. ej. "gift=100,donation=100": tras LOG_SAMPLE_BURST eventos por segundo, 1 de cada N)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+LOG_SAMPLE_BURST = int(os.getenv("LOG_SAMPLE_BURST", "10"))
+# Protocolo del temporizador: "sync" (deadline + resync periódico) o "tick" (time_update por segundo)
+TIMER_SYNC_MODE = os.getenv("TIMER_SYNC_MODE", "sync")
+TIMER_RESYNC_SECONDS = float(os.getenv("TIMER_RESYNC_SECONDS", "60"))
+# Cola de salida por conexión WebSocket: tamaño y política ante clientes lentos
+WS_QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", "256"))
+WS_OVERFLOW_POLICY = OverflowPolicy(os.getenv("WS_OVERFLOW_POLICY", "drop_oldest"))
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "10"))
+# Heartbeat WebSocket: ping cada WS_PING_INTERVAL s (0 = desactivado), cierre tras WS_IDLE_TIMEOUT s sin respuesta
+WS_PING_INTERVAL = float(os.getenv("WS_PING_INTERVAL", "25"))
+WS_IDLE_TIMEOUT = float(os.getenv("WS_IDLE_TIMEOUT", "60"))
+# Frames recientes que se guardan por subasta para reanudar reconexiones con ?since=
+WS_REPLAY_SIZE = int(os.getenv("WS_REPLAY_SIZE", "256"))
+# Comentario keep-alive en los streams SSE cuando no hay eventos (segundos)
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+# Intervalo mínimo entre donation_update por subasta (coalescencia de ráfagas de regalos)
+DONATION_FLUSH_MS = int(os.getenv("DONATION_FLUSH_MS", "100"))
+# Cola de ingesta entre el conector de TikTok y las subastas (0 = desactivada, se aplica al recibir):
+# las donaciones se aplican en lotes de hasta INGEST_BATCH_SIZE esperando como mucho INGEST_LINGER_MS
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "10000"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+INGEST_LINGER_MS = float(os.getenv("INGEST_LINGER_MS", "5"))
+# Fuente de eventos de TikTok: "live" (real), "record" (real + grabación NDJSON en EVENT_RECORD_PATH),
+# "replay" (reproduce EVENT_RECORD_PATH) o "synthetic" (generador); EVENT_SPEED: 1, 10... o 0 = máxima
+EVENT_SOURCE = os.getenv("EVENT_SOURCE", "live")
+EVENT_RECORD_PATH = os.getenv("EVENT_RECORD_PATH", "./data/events.ndjson")
+EVENT_SPEED = float(os.getenv("EVENT_SPEED", "1"))
+SYNTHETIC_RATE = float(os.getenv("SYNTHETIC_RATE", "50"))
+SYNTHETIC_DONORS = int(os.getenv("SYNTHETIC_DONORS", "2000"))
+SYNTHETIC_GIFTS = os.getenv("SYNTHETIC_GIFTS", DEFAULT_GIFT_MIX)
+# Procesos que alojan los clientes de TikTok (0 = en el proceso web) y reinicio de workers sin heartbeat (s)
+TIKTOK_WORKERS = int(os.getenv("TIKTOK_WORKERS", "0"))
+TIKTOK_WORKER_TIMEOUT = float(os.getenv("TIKTOK_WORKER_TIMEOUT", "10"))
+# Combos de regalos: cierre de combos sin evento final (segundos) y avisos de combo en curso
+STREAK_TIMEOUT_SECONDS = float(os.getenv("STREAK_TIMEOUT_SECONDS", "10"))
+MAX_OPEN_STREAKS = int(os.getenv("MAX_OPEN_STREAKS", "10000"))
+COMBO_HINTS = os.getenv("COMBO_HINTS", "false").lower() in ("1", "true", "yes")
+# Reconexión con TikTok Live: backoff exponencial con jitter entre estos límites (segundos)
+RECONNECT_BASE_SECONDS = float(os.getenv("RECONNECT_BASE_SECONDS", "2"))
+RECONNECT_MAX_SECONDS = float(os.getenv("RECONNECT_MAX_SECONDS", "120"))
+# Backplane entre workers: "inprocess" (un worker) o "unix" (broker local por socket Unix)
+WORKERS = int(os.getenv("WORKERS", "1"))
+BACKPLANE = os.getenv("BACKPLANE", "unix" if WORKERS > 1 else "inprocess")
+BACKPLANE_SOCKET = os.getenv("BACKPLANE_SOCKET", "/tmp/tiktokcraft-backplane.sock")
+# Journal de donaciones y estados para sobrevivir a reinicios (vacío = desactivado)
+JOURNAL_DIR = os.getenv("JOURNAL_DIR", "")
+JOURNAL_FSYNC_MS = int(os.getenv("JOURNAL_FSYNC_MS", "50"))
+# rate_update periódico para los overlays (segundos; 0 = desactivado) y su ventana deslizante
+RATE_UPDATE_SECONDS = float(os.getenv("RATE_UPDATE_SECONDS", "0"))
+RATE_WINDOW_SECONDS = int(os.getenv("RATE_WINDOW_SECONDS", "60"))
+
+# Los registros se escriben desde un hilo aparte: el event loop solo los encola
+setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_SAMPLING, LOG_SAMPLE_BURST)
+
+if WORKERS > 1:
+    # El backplane solo reparte broadcasts: subastas, timers y trackers siguen en memoria de cada worker
+    logging.getLogger(__name__).warning(
+        "⚠️ WORKERS=%s: cada worker tiene sus propias subastas en memoria. Crear una subasta en "
+        "un worker y gestionarla desde otro devuelve 404, y los overlays conectados a otro "
+        "worker no la encuentran. Usa WORKERS=1 salvo que el balanceador fije cada subasta a "
+        "un worker.", WORKERS
+    )
 
 # Crear aplicación
 app = FastAPI(
@@ -45,15 +123,159 @@ overlays_dir = Path(__file__).parent / "overlays"
 app.mount("/static", StaticFiles(directory=str(overlays_dir)), name="static")
 
 # Inicializar servicios y controladores
+websocket_manager.configure(
+    max_queue_size=WS_QUEUE_SIZE,
+    overflow_policy=WS_OVERFLOW_POLICY,
+    send_timeout=WS_SEND_TIMEOUT,
+    ping_interval=WS_PING_INTERVAL,
+    idle_timeout=WS_IDLE_TIMEOUT,
+    replay_size=WS_REPLAY_SIZE
+)
+websocket_manager.set_backplane(create_backplane(BACKPLANE, BACKPLANE_SOCKET))
+tiktok_connector.configure(
+    streak_timeout=STREAK_TIMEOUT_SECONDS,
+    max_open_streaks=MAX_OPEN_STREAKS,
+    reconnect_base=RECONNECT_BASE_SECONDS,
+    reconnect_max=RECONNECT_MAX_SECONDS
+)
+event_source_options = dict(
+    record_path=EVENT_RECORD_PATH,
+    speed=EVENT_SPEED,
+    synthetic_rate=SYNTHETIC_RATE,
+    synthetic_donors=SYNTHETIC_DONORS,
+    synthetic_gifts=SYNTHETIC_GIFTS
+)
+tiktok_workers = ProcessPoolSource(
+    TIKTOK_WORKERS,
+    EVENT_SOURCE,
+    event_source_options,
+    heartbeat_timeout=TIKTOK_WORKER_TIMEOUT,
+    log_level=LOG_LEVEL
+) if TIKTOK_WORKERS > 0 else None
+tiktok_connector.set_event_source(tiktok_workers or create_event_source(EVENT_SOURCE, **event_source_options))
 auction_repository = AuctionRepository()
-auction_service = AuctionService(auction_repository, tiktok_connector, base_url=BASE_URL)
+auction_service = AuctionService(
+    auction_repository,
+    tiktok_connector,
+    base_url=BASE_URL,
+    donation_flush_ms=DONATION_FLUSH_MS,
+    combo_hints=COMBO_HINTS,
+    ingest_queue_size=INGEST_QUEUE_SIZE,
+    ingest_batch_size=INGEST_BATCH_SIZE,
+    ingest_linger_ms=INGEST_LINGER_MS
+)
 auction_service.set_websocket_manager(websocket_manager)
 auction_controller = AuctionController(auction_service)
+auction_timer = AuctionTimer(
+    auction_service,
+    websocket_manager,
+    mode=TIMER_SYNC_MODE,
+    resync_interval=TIMER_RESYNC_SECONDS
+)
+auction_service.set_timer(auction_timer)
+donation_journal = DonationJournal(JOURNAL_DIR, fsync_interval=JOURNAL_FSYNC_MS / 1000) if JOURNAL_DIR else None
+auction_service.set_journal(donation_journal)
+rate_publisher = RatePublisher(
+    auction_service,
+    websocket_manager,
+    interval=RATE_UPDATE_SECONDS,
+    window_seconds=RATE_WINDOW_SECONDS
+) if RATE_UPDATE_SECONDS > 0 else None
 
 # Registrar rutas del módulo de subastas
 app.include_router(auction_controller.router)
 
 
+@app.on_event("startup")
+async def restore_auctions():
+    """Reconstruye subastas y leaderboards desde el journal y arranca la escritura agrupada"""
+    if donation_journal:
+        auction_service.restore_from_journal()
+        donation_journal.start()
+
+
+@app.on_event("startup")
+async def start_tiktok_workers():
+    """Arranca los procesos que alojan los clientes de TikTok (si TIKTOK_WORKERS > 0)"""
+    if tiktok_workers:
+        tiktok_workers.start()
+
+
+@app.on_event("startup")
+async def start_backplane():
+    """Une este worker al backplane para recibir los broadcasts de los demás"""
+    await websocket_manager.start_backplane()
+
+
+@app.on_event("shutdown")
+async def stop_backplane():
+    """Sale del backplane"""
+    await websocket_manager.stop_backplane()
+
+
+@app.on_event("startup")
+async def start_websocket_heartbeat():
+    """Arranca el ping periódico y el cierre de conexiones WebSocket inactivas"""
+    websocket_manager.start_heartbeat()
+
+
+@app.on_event("shutdown")
+async def stop_websocket_heartbeat():
+    """Detiene el heartbeat WebSocket"""
+    await websocket_manager.stop_heartbeat()
+
+
+@app.on_event("startup")
+async def start_auction_timer():
+    """Arranca el reloj central de subastas (uno por proceso)"""
+    auction_timer.start()
+
+
+@app.on_event("shutdown")
+async def stop_auction_timer():
+    """Detiene el reloj central de subastas"""
+    await auction_timer.stop()
+
+
+@app.on_event("startup")
+async def start_rate_publisher():
+    """Arranca el envío periódico de rate_update (si RATE_UPDATE_SECONDS > 0)"""
+    if rate_publisher:
+        rate_publisher.start()
+
+
+@app.on_event("shutdown")
+async def stop_rate_publisher():
+    """Detiene el envío de rate_update"""
+    if rate_publisher:
+        await rate_publisher.stop()
+
+
+@app.on_event("shutdown")
+async def disconnect_tiktok():
+    """Cierra las conexiones con TikTok Live (los combos abiertos se registran) y la fuente de eventos"""
+    await tiktok_connector.disconnect_all()
+
+
+@app.on_event("shutdown")
+async def stop_ingestion():
+    """Aplica las donaciones que queden en la cola de ingesta"""
+    await auction_service.stop_ingestion()
+
+
+@app.on_event("shutdown")
+async def stop_journal():
+    """Escribe lo pendiente del journal y cierra sus ficheros"""
+    if donation_journal:
+        await donation_journal.stop()
+
+
+@app.on_event("shutdown")
+async def flush_logs():
+    """Escribe los registros pendientes y detiene el hilo de logging"""
+    stop_logging()
+
+
 # Health check para Dokploy
 @app.get("/health")
 async def health_check():
@@ -62,10 +284,28 @@ async def health_check():
         "status": "healthy",
         "environment": ENVIRONMENT,
         "version": "1.0.0",
-        "websocket_connections": len(websocket_manager._connections)
+        "websocket_connections": websocket_manager.connection_count,
+        "websockets": websocket_manager.get_counters(),
+        "tiktok": tiktok_connector.get_stats(),
+        "ingestion": auction_service.get_ingestion_stats(),
+        "tiktokWorkers": tiktok_workers.stats() if tiktok_workers else None
     }
 
 
+# Estadísticas de las colas de salida WebSocket
+@app.get("/api/websockets/stats")
+async def websocket_stats(auction_id: Optional[str] = None):
+    """Profundidad de cola y contadores de descarte por conexión"""
+    return websocket_manager.get_connection_stats(auction_id)
+
+
+# Estadísticas de la cola de ingesta de donaciones
+@app.get("/api/ingestion/stats")
+async def ingestion_stats():
+    """Profundidad, marca de agua, rechazos y tamaño medio de lote de la cola de ingesta"""
+    return auction_service.get_ingestion_stats() or {"enabled": False}
+
+
 # Ruta raíz - Dashboard
 @app.get("/", response_class=HTMLResponse)
 async def root():
@@ -296,6 +536,120 @@ async def auction_overlay(auction_id: str):
         )
 
 
+async def send_leaderboard_snapshot(websocket: WebSocket, auction_id: str):
+    """Envía el leaderboard completo con su seq; los donation_delta posteriores parten de él"""
+    snapshot = auction_service.get_leaderboard_snapshot(auction_id)
+    if snapshot is None:
+        return
+    await websocket_manager.send_personal_message({
+        "type": "donation_update",
+        "auctionId": auction_id,
+        "data": snapshot
+    }, websocket, auction_id)
+
+
+def build_initial_data(auction_id: str) -> Optional[dict]:
+    """Estado de la subasta para un cliente que se conecta"""
+    auction = auction_service.get_auction(auction_id)
+    if not auction:
+        return None
+    # Incluye deadline y hora del servidor para que el cliente cuente localmente
+    clock = auction_service.get_clock_sync(auction_id) or {}
+    return {
+        "nameStreamer": auction.nameStreamer,
+        "tituloSubasta": auction.tituloSubasta,
+        "status": auction.status,
+        "remainingSeconds": auction.remainingSeconds,
+        "timerMinutes": auction.timerMinutes,
+        "remainingMs": clock.get("remainingMs"),
+        "deadline": clock.get("deadline"),
+        "serverTime": clock.get("serverTime")
+    }
+
+
+def build_snapshot_message(auction_id: str) -> Optional[dict]:
+    """Estado de la subasta y leaderboard en un solo mensaje, con el seq desde el que continuar"""
+    initial_data = build_initial_data(auction_id)
+    if initial_data is None:
+        return None
+    return {
+        "type": "snapshot",
+        "auctionId": auction_id,
+        **websocket_manager.get_stream_position(auction_id),
+        "data": {
+            "auction": initial_data,
+            "leaderboard": auction_service.get_leaderboard_snapshot(auction_id)
+        }
+    }
+
+
+async def send_combined_snapshot(websocket: WebSocket, auction_id: str):
+    """Envía el snapshot combinado por el WebSocket"""
+    snapshot = build_snapshot_message(auction_id)
+    if snapshot:
+        await websocket_manager.send_personal_message(snapshot, websocket, auction_id)
+
+
+async def sse_event_stream(auction_id: str, last_event_id: Optional[str]):
+    """
+    Genera el stream SSE de una subasta
+    
+    Reanuda desde Last-Event-ID si el hueco sigue en el buffer; si no, empieza con un snapshot.
+    Los frames en vivo se leen del stream compartido, ya codificados.
+    """
+    stream = websocket_manager.sse.subscribe(auction_id)
+    try:
+        # El navegador reintenta a los 3 s si se corta la conexión
+        yield b"retry: 3000\n\n"
+        
+        epoch, since = parse_event_id(last_event_id)
+        missed = websocket_manager.get_replay(auction_id, since, epoch) if last_event_id else None
+        position = websocket_manager.get_stream_position(auction_id)
+        if missed is None:
+            snapshot = build_snapshot_message(auction_id)
+            if snapshot:
+                yield encode_sse(snapshot, position["epoch"])
+        elif missed:
+            yield b"".join(encode_sse(message, position["epoch"]) for message in missed)
+        cursor = position["seq"]
+        
+        while True:
+            frames = await stream.wait_after(cursor, SSE_KEEPALIVE_SECONDS)
+            if frames is None:
+                # El cliente se quedó atrás más allá del stream: volver a empezar con un snapshot
+                position = websocket_manager.get_stream_position(auction_id)
+                snapshot = build_snapshot_message(auction_id)
+                if snapshot:
+                    yield encode_sse(snapshot, position["epoch"])
+                cursor = position["seq"]
+            elif not frames:
+                yield b": keep-alive\n\n"
+            else:
+                cursor = frames[-1][0]
+                yield b"".join(frame for _, frame in frames)
+    finally:
+        websocket_manager.sse.unsubscribe(auction_id)
+
+
+# Server-Sent Events: alternativa ligera al WebSocket para overlays que solo reciben
+@app.get("/sse/auction/{auction_id}")
+async def sse_endpoint(request: Request, auction_id: str, lastEventId: Optional[str] = None):
+    """
+    Stream SSE con los mismos eventos que /ws/auction/{auction_id}
+    
+    Acepta la cabecera Last-Event-ID (reconexión automática del navegador) o ?lastEventId=.
+    """
+    last_event_id = request.headers.get("last-event-id") or lastEventId
+    return StreamingResponse(
+        sse_event_stream(auction_id, last_event_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 # WebSocket para comunicación en tiempo real
 @app.websocket("/ws/auction/{auction_id}")
 async def websocket_endpoint(websocket: WebSocket, auction_id: str):
@@ -304,41 +658,43 @@ async def websocket_endpoint(websocket: WebSocket, auction_id: str):
     """
     await websocket_manager.connect(websocket, auction_id)
     
-    # Enviar datos iniciales de la subasta
-    auction = auction_service.get_auction(auction_id)
-    if auction:
-        await websocket_manager.send_personal_message({
-            "type": "initial_data",
-            "auctionId": auction_id,
-            "data": {
-                "nameStreamer": auction.nameStreamer,
-                "tituloSubasta": auction.tituloSubasta,
-                "status": auction.status,
-                "remainingSeconds": auction.remainingSeconds,
-                "timerMinutes": auction.timerMinutes
-            }
-        }, websocket)
+    since = websocket.query_params.get("since")
+    if since is not None:
+        # Reconexión: reenviar solo lo perdido o, si el hueco es muy antiguo, un snapshot combinado
+        try:
+            missed = websocket_manager.get_replay(auction_id, int(since), websocket.query_params.get("epoch"))
+        except ValueError:
+            missed = None
+        if missed is not None:
+            for message in missed:
+                await websocket_manager.send_personal_message(message, websocket, auction_id)
+        else:
+            await send_combined_snapshot(websocket, auction_id)
+    else:
+        # Enviar datos iniciales de la subasta
+        initial_data = build_initial_data(auction_id)
+        if initial_data:
+            await websocket_manager.send_personal_message({
+                "type": "initial_data",
+                "auctionId": auction_id,
+                **websocket_manager.get_stream_position(auction_id),
+                "data": initial_data
+            }, websocket, auction_id)
+            await send_leaderboard_snapshot(websocket, auction_id)
     
     try:
-        # Mantener la conexión abierta y gestionar el timer
+        # Mantener la conexión abierta; el reloj central se encarga del timer
         while True:
-            # Verificar el estado de la subasta cada segundo
-            auction = auction_service.get_auction(auction_id)
-            
-            if auction and auction.status == "active" and auction.remainingSeconds is not None:
-                if auction.remainingSeconds > 0:
-                    # Decrementar el tiempo
-                    new_time = auction.remainingSeconds - 1
-                    auction_service.update_remaining_time(auction_id, new_time)
-                    
-                    # Broadcast a todos los clientes
-                    await websocket_manager.broadcast_time_update(auction_id, new_time)
-                    
-                    # Si el tiempo llegó a 0, marcar como completada
-                    if new_time == 0:
-                        await websocket_manager.broadcast_status_change(auction_id, "completed")
-                        
-            await asyncio.sleep(1)
+            text = await websocket.receive_text()
+            # Cualquier mensaje (incluido el pong del heartbeat) cuenta como señal de vida
+            websocket_manager.touch(websocket)
+            try:
+                request = json.loads(text)
+            except ValueError:
+                continue
+            # El cliente detectó un hueco en la secuencia de deltas: reenviar snapshot completo
+            if isinstance(request, dict) and request.get("type") == "resync":
+                await send_leaderboard_snapshot(websocket, auction_id)
             
     except WebSocketDisconnect:
         websocket_manager.disconnect(websocket, auction_id)
@@ -576,6 +932,7 @@ async def admin_panel():
             let auctions = [];
             let websockets = new Map(); // Mapa de WebSockets por auction_id
             let timerIntervals = new Map(); // Intervalos de actualización de timers
+            let clocks = new Map(); // Reloj sincronizado por subasta: {deadline, remainingMs, offset}
             
             // Cargar subastas
             async function loadAuctions() {
@@ -623,7 +980,22 @@ async def admin_panel():
                     if (auctionIndex === -1) return;
                     
                     switch(message.type) {
+                        case 'ping':
+                            ws.send(JSON.stringify({ type: 'pong' }));
+                            break;
+                        case 'initial_data':
+                        case 'clock_sync':
+                            if (message.data.serverTime) {
+                                clocks.set(auctionId, {
+                                    deadline: message.data.deadline,
+                                    remainingMs: message.data.remainingMs,
+                                    offset: message.data.serverTime - Date.now()
+                                });
+                                renderClocks();
+                            }
+                            break;
                         case 'time_update':
+                            clocks.delete(auctionId);
                             auctions[auctionIndex].remainingSeconds = message.data.remainingSeconds;
                             updateTimerDisplay(auctionId, message.data.remainingSeconds);
                             break;
@@ -636,11 +1008,26 @@ async def admin_panel():
                 
                 ws.onclose = () => {
                     websockets.delete(auctionId);
+                    clocks.delete(auctionId);
                 };
                 
                 websockets.set(auctionId, ws);
             }
             
+            // Interpolar localmente los timers sincronizados con el servidor
+            function renderClocks() {
+                for (const [auctionId, clock] of clocks.entries()) {
+                    const ms = clock.deadline !== null
+                        ? clock.deadline - (Date.now() + clock.offset)
+                        : clock.remainingMs;
+                    if (ms === null || ms === undefined) continue;
+                    const seconds = Math.max(0, Math.ceil(ms / 1000));
+                    const auction = auctions.find(a => a.id === auctionId);
+                    if (auction) auction.remainingSeconds = seconds;
+                    updateTimerDisplay(auctionId, seconds);
+                }
+            }
+            
             // Actualizar display del timer en tiempo real
             function updateTimerDisplay(auctionId, seconds) {
                 const timerEl = document.getElementById(`timer-${auctionId}`);
@@ -872,6 +1259,7 @@ async def admin_panel():
             // Cargar subastas al inicio y cada 30 segundos (WebSocket maneja tiempo real)
             loadAuctions();
             setInterval(loadAuctions, 30000);
+            setInterval(renderClocks, 250);
             
             // Limpiar WebSockets al cerrar la página
             window.addEventListener('beforeunload', () => {
@@ -893,17 +1281,16 @@ if __name__ == "__main__":
     
     # Obtener configuración desde variables de entorno
     port = int(os.getenv("PORT", 8000))
-    log_level = os.getenv("LOG_LEVEL", "info")
+    log_level = LOG_LEVEL
     
-    # Cleanup handler para desconectar de TikTok Live al cerrar
+    # Cleanup handler al cerrar: la desconexión de TikTok Live (y de los workers) ya la hace
+    # el evento shutdown; uvicorn vuelve a lanzar la señal con su event loop aún activo
     import signal
     import sys
     
     def cleanup_handler(signum, frame):
         """Limpieza al cerrar la aplicación"""
         print("\n🛑 Cerrando aplicación...")
-        import asyncio
-        asyncio.run(tiktok_connector.disconnect_all())
         print("✅ Desconectado de TikTok Live")
         sys.exit(0)
     
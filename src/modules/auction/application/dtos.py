@@ -116,7 +116,7 @@ class WebSocketMessage(BaseModel):
 class DonationDTO(BaseModel):
     """DTO para una donación individual"""
     username: str = Field(..., description="Nombre del usuario que donó")
-    amount: float = Field(..., gt=0, description="Cantidad donada (en coins de TikTok)")
+    amount: int = Field(..., gt=0, description="Cantidad donada (en coins de TikTok)")
     timestamp: str = Field(..., description="Momento de la donación")
     giftName: Optional[str] = Field(None, description="Nombre del regalo enviado")
     profilePicture: Optional[str] = Field(None, description="URL de la foto de perfil del usuario")
@@ -125,7 +125,7 @@ class DonationDTO(BaseModel):
         json_schema_extra = {
             "example": {
                 "username": "usuario123",
-                "amount": 500.0,
+                "amount": 500,
                 "timestamp": "2025-11-07T10:35:00",
                 "giftName": "Rose",
                 "profilePicture": "https://..."
@@ -133,11 +133,53 @@ class DonationDTO(BaseModel):
         }
 
 
+class DonationBatchItemDTO(BaseModel):
+    """DTO para una donación dentro de un lote"""
+    username: str = Field(..., min_length=1, description="Nombre del usuario que donó")
+    amount: int = Field(..., gt=0, description="Cantidad donada (en coins de TikTok)")
+    giftName: Optional[str] = Field(None, description="Nombre del regalo enviado")
+    profilePicture: Optional[str] = Field(None, description="URL de la foto de perfil del usuario")
+
+
+class DonationBatchDTO(BaseModel):
+    """DTO para registrar un lote de donaciones (backfills, regalos offline, pruebas de carga)"""
+    donations: List[DonationBatchItemDTO] = Field(..., min_length=1, max_length=50_000, description="Donaciones del lote")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "donations": [
+                    {"username": "usuario1", "amount": 1, "giftName": "Rose"},
+                    {"username": "usuario2", "amount": 30, "giftName": "Doughnut"},
+                    {"username": "usuario1", "amount": 5, "giftName": "Finger Heart"}
+                ]
+            }
+        }
+
+
+class DonationBatchResultDTO(BaseModel):
+    """DTO de respuesta al registrar un lote de donaciones"""
+    auctionId: str = Field(..., description="ID de la subasta")
+    accepted: int = Field(..., description="Donaciones registradas")
+    totalDonations: int = Field(..., description="Total de donaciones acumuladas (coins)")
+    totalDonors: int = Field(..., description="Número total de donadores únicos")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "auctionId": "auction-001",
+                "accepted": 3,
+                "totalDonations": 15036,
+                "totalDonors": 26
+            }
+        }
+
+
 class DonorStatsDTO(BaseModel):
     """DTO para estadísticas de un donador"""
     username: str = Field(..., description="Nombre del usuario")
     profilePicture: Optional[str] = Field(None, description="URL de la foto de perfil del usuario")
-    totalAmount: float = Field(..., description="Cantidad total acumulada")
+    totalAmount: int = Field(..., description="Cantidad total acumulada (coins)")
     donationCount: int = Field(..., description="Número de donaciones realizadas")
     lastDonation: str = Field(..., description="Fecha de la última donación")
     rank: int = Field(..., description="Posición en el ranking (1-5)")
@@ -147,7 +189,7 @@ class DonorStatsDTO(BaseModel):
             "example": {
                 "username": "usuario123",
                 "profilePicture": "https://...",
-                "totalAmount": 2500.0,
+                "totalAmount": 2500,
                 "donationCount": 5,
                 "lastDonation": "2025-11-07T10:35:00",
                 "rank": 1
@@ -159,7 +201,7 @@ class TopDonorsResponseDTO(BaseModel):
     """DTO de respuesta para el top de donadores"""
     auctionId: str = Field(..., description="ID de la subasta")
     topDonors: List[DonorStatsDTO] = Field(..., description="Lista de top donadores")
-    totalDonations: float = Field(..., description="Total de donaciones acumuladas")
+    totalDonations: int = Field(..., description="Total de donaciones acumuladas (coins)")
     totalDonors: int = Field(..., description="Número total de donadores únicos")
     
     class Config:
@@ -169,14 +211,106 @@ class TopDonorsResponseDTO(BaseModel):
                 "topDonors": [
                     {
                         "username": "usuario1",
-                        "totalAmount": 5000.0,
+                        "totalAmount": 5000,
                         "donationCount": 10,
                         "lastDonation": "2025-11-07T10:35:00",
                         "rank": 1
                     }
                 ],
-                "totalDonations": 15000.0,
+                "totalDonations": 15000,
                 "totalDonors": 25
             }
         }
 
+
+class GiftStatsDTO(BaseModel):
+    """DTO con los agregados de un tipo de regalo"""
+    giftName: str = Field(..., description="Nombre del regalo")
+    totalAmount: int = Field(..., description="Coins acumulados con este regalo")
+    count: int = Field(..., description="Número de donaciones con este regalo")
+
+
+class AuctionStatsDTO(BaseModel):
+    """DTO con los agregados de donaciones de una subasta"""
+    auctionId: str = Field(..., description="ID de la subasta")
+    totalDonations: int = Field(..., description="Total de donaciones acumuladas (coins)")
+    totalDonors: int = Field(..., description="Número total de donadores únicos")
+    donationCount: int = Field(..., description="Número total de donaciones")
+    largestDonation: Optional[DonationDTO] = Field(None, description="Mayor donación individual")
+    gifts: List[GiftStatsDTO] = Field(..., description="Totales y conteos por regalo")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "auctionId": "auction-001",
+                "totalDonations": 15000,
+                "totalDonors": 25,
+                "donationCount": 140,
+                "largestDonation": {
+                    "username": "usuario1",
+                    "amount": 5000,
+                    "timestamp": "2025-11-07T10:35:00",
+                    "giftName": "Universe",
+                    "profilePicture": "https://..."
+                },
+                "gifts": [
+                    {"giftName": "Rose", "totalAmount": 120, "count": 120},
+                    {"giftName": "Universe", "totalAmount": 5000, "count": 1}
+                ]
+            }
+        }
+
+
+class RecentDonorDTO(BaseModel):
+    """DTO con el donador que más aportó dentro de una ventana"""
+    username: str = Field(..., description="Nombre de usuario en TikTok")
+    profilePicture: Optional[str] = Field(None, description="URL de la foto de perfil")
+    totalAmount: int = Field(..., description="Coins donados dentro de la ventana")
+
+
+class DonationRateDTO(BaseModel):
+    """DTO con las donaciones de una ventana deslizante"""
+    auctionId: str = Field(..., description="ID de la subasta")
+    windowSeconds: int = Field(..., description="Duración de la ventana en segundos")
+    totalCoins: int = Field(..., description="Coins donados dentro de la ventana")
+    donationCount: int = Field(..., description="Donaciones dentro de la ventana")
+    coinsPerMinute: float = Field(..., description="Ritmo medio de la ventana (coins por minuto)")
+    topDonor: Optional[RecentDonorDTO] = Field(None, description="Donador que más aportó en la ventana")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "auctionId": "auction-001",
+                "windowSeconds": 300,
+                "totalCoins": 1500,
+                "donationCount": 42,
+                "coinsPerMinute": 300.0,
+                "topDonor": {
+                    "username": "usuario1",
+                    "profilePicture": "https://...",
+                    "totalAmount": 1000
+                }
+            }
+        }
+
+
+class CoalescingStatsDTO(BaseModel):
+    """DTO con los contadores de coalescencia de donation_update"""
+    auctionId: str = Field(..., description="ID de la subasta")
+    intervalMs: int = Field(..., description="Intervalo mínimo entre publicaciones (ms)")
+    events: int = Field(..., description="Donaciones que marcaron el leaderboard como sucio")
+    flushes: int = Field(..., description="donation_update publicados")
+    coalesced: int = Field(..., description="Eventos absorbidos por la coalescencia")
+    pending: bool = Field(..., description="Hay una publicación programada")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "auctionId": "auction-001",
+                "intervalMs": 100,
+                "events": 1200,
+                "flushes": 85,
+                "coalesced": 1115,
+                "pending": False
+            }
+        }
@@ -0,0 +1,71 @@
+"""
+Stream versionado del leaderboard de una subasta
+Convierte snapshots sucesivos del top de donadores en deltas con número de secuencia
+"""
+from typing import Dict, List, Optional
+
+
+class LeaderboardStream:
+    """
+    Mantiene el último leaderboard publicado y genera deltas numerados
+
+    Cada publicación con cambios incrementa `seq`. Un delta solo lleva las filas
+    que cambiaron (y de ellas solo los campos modificados), los donadores que
+    salieron del top y los totales. El cliente que detecta un hueco en `seq`
+    pide un snapshot completo.
+    """
+
+    def __init__(self, auction_id: str):
+        self.auction_id = auction_id
+        self.seq = 0
+        self._rows: Dict[str, dict] = {}
+        self._totals: Dict[str, float] = {}
+        self._last_data: Optional[dict] = None
+
+    def publish(self, tracker_data: dict) -> Optional[dict]:
+        """
+        Registra el nuevo estado del leaderboard
+
+        Returns:
+            El delta respecto a la publicación anterior, o None si no hubo cambios
+        """
+        rows = {row["username"]: row for row in tracker_data["topDonors"]}
+        upserts: List[dict] = []
+        for username, row in rows.items():
+            previous = self._rows.get(username)
+            if previous is None:
+                upserts.append(row)
+                continue
+            changed = {key: value for key, value in row.items() if previous.get(key) != value}
+            if changed:
+                changed["username"] = username
+                upserts.append(changed)
+        removed = [username for username in self._rows if username not in rows]
+
+        totals = {
+            "totalDonations": tracker_data["totalDonations"],
+            "totalDonors": tracker_data["totalDonors"]
+        }
+        if not upserts and not removed and totals == self._totals:
+            return None
+
+        self.seq += 1
+        self._rows = rows
+        self._totals = totals
+        self._last_data = tracker_data
+        return {
+            "seq": self.seq,
+            "upserts": upserts,
+            "removed": removed,
+            **totals
+        }
+
+    def snapshot(self) -> dict:
+        """Último leaderboard publicado, completo, con su número de secuencia"""
+        data = self._last_data or {
+            "auctionId": self.auction_id,
+            "topDonors": [],
+            "totalDonations": 0,
+            "totalDonors": 0
+        }
+        return {**data, "seq": self.seq}
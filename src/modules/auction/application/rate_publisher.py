@@ -0,0 +1,67 @@
+"""
+Publicador del ritmo de donaciones
+Envía periódicamente la ventana deslizante de cada subasta activa a sus overlays
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from .service import AuctionService
+
+logger = logging.getLogger(__name__)
+
+
+class RatePublisher:
+    """
+    Bucle único por proceso que publica un rate_update por subasta ACTIVE cada
+    `interval` segundos
+
+    Las subastas sin clientes conectados se saltan: consultar la ventana cuesta
+    recorrer sus buckets y nadie recibiría el mensaje.
+    """
+
+    def __init__(self, service: AuctionService, websocket_manager, interval: float = 5.0, window_seconds: int = 60):
+        self.service = service
+        self.websocket_manager = websocket_manager
+        self.interval = interval
+        self.window_seconds = window_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Arranca el bucle de publicación (idempotente)"""
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"📈 Publicación de ritmo de donaciones cada {self.interval}s (ventana {self.window_seconds}s)")
+
+    async def stop(self) -> None:
+        """Detiene el bucle de publicación"""
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def publish(self) -> int:
+        """Publica la ventana de cada subasta activa con clientes; devuelve cuántas se enviaron"""
+        sent = 0
+        for auction in self.service.get_running_auctions():
+            if not self.websocket_manager.has_subscribers(auction.id):
+                continue
+            tracker = self.service.donation_trackers.get(auction.id)
+            if tracker is None:
+                continue
+            await self.websocket_manager.broadcast_rate_update(auction.id, tracker.get_rate(self.window_seconds))
+            sent += 1
+        return sent
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.publish()
+            except Exception as e:
+                logger.error(f"❌ Error publicando el ritmo de donaciones: {e}")
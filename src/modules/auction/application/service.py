@@ -2,21 +2,33 @@
 Servicio de aplicación para gestionar subastas
 Orquesta la lógica de negocio
 """
+import logging
 import uuid
 from typing import Optional, List
 from ..domain.auction import Auction, AuctionStatus
-from ..domain.donation import DonationTracker
+from ..domain.donation import DonationTracker, to_coins
 from ..infrastructure.repository import AuctionRepository
 from ....shared.tiktok_connector import TikTokLiveConnector
+from ....shared.coalescer import Coalescer
+from ....shared.ingestion_queue import IngestionQueue
+from ....shared.structured_logging import log_event
+from .leaderboard_stream import LeaderboardStream
 from ..application.dtos import (
     CreateAuctionDTO, 
     UpdateAuctionDTO,
     AuctionResponseDTO, 
     TopDonorsResponseDTO,
+    AuctionStatsDTO,
+    DonationRateDTO,
+    DonationBatchDTO,
+    DonationBatchResultDTO,
     StartAuctionResponseDTO,
-    UpdateTimeDTO
+    UpdateTimeDTO,
+    CoalescingStatsDTO
 )
 
+logger = logging.getLogger(__name__)
+
 
 class AuctionService:
     """Servicio para gestionar operaciones de subastas"""
@@ -25,18 +37,79 @@ class AuctionService:
         self, 
         repository: AuctionRepository, 
         tiktok_connector: TikTokLiveConnector,
-        base_url: str = "http://localhost:8000"
+        base_url: str = "http://localhost:8000",
+        donation_flush_ms: int = 100,
+        combo_hints: bool = False,
+        ingest_queue_size: int = 0,
+        ingest_batch_size: int = 256,
+        ingest_linger_ms: float = 5
     ):
         self.repository = repository
         self.tiktok_connector = tiktok_connector
         self.base_url = base_url
         self.donation_trackers: dict[str, DonationTracker] = {}
+        # Último leaderboard publicado por subasta, para enviar deltas numerados
+        self.leaderboard_streams: dict[str, LeaderboardStream] = {}
+        # Agrupa ráfagas de regalos: como máximo un donation_update por subasta cada donation_flush_ms
+        self.donation_coalescer = Coalescer(self._flush_donation_update, interval=donation_flush_ms / 1000)
+        # Cola acotada entre el conector y el tracker: las donaciones de TikTok se aplican por lotes
+        self.donation_queue = IngestionQueue(
+            self._apply_donation_batch,
+            maxsize=ingest_queue_size,
+            batch_size=ingest_batch_size,
+            linger=ingest_linger_ms / 1000
+        ) if ingest_queue_size > 0 else None
+        # Avisos de combo en curso para los overlays (las donaciones se registran al cerrar el combo)
+        self.combo_hints = combo_hints
         self.websocket_manager = None  # Se inyectará desde el controller
+        self.timer = None  # Reloj central, se inyecta desde main
+        self.journal = None  # Journal de donaciones y estados (opcional), se inyecta desde main
         
     def set_websocket_manager(self, manager):
         """Inyecta el WebSocket manager"""
         self.websocket_manager = manager
         
+    def set_timer(self, timer):
+        """Inyecta el reloj central que programa los deadlines"""
+        self.timer = timer
+        
+    def set_journal(self, journal):
+        """Inyecta el journal que persiste donaciones y cambios de estado"""
+        self.journal = journal
+        
+    def restore_from_journal(self) -> int:
+        """
+        Reconstruye subastas y leaderboards desde el journal (al arrancar)
+        
+        Las subastas ACTIVE o PAUSED vuelven a conectarse a TikTok Live; una subasta
+        ACTIVE cuyo tiempo se agotó mientras el servidor estaba caído se completa.
+        
+        Returns:
+            Número de subastas restauradas
+        """
+        if not self.journal:
+            return 0
+        restored = self.journal.replay()
+        for auction, tracker in restored:
+            if auction.is_expired():
+                auction.complete()
+                self._save(auction)
+            else:
+                self.repository.save(auction)
+            
+            if auction.started_at is not None:
+                self.donation_trackers[auction.id] = tracker
+                stream = self.leaderboard_streams[auction.id] = LeaderboardStream(auction.id)
+                stream.publish(tracker.to_dict())
+            if auction.status in (AuctionStatus.ACTIVE, AuctionStatus.PAUSED):
+                self._connect_tiktok(auction)
+            
+            logger.info(
+                f"♻️ Subasta {auction.id} restaurada desde el journal "
+                f"({auction.status.value}, {tracker.donation_count} donaciones)"
+            )
+        return len(restored)
+        
     def create_auction(self, dto: CreateAuctionDTO) -> AuctionResponseDTO:
         """Crea una nueva subasta en estado DRAFT"""
         # Generar ID automáticamente
@@ -52,7 +125,7 @@ class AuctionService:
         )
         
         # Guardar
-        self.repository.save(auction)
+        self._save(auction)
         
         # Retornar DTO de respuesta
         return self._to_response_dto(auction)
@@ -69,7 +142,7 @@ class AuctionService:
         )
         
         # Guardar
-        self.repository.save(auction)
+        self._save(auction)
         
         return self._to_response_dto(auction)
     
@@ -81,30 +154,15 @@ class AuctionService:
         auction.start()
         
         # Guardar estado
-        self.repository.save(auction)
+        self._save(auction)
+        self._schedule_deadline(auction)
         
         # Crear tracker de donaciones
         self.donation_trackers[auction_id] = DonationTracker(auction_id)
+        self.leaderboard_streams[auction_id] = LeaderboardStream(auction_id)
         
         # Conectar a TikTok Live de forma asíncrona
-        import asyncio
-        import logging
-        logger = logging.getLogger(__name__)
-        
-        try:
-            connection_task = asyncio.create_task(
-                self.tiktok_connector.connect(
-                    auction.name_streamer,
-                    auction_id,
-                    lambda username, amount, gift, profile_pic: self._on_donation_received(
-                        auction_id, username, amount, gift, profile_pic
-                    )
-                )
-            )
-            logger.info(f"🔄 Conexión TikTok Live iniciada para @{auction.name_streamer}")
-        except Exception as e:
-            logger.warning(f"⚠️ Error al iniciar conexión TikTok Live: {e}")
-            logger.warning(f"   La subasta continuará pero sin capturar donaciones automáticamente")
+        self._connect_tiktok(auction)
         
         # Retornar respuesta específica
         return StartAuctionResponseDTO(
@@ -121,30 +179,51 @@ class AuctionService:
             return None
         return self._to_response_dto(auction)
         
+    def get_clock_sync(self, auction_id: str) -> Optional[dict]:
+        """Obtiene el estado del reloj de una subasta para sincronizar clientes"""
+        auction = self.repository.find_by_id(auction_id)
+        if not auction:
+            return None
+        return auction.to_clock_sync()
+        
     def get_all_auctions(self) -> List[AuctionResponseDTO]:
         """Obtiene todas las subastas"""
         auctions = self.repository.find_all()
         return [self._to_response_dto(a) for a in auctions]
         
+    def get_running_auctions(self) -> List[Auction]:
+        """Obtiene las subastas ACTIVE con tiempo restante (usado por el reloj central)"""
+        return [
+            a for a in self.repository.find_all()
+            if a.status == AuctionStatus.ACTIVE
+            and a.remaining_seconds is not None
+            and a.remaining_seconds > 0
+        ]
+
     def pause_auction(self, auction_id: str) -> AuctionResponseDTO:
         """Pausa una subasta"""
         auction = self._get_auction_or_raise(auction_id)
+        self._drain_donations()
         auction.pause()
-        self.repository.save(auction)
+        self._save(auction)
+        self._schedule_deadline(auction)
         return self._to_response_dto(auction)
         
     def resume_auction(self, auction_id: str) -> AuctionResponseDTO:
         """Reanuda una subasta"""
         auction = self._get_auction_or_raise(auction_id)
         auction.resume()
-        self.repository.save(auction)
+        self._save(auction)
+        self._schedule_deadline(auction)
         return self._to_response_dto(auction)
         
     def stop_auction(self, auction_id: str) -> AuctionResponseDTO:
         """Detiene una subasta manualmente y desconecta de TikTok Live"""
         auction = self._get_auction_or_raise(auction_id)
+        self._drain_donations()
         auction.stop()
-        self.repository.save(auction)
+        self._save(auction)
+        self._schedule_deadline(auction)
         
         # Desconectar de TikTok Live
         import asyncio
@@ -162,16 +241,34 @@ class AuctionService:
         if dto.seconds > 0:
             auction.add_time(dto.seconds)
         else:
+            # Restar tiempo puede completar la subasta
+            self._drain_donations()
             auction.subtract_time(abs(dto.seconds))
             
-        self.repository.save(auction)
+        self._save(auction)
+        self._schedule_deadline(auction)
         return self._to_response_dto(auction)
         
     def update_remaining_time(self, auction_id: str, remaining_seconds: int) -> None:
-        """Actualiza el tiempo restante de una subasta (usado por el timer)"""
+        """Fija el tiempo restante de una subasta"""
         auction = self._get_auction_or_raise(auction_id)
+        if remaining_seconds <= 0:
+            self._drain_donations()
         auction.update_remaining_time(remaining_seconds)
-        self.repository.save(auction)
+        self._save(auction)
+        self._schedule_deadline(auction)
+        
+    def complete_if_expired(self, auction_id: str) -> Optional[Auction]:
+        """Completa la subasta si alcanzó su deadline (usado por el reloj central)"""
+        auction = self.repository.find_by_id(auction_id)
+        if not auction:
+            return None
+        if auction.is_expired():
+            # Las donaciones aún en cola llegaron antes del deadline: cuentan para el ganador
+            self._drain_donations()
+            auction.complete()
+            self._save(auction)
+        return auction
         
     def delete_auction(self, auction_id: str) -> bool:
         """Elimina una subasta"""
@@ -182,9 +279,18 @@ class AuctionService:
         except Exception:
             pass
         
+        if self.timer:
+            self.timer.cancel(auction_id)
+        
         # Eliminar tracker de donaciones
         if auction_id in self.donation_trackers:
             del self.donation_trackers[auction_id]
+        self.leaderboard_streams.pop(auction_id, None)
+        self.donation_coalescer.discard(auction_id)
+        if self.websocket_manager:
+            self.websocket_manager.discard_replay(auction_id)
+        if self.journal:
+            asyncio.create_task(self.journal.discard(auction_id))
         
         return self.repository.delete(auction_id)
     
@@ -198,57 +304,263 @@ class AuctionService:
         
         return TopDonorsResponseDTO(**data)
     
+    def get_stats(self, auction_id: str) -> AuctionStatsDTO:
+        """Obtiene los agregados de donaciones de una subasta"""
+        if auction_id not in self.donation_trackers:
+            raise ValueError(f"No se encontró el tracker de donaciones para la subasta {auction_id}")
+        
+        return AuctionStatsDTO(**self.donation_trackers[auction_id].get_stats())
+    
+    def get_rate(self, auction_id: str, window_seconds: int = 60) -> DonationRateDTO:
+        """Obtiene las donaciones de la ventana deslizante de `window_seconds` segundos"""
+        if auction_id not in self.donation_trackers:
+            raise ValueError(f"No se encontró el tracker de donaciones para la subasta {auction_id}")
+        
+        return DonationRateDTO(**self.donation_trackers[auction_id].get_rate(window_seconds))
+    
+    def add_donations_batch(self, auction_id: str, dto: DonationBatchDTO) -> DonationBatchResultDTO:
+        """
+        Registra un lote de donaciones en una subasta activa
+        
+        El lote se agrega de una vez y marca el leaderboard como sucio una sola vez:
+        los clientes reciben un único donation_update por lote.
+        """
+        auction = self._get_auction_or_raise(auction_id)
+        if auction.status != AuctionStatus.ACTIVE:
+            raise ValueError(f"La subasta está en estado {auction.status.value} (solo se aceptan donaciones en ACTIVE)")
+        tracker = self.donation_trackers.get(auction_id)
+        if tracker is None:
+            raise ValueError(f"No se encontró el tracker de donaciones para la subasta {auction_id}")
+        
+        rows = [(item.username, item.amount, item.giftName, item.profilePicture) for item in dto.donations]
+        accepted = tracker.add_donations(rows)
+        if self.journal and accepted:
+            self.journal.record_donations(auction_id, tracker.log.timestamps[-1], rows)
+        log_event(logger, "donation", "donation_batch", auctionId=auction_id, accepted=accepted)
+        
+        if accepted and self.websocket_manager:
+            self.donation_coalescer.mark_dirty(auction_id)
+        
+        return DonationBatchResultDTO(
+            auctionId=auction_id,
+            accepted=accepted,
+            totalDonations=tracker.get_total_donations(),
+            totalDonors=tracker.get_total_donors()
+        )
+    
+    def get_leaderboard_snapshot(self, auction_id: str) -> Optional[dict]:
+        """Último leaderboard publicado, completo y con su seq (para clientes que se resincronizan)"""
+        stream = self.leaderboard_streams.get(auction_id)
+        if not stream:
+            return None
+        return stream.snapshot()
+    
+    def get_coalescing_stats(self, auction_id: str) -> CoalescingStatsDTO:
+        """Obtiene los contadores de coalescencia de donation_update de una subasta"""
+        self._get_auction_or_raise(auction_id)
+        stats = self.donation_coalescer.stats(auction_id)
+        return CoalescingStatsDTO(
+            auctionId=auction_id,
+            intervalMs=round(self.donation_coalescer.interval * 1000),
+            **stats
+        )
+    
+    def get_ingestion_stats(self) -> Optional[dict]:
+        """Contadores de la cola de ingesta de donaciones (None si está desactivada)"""
+        return self.donation_queue.stats() if self.donation_queue else None
+    
+    def _drain_donations(self) -> None:
+        """Aplica en el momento las donaciones encoladas (antes de que la subasta deje de estar activa)"""
+        if self.donation_queue:
+            self.donation_queue.drain()
+    
+    async def stop_ingestion(self) -> None:
+        """Aplica las donaciones encoladas y detiene el consumidor (al apagar)"""
+        if self.donation_queue:
+            await self.donation_queue.stop()
+    
     def _on_donation_received(self, auction_id: str, username: str, amount: float, gift_name: str, profile_picture: str):
-        """Callback cuando se recibe una donación de TikTok Live"""
-        import logging
-        logger = logging.getLogger(__name__)
+        """
+        Callback cuando se recibe una donación de TikTok Live
+        
+        Con la cola de ingesta activa solo se encola; si la cola está llena, se aplica
+        primero todo lo encolado y después la donación (no se pierde ni adelanta a las
+        anteriores) y cuenta como rechazada en las métricas.
+        """
+        if self.donation_queue:
+            if self.donation_queue.offer((auction_id, username, to_coins(amount), gift_name, profile_picture)):
+                return
+            self.donation_queue.drain()
+        self._apply_donation(auction_id, username, amount, gift_name, profile_picture)
         
+    def _apply_donation(self, auction_id: str, username: str, amount: float, gift_name: str, profile_picture: str):
+        """Registra una donación en el tracker y marca el leaderboard como sucio"""
         try:
             # Verificar que la subasta existe y está en estado ACTIVE
             auction = self.repository.find_by_id(auction_id)
             if not auction:
-                logger.warning(f"⚠️ Donación ignorada: subasta {auction_id} no encontrada")
+                logger.warning("⚠️ Donación ignorada: subasta %s no encontrada", auction_id)
                 return
             
             if auction.status != AuctionStatus.ACTIVE:
-                logger.warning(f"⚠️ Donación ignorada: subasta en estado {auction.status.value} (solo se aceptan en ACTIVE)")
-                logger.info(f"   Usuario: {username} intentó donar {amount} coins ({gift_name})")
+                log_event(
+                    logger, "donation", "donation_ignored", logging.WARNING,
+                    auctionId=auction_id, status=auction.status.value,
+                    username=username, amount=amount, gift=gift_name
+                )
                 return
             
             # Registrar donación en el tracker
             if auction_id in self.donation_trackers:
                 tracker = self.donation_trackers[auction_id]
                 donation = tracker.add_donation(username, amount, gift_name, profile_picture)
+                if self.journal:
+                    self.journal.record_donation(
+                        auction_id, tracker.log.timestamps[-1], username, donation.amount, gift_name, profile_picture
+                    )
                 
-                # Obtener stats del donador para logging
+                # Una línea JSON por donación (sin formatear si el nivel INFO está desactivado)
                 donor_stats = tracker.get_donor_stats(username)
+                log_event(
+                    logger, "donation", "donation",
+                    auctionId=auction_id, username=username, amount=donation.amount, gift=gift_name,
+                    donorTotal=donor_stats.total_amount, donorCount=donor_stats.donation_count
+                )
                 
-                logger.info(f"✅ DONACIÓN REGISTRADA:")
-                logger.info(f"   Usuario: {username}")
-                logger.info(f"   Monto esta donación: {amount} coins")
-                logger.info(f"   Total acumulado: {donor_stats.total_amount} coins")
-                logger.info(f"   Número de donaciones: {donor_stats.donation_count}")
-                
-                # Enviar actualización por WebSocket
+                # Marcar el leaderboard como sucio; el coalescedor publica el estado final
                 if self.websocket_manager:
-                    import asyncio
-                    tracker_data = tracker.to_dict()
-                    
-                    logger.info(f"📡 Enviando actualización WebSocket:")
-                    logger.info(f"   Top 5 actual: {[f'{d['username']}({d['totalAmount']})' for d in tracker_data['topDonors'][:5]]}")
-                    
-                    asyncio.create_task(
-                        self.websocket_manager.broadcast_donation_update(
-                            auction_id,
-                            tracker_data
-                        )
-                    )
+                    self.donation_coalescer.mark_dirty(auction_id)
             else:
-                logger.warning(f"⚠️ No existe tracker de donaciones para la subasta {auction_id}")
+                logger.warning("⚠️ No existe tracker de donaciones para la subasta %s", auction_id)
+        except Exception as e:
+            logger.exception("❌ Error procesando donación: %s", e)
+        
+    def _apply_donation_batch(self, batch: List[tuple]) -> None:
+        """
+        Aplica un lote de donaciones de la cola de ingesta
+        
+        Las donaciones se agrupan por subasta: cada subasta se consulta, se agrega en el
+        tracker y se marca como sucia una sola vez por lote.
+        """
+        groups: dict[str, list] = {}
+        for auction_id, username, amount, gift_name, profile_picture in batch:
+            rows = groups.get(auction_id)
+            if rows is None:
+                rows = groups[auction_id] = []
+            rows.append((username, amount, gift_name, profile_picture))
+        
+        for auction_id, rows in groups.items():
+            try:
+                auction = self.repository.find_by_id(auction_id)
+                if not auction:
+                    logger.warning("⚠️ %s donaciones ignoradas: subasta %s no encontrada", len(rows), auction_id)
+                    continue
+                if auction.status != AuctionStatus.ACTIVE:
+                    log_event(
+                        logger, "donation", "donation_ignored", logging.WARNING,
+                        auctionId=auction_id, status=auction.status.value, count=len(rows)
+                    )
+                    continue
+                tracker = self.donation_trackers.get(auction_id)
+                if tracker is None:
+                    logger.warning("⚠️ No existe tracker de donaciones para la subasta %s", auction_id)
+                    continue
+                
+                accepted = tracker.add_donations(rows)
+                if self.journal and accepted:
+                    self.journal.record_donations(auction_id, tracker.log.timestamps[-1], rows)
+                
+                # Una línea por lote y subasta; el detalle por donación solo en DEBUG
+                log_event(
+                    logger, "donation", "donation_batch",
+                    auctionId=auction_id, accepted=accepted, coins=sum(row[1] for row in rows)
+                )
+                if logger.isEnabledFor(logging.DEBUG):
+                    for username, amount, gift_name, _ in rows:
+                        donor_stats = tracker.get_donor_stats(username)
+                        log_event(
+                            logger, "donation", "donation", logging.DEBUG,
+                            auctionId=auction_id, username=username, amount=amount, gift=gift_name,
+                            donorTotal=donor_stats.total_amount, donorCount=donor_stats.donation_count
+                        )
+                
+                if accepted and self.websocket_manager:
+                    self.donation_coalescer.mark_dirty(auction_id)
+            except Exception as e:
+                logger.exception("❌ Error procesando lote de donaciones de %s: %s", auction_id, e)
+        
+    def _on_combo_progress(self, auction_id: str, username: str, gift_name: str, count: int, total: int, profile_picture: str):
+        """Callback con cada avance de un combo de TikTok Live (no registra donaciones)"""
+        import asyncio
+        
+        if not self.websocket_manager:
+            return
+        auction = self.repository.find_by_id(auction_id)
+        if not auction or auction.status != AuctionStatus.ACTIVE:
+            return
+        asyncio.create_task(self.websocket_manager.broadcast_combo_progress(auction_id, {
+            "username": username,
+            "giftName": gift_name,
+            "count": count,
+            "totalAmount": total,
+            "profilePicture": profile_picture
+        }))
+        
+    async def _flush_donation_update(self, auction_id: str) -> None:
+        """Publica los cambios del leaderboard como delta numerado (llamado por el coalescedor)"""
+        tracker = self.donation_trackers.get(auction_id)
+        stream = self.leaderboard_streams.get(auction_id)
+        if not tracker or not stream or not self.websocket_manager:
+            return
+        tracker_data = tracker.to_dict()
+        delta = stream.publish(tracker_data)
+        if delta is None:
+            return
+        
+        log_event(
+            logger, "leaderboard", "leaderboard_delta",
+            auctionId=auction_id, seq=delta['seq'], upserts=len(delta['upserts'])
+        )
+        if logger.isEnabledFor(logging.DEBUG):
+            top_5 = [f"{d['username']}({d['totalAmount']})" for d in tracker_data['topDonors'][:5]]
+            logger.debug("   Top 5 actual: %s", top_5)
+        
+        await self.websocket_manager.broadcast_donation_delta(auction_id, delta)
+        
+    def _save(self, auction: Auction) -> None:
+        """Guarda la subasta y registra el cambio de estado en el journal"""
+        self.repository.save(auction)
+        if self.journal:
+            self.journal.record_state(auction)
+        
+    def _connect_tiktok(self, auction: Auction) -> None:
+        """Conecta a TikTok Live de forma asíncrona para capturar las donaciones de la subasta"""
+        import asyncio
+        auction_id = auction.id
+        try:
+            asyncio.create_task(
+                self.tiktok_connector.connect(
+                    auction.name_streamer,
+                    auction_id,
+                    lambda username, amount, gift, profile_pic: self._on_donation_received(
+                        auction_id, username, amount, gift, profile_pic
+                    ),
+                    on_combo=(
+                        lambda username, gift, count, total, profile_pic: self._on_combo_progress(
+                            auction_id, username, gift, count, total, profile_pic
+                        )
+                    ) if self.combo_hints else None
+                )
+            )
+            logger.info(f"🔄 Conexión TikTok Live iniciada para @{auction.name_streamer}")
         except Exception as e:
-            logger.error(f"❌ Error procesando donación: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.warning(f"⚠️ Error al iniciar conexión TikTok Live: {e}")
+            logger.warning(f"   La subasta continuará pero sin capturar donaciones automáticamente")
+        
+    def _schedule_deadline(self, auction: Auction) -> None:
+        """Reprograma la finalización de la subasta tras un cambio de deadline"""
+        if self.timer:
+            self.timer.schedule(auction)
         
     def _get_auction_or_raise(self, auction_id: str) -> Auction:
         """Obtiene una subasta o lanza excepción"""
@@ -0,0 +1,195 @@
+"""
+Reloj central de subastas
+Un único bucle por proceso que gestiona la cuenta regresiva de todas las subastas activas
+"""
+import asyncio
+import logging
+import math
+from typing import List, Optional, Tuple
+
+from ..domain.auction import Auction, AuctionStatus
+from .service import AuctionService
+from ....shared.timing_wheel import TimingWheel
+
+logger = logging.getLogger(__name__)
+
+# Tipos de entrada en la rueda de tiempos
+DEADLINE = "deadline"
+TICK = "tick"
+RESYNC = "resync"
+
+# Modos de protocolo del temporizador
+TICK_MODE = "tick"   # time_update cada segundo (modo anterior)
+SYNC_MODE = "sync"   # clock_sync con deadline; los clientes cuentan localmente
+
+
+class AuctionTimer:
+    """
+    Scheduler de cuenta regresiva independiente de las conexiones WebSocket
+
+    El tiempo restante se calcula a partir del deadline de cada subasta. Tanto la
+    finalización como las notificaciones periódicas se programan en una rueda de
+    tiempos jerárquica, así que el coste por tick depende de lo que vence en ese
+    tick y no del número de subastas ACTIVE o PAUSED.
+
+    En modo `sync` no se envían time_update por segundo: se envía un clock_sync
+    cuando cambia el deadline y un resync cada `resync_interval` segundos.
+    """
+
+    def __init__(
+        self,
+        service: AuctionService,
+        websocket_manager,
+        mode: str = SYNC_MODE,
+        resync_interval: float = 60.0,
+        resolution: float = 0.05
+    ):
+        if mode not in (TICK_MODE, SYNC_MODE):
+            raise ValueError(f"Modo de temporizador no soportado: {mode}")
+        self.service = service
+        self.websocket_manager = websocket_manager
+        self.mode = mode
+        self.resync_interval = resync_interval
+        self.resolution = resolution
+        self.wheel: Optional[TimingWheel] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    def start(self) -> None:
+        """Arranca el bucle del reloj (idempotente)"""
+        if self._task and not self._task.done():
+            return
+        loop = asyncio.get_running_loop()
+        self.wheel = TimingWheel(resolution=self.resolution, start=loop.time())
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        # Reprogramar subastas que ya estuvieran activas
+        for auction in self.service.get_running_auctions():
+            self.schedule(auction)
+        logger.info("⏱️ Reloj central de subastas iniciado")
+
+    async def stop(self) -> None:
+        """Detiene el bucle del reloj y descarta los deadlines pendientes"""
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.wheel = None
+
+    def is_running(self) -> bool:
+        """Indica si el bucle del reloj está en marcha"""
+        return self._task is not None and not self._task.done()
+
+    def schedule(self, auction: Auction) -> None:
+        """(Re)programa la finalización y las notificaciones de una subasta (O(1))"""
+        if self.wheel is None:
+            return
+        if auction.status != AuctionStatus.ACTIVE or auction.remaining_time is None:
+            self.cancel(auction.id)
+        else:
+            now = asyncio.get_running_loop().time()
+            self.wheel.schedule((DEADLINE, auction.id), now + auction.remaining_time, now=now)
+            if self.mode == TICK_MODE:
+                self._schedule_tick(auction, now)
+            else:
+                self.wheel.schedule((RESYNC, auction.id), now + self.resync_interval)
+            self._wakeup.set()
+
+        # El deadline cambió: notificar el nuevo estado del reloj una sola vez
+        if not self.websocket_manager:
+            return
+        if self.mode == SYNC_MODE:
+            asyncio.create_task(
+                self.websocket_manager.broadcast_clock_sync(auction.id, auction.to_clock_sync())
+            )
+        elif auction.remaining_seconds is not None:
+            asyncio.create_task(
+                self.websocket_manager.broadcast_time_update(auction.id, auction.remaining_seconds)
+            )
+
+    def cancel(self, auction_id: str) -> None:
+        """Cancela la finalización y las notificaciones programadas de una subasta (O(1))"""
+        if self.wheel is None:
+            return
+        self.wheel.cancel((DEADLINE, auction_id))
+        self.wheel.cancel((TICK, auction_id))
+        self.wheel.cancel((RESYNC, auction_id))
+
+    def _schedule_tick(self, auction: Auction, now: float) -> None:
+        """Programa el tick en el instante en que cambie el segundo mostrado"""
+        remaining = auction.remaining_time
+        next_value = math.ceil(remaining - 1e-9) - 1
+        if next_value < 1:
+            # El último segundo lo cubre la finalización
+            self.wheel.cancel((TICK, auction.id))
+            return
+        self.wheel.schedule((TICK, auction.id), now + remaining - next_value)
+
+    async def _run(self) -> None:
+        """Bucle principal: avanza la rueda tick a tick y procesa cada lote vencido"""
+        loop = asyncio.get_running_loop()
+        while True:
+            if not len(self.wheel):
+                # Nada programado: dormir hasta el próximo schedule()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                self.wheel.advance(loop.time())
+                continue
+            next_tick = self.wheel.next_tick_time()
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            # El loop puede despertar dentro de su resolución de reloj, justo antes del tick
+            expired = self.wheel.advance(max(loop.time(), next_tick))
+            if not expired:
+                continue
+            try:
+                await self._process(expired, loop.time())
+            except Exception as e:
+                logger.error(f"❌ Error en el reloj de subastas: {e}")
+
+    async def _process(self, expired: List[Tuple[Tuple[str, str], None]], now: float) -> None:
+        """Procesa en lote las entradas vencidas en un slot"""
+        completed: List[Auction] = []
+        ticks: List[Tuple[str, int]] = []
+        resyncs: List[Auction] = []
+
+        for (kind, auction_id), _ in expired:
+            if kind == DEADLINE:
+                auction = self.service.complete_if_expired(auction_id)
+                if auction is None:
+                    continue
+                if auction.status == AuctionStatus.ACTIVE:
+                    # El deadline se movió sin reprogramar; volver a intentarlo
+                    self.schedule(auction)
+                elif auction.status == AuctionStatus.COMPLETED:
+                    self.cancel(auction_id)
+                    completed.append(auction)
+                continue
+
+            auction = self.service.repository.find_by_id(auction_id)
+            if not auction or auction.status != AuctionStatus.ACTIVE:
+                continue
+            if kind == TICK:
+                self._schedule_tick(auction, now)
+                ticks.append((auction_id, auction.remaining_seconds))
+            else:
+                self.wheel.schedule((RESYNC, auction_id), now + self.resync_interval)
+                resyncs.append(auction)
+
+        if not self.websocket_manager:
+            return
+        for auction_id, remaining_seconds in ticks:
+            await self.websocket_manager.broadcast_time_update(auction_id, remaining_seconds)
+        for auction in resyncs:
+            await self.websocket_manager.broadcast_clock_sync(auction.id, auction.to_clock_sync())
+        for auction in completed:
+            if self.mode == SYNC_MODE:
+                await self.websocket_manager.broadcast_clock_sync(auction.id, auction.to_clock_sync())
+            else:
+                await self.websocket_manager.broadcast_time_update(auction.id, 0)
+            await self.websocket_manager.broadcast_status_change(
+                auction.id, AuctionStatus.COMPLETED.value
+            )
@@ -4,7 +4,9 @@ Representa una subasta en el sistema
 """
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Optional
+from typing import Callable, Optional
+import math
+import time
 import uuid
 
 
@@ -21,6 +23,9 @@ class AuctionStatus(Enum):
 class Auction:
     """
     Entidad de subasta que encapsula toda la lógica de negocio
+    
+    El temporizador se modela con un deadline monotónico: el tiempo restante
+    se calcula al leerlo, por lo que no hace falta descontarlo cada segundo.
     """
     
     def __init__(
@@ -30,7 +35,8 @@ class Auction:
         titulo_subasta: str,
         timer_minutes: int,
         created_at: Optional[datetime] = None,
-        status: AuctionStatus = AuctionStatus.DRAFT
+        status: AuctionStatus = AuctionStatus.DRAFT,
+        clock: Callable[[], float] = time.monotonic
     ):
         self.id = id
         self.name_streamer = name_streamer
@@ -40,7 +46,46 @@ class Auction:
         self.started_at: Optional[datetime] = None
         self.ended_at: Optional[datetime] = None
         self.status = status
-        self.remaining_seconds: Optional[int] = None
+        self._clock = clock
+        # Instante monotónico en el que termina la subasta (None si no ha iniciado)
+        self.deadline: Optional[float] = None
+        # Instante en el que se congeló el reloj (pausa o detención)
+        self.frozen_at: Optional[float] = None
+        
+    @property
+    def remaining_time(self) -> Optional[float]:
+        """Tiempo restante exacto en segundos, calculado a partir del deadline"""
+        if self.deadline is None:
+            return None
+        if self.status == AuctionStatus.COMPLETED:
+            return 0.0
+        reference = self.frozen_at if self.frozen_at is not None else self._clock()
+        return max(0.0, self.deadline - reference)
+        
+    @property
+    def remaining_seconds(self) -> Optional[int]:
+        """Tiempo restante en segundos enteros (redondeado hacia arriba)"""
+        remaining = self.remaining_time
+        if remaining is None:
+            return None
+        return math.ceil(remaining)
+        
+    @remaining_seconds.setter
+    def remaining_seconds(self, seconds: Optional[int]) -> None:
+        """Fija el tiempo restante recalculando el deadline"""
+        if seconds is None:
+            self.deadline = None
+            return
+        reference = self.frozen_at if self.frozen_at is not None else self._clock()
+        self.deadline = reference + seconds
+        
+    def is_expired(self) -> bool:
+        """Indica si una subasta ACTIVE ya alcanzó su deadline"""
+        return (
+            self.status == AuctionStatus.ACTIVE
+            and self.deadline is not None
+            and self._clock() >= self.deadline
+        )
         
     def start(self) -> None:
         """Inicia la subasta"""
@@ -49,7 +94,8 @@ class Auction:
         
         self.status = AuctionStatus.ACTIVE
         self.started_at = datetime.now()
-        self.remaining_seconds = self.timer_minutes * 60
+        self.frozen_at = None
+        self.deadline = self._clock() + self.timer_minutes * 60
     
     def update(self, titulo_subasta: Optional[str] = None, name_streamer: Optional[str] = None, timer_minutes: Optional[int] = None) -> None:
         """Actualiza los datos de la subasta (solo en estado DRAFT)"""
@@ -68,6 +114,7 @@ class Auction:
         if self.status != AuctionStatus.ACTIVE:
             raise ValueError(f"No se puede pausar una subasta en estado {self.status.value}")
         
+        self.frozen_at = self._clock()
         self.status = AuctionStatus.PAUSED
         
     def resume(self) -> None:
@@ -75,6 +122,11 @@ class Auction:
         if self.status != AuctionStatus.PAUSED:
             raise ValueError(f"No se puede reanudar una subasta en estado {self.status.value}")
         
+        # Desplazar el deadline lo que duró la pausa
+        paused_for = self._clock() - self.frozen_at
+        if self.deadline is not None:
+            self.deadline += paused_for
+        self.frozen_at = None
         self.status = AuctionStatus.ACTIVE
         
     def stop(self) -> None:
@@ -82,6 +134,8 @@ class Auction:
         if self.status not in [AuctionStatus.ACTIVE, AuctionStatus.PAUSED]:
             raise ValueError(f"No se puede detener una subasta en estado {self.status.value}")
         
+        if self.frozen_at is None:
+            self.frozen_at = self._clock()
         self.status = AuctionStatus.STOPPED
         self.ended_at = datetime.now()
         
@@ -89,30 +143,31 @@ class Auction:
         """Marca la subasta como completada por tiempo"""
         self.status = AuctionStatus.COMPLETED
         self.ended_at = datetime.now()
-        self.remaining_seconds = 0
+        if self.deadline is not None:
+            self.frozen_at = self.deadline
         
     def add_time(self, seconds: int) -> None:
         """Añade tiempo a la subasta"""
         if self.status not in [AuctionStatus.ACTIVE, AuctionStatus.PAUSED]:
             raise ValueError(f"No se puede añadir tiempo en estado {self.status.value}")
         
-        if self.remaining_seconds is None:
+        if self.deadline is None:
             self.remaining_seconds = 0
             
-        self.remaining_seconds += seconds
+        self.deadline += seconds
         
     def subtract_time(self, seconds: int) -> None:
         """Resta tiempo a la subasta"""
         if self.status not in [AuctionStatus.ACTIVE, AuctionStatus.PAUSED]:
             raise ValueError(f"No se puede restar tiempo en estado {self.status.value}")
         
-        if self.remaining_seconds is None:
+        if self.deadline is None:
             self.remaining_seconds = 0
             
-        self.remaining_seconds = max(0, self.remaining_seconds - seconds)
+        self.deadline -= min(seconds, self.remaining_time)
         
         # Si el tiempo llega a 0, completar la subasta
-        if self.remaining_seconds == 0 and self.status == AuctionStatus.ACTIVE:
+        if self.remaining_time == 0 and self.status == AuctionStatus.ACTIVE:
             self.complete()
             
     def update_remaining_time(self, seconds: int) -> None:
@@ -125,6 +180,24 @@ class Auction:
         if self.remaining_seconds == 0 and self.status == AuctionStatus.ACTIVE:
             self.complete()
             
+    def to_clock_sync(self) -> dict:
+        """
+        Estado del reloj para que los clientes cuenten localmente
+        
+        `deadline` y `serverTime` van en milisegundos de época (reloj de pared del servidor);
+        el cliente corrige su desfase con `serverTime` e interpola hasta `deadline`.
+        """
+        server_time = time.time() * 1000
+        remaining = self.remaining_time
+        running = self.status == AuctionStatus.ACTIVE and remaining is not None
+        return {
+            "status": self.status.value,
+            "remainingSeconds": self.remaining_seconds,
+            "remainingMs": round(remaining * 1000) if remaining is not None else None,
+            "deadline": round(server_time + remaining * 1000) if running else None,
+            "serverTime": round(server_time)
+        }
+        
     def get_overlay_url(self, base_url: str) -> str:
         """Genera la URL del overlay para esta subasta"""
         return f"{base_url}/overlay/auction/{self.id}"
@@ -160,6 +233,9 @@ class Auction:
         if data.get("endedAt"):
             auction.ended_at = datetime.fromisoformat(data["endedAt"])
         if data.get("remainingSeconds") is not None:
+            # Fuera de ACTIVE el reloj queda congelado en el valor recibido
+            if auction.status != AuctionStatus.ACTIVE:
+                auction.frozen_at = auction._clock()
             auction.remaining_seconds = data["remainingSeconds"]
             
         return auction
@@ -2,15 +2,41 @@
 Entidad de dominio: Donation (Donación)
 Representa una donación de un usuario en TikTok Live
 """
+from array import array
+from bisect import bisect_left
 from datetime import datetime
-from typing import Dict, List, Optional
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .donation_log import DonationLog, group_sums, link_previous, micros_to_datetime, now_micros
+from .donation_rate import DonationRate
+from .leaderboard import Leaderboard
+
+
+def to_coins(amount: float) -> int:
+    """
+    Normaliza un monto a coins enteros
+
+    TikTok solo maneja coins enteros; acumular en int mantiene los totales exactos
+    (las sumas en float derivan con miles de donaciones).
+    """
+    return int(round(amount))
+
+
+# Clave de agregación para donaciones sin nombre de regalo
+UNKNOWN_GIFT = "Desconocido"
 
 
 class Donation:
     """
     Entidad que representa una donación individual
+    
+    El tracker no guarda estas entidades: las donaciones viven en el DonationLog
+    y se materializan como Donation solo al leerlas.
     """
     
+    __slots__ = ("username", "amount", "gift_name", "profile_picture", "timestamp")
+    
     def __init__(
         self,
         username: str,
@@ -20,7 +46,7 @@ class Donation:
         timestamp: Optional[datetime] = None
     ):
         self.username = username
-        self.amount = amount
+        self.amount: int = to_coins(amount)
         self.gift_name = gift_name
         self.profile_picture = profile_picture
         self.timestamp = timestamp or datetime.now()
@@ -39,34 +65,49 @@ class Donation:
 class DonorStats:
     """
     Estadísticas acumuladas de un donador
+    
+    Sus donaciones no se guardan aquí: `last_index` apunta a la última en el
+    DonationLog, que encadena las anteriores.
     """
     
-    def __init__(self, username: str, profile_picture: Optional[str] = None):
+    __slots__ = (
+        "username", "donor_id", "profile_picture", "total_amount",
+        "donation_count", "last_timestamp", "last_index"
+    )
+    
+    def __init__(self, username: str, donor_id: int = -1, profile_picture: Optional[str] = None):
         self.username = username
+        self.donor_id = donor_id
         self.profile_picture = profile_picture
-        self.total_amount: float = 0.0
+        self.total_amount: int = 0
         self.donation_count: int = 0
-        self.last_donation: Optional[datetime] = None
-        self.donations: List[Donation] = []
+        self.last_timestamp: Optional[int] = None
+        self.last_index: int = -1
         
-    def add_donation(self, donation: Donation) -> None:
-        """Agrega una nueva donación"""
-        self.total_amount += donation.amount
+    @property
+    def last_donation(self) -> Optional[datetime]:
+        """Momento de la última donación"""
+        return micros_to_datetime(self.last_timestamp) if self.last_timestamp is not None else None
+        
+    def add_donation(self, index: int, amount: int, timestamp: int, profile_picture: Optional[str] = None) -> None:
+        """Agrega una nueva donación (ya registrada en el log con índice `index`)"""
+        self.total_amount += amount
         self.donation_count += 1
-        self.last_donation = donation.timestamp
-        self.donations.append(donation)
+        self.last_timestamp = timestamp
+        self.last_index = index
         # Actualizar foto de perfil si viene en la donación
-        if donation.profile_picture:
-            self.profile_picture = donation.profile_picture
+        if profile_picture:
+            self.profile_picture = profile_picture
         
     def to_dict(self, rank: int = 0) -> dict:
         """Convierte las estadísticas a diccionario"""
+        last_donation = self.last_donation
         return {
             "username": self.username,
             "profilePicture": self.profile_picture,
             "totalAmount": self.total_amount,
             "donationCount": self.donation_count,
-            "lastDonation": self.last_donation.isoformat() if self.last_donation else None,
+            "lastDonation": last_donation.isoformat() if last_donation else None,
             "rank": rank
         }
 
@@ -80,37 +121,160 @@ class DonationTracker:
     def __init__(self, auction_id: str):
         self.auction_id = auction_id
         self.donors: Dict[str, DonorStats] = {}
-        self.all_donations: List[Donation] = []
+        # Historial completo en columnas (sin un objeto por donación)
+        self.log = DonationLog()
+        # Agregados acumulados al registrar cada donación: las lecturas son O(1)
+        self.total_coins: int = 0
+        self.donation_count: int = 0
+        self.gift_totals: Dict[str, int] = {}
+        self.gift_counts: Dict[str, int] = {}
+        self.largest_index: int = -1
+        # Ranking incremental: evita ordenar a todos los donadores en cada lectura del top
+        self.leaderboard = Leaderboard()
+        # Buckets por segundo y por minuto para las ventanas deslizantes (coins/minuto, top reciente)
+        self.rate = DonationRate()
         
     def add_donation(self, username: str, amount: float, gift_name: Optional[str] = None, profile_picture: Optional[str] = None) -> Donation:
         """
         Registra una nueva donación
         """
-        donation = Donation(username, amount, gift_name, profile_picture)
+        coins = to_coins(amount)
+        timestamp = now_micros()
         
         # Crear o actualizar estadísticas del donador
-        if username not in self.donors:
-            self.donors[username] = DonorStats(username, profile_picture)
+        donor = self.donors.get(username)
+        if donor is None:
+            donor = self.donors[username] = DonorStats(username, self.log.intern_donor(username), profile_picture)
             
-        self.donors[username].add_donation(donation)
-        self.all_donations.append(donation)
+        index = self.log.append(donor.donor_id, coins, self.log.intern_gift(gift_name), timestamp, donor.last_index)
+        donor.add_donation(index, coins, timestamp, profile_picture)
+        self._accumulate(index, coins, gift_name)
+        self.leaderboard.update(username, donor.total_amount)
+        self.rate.add(timestamp, donor.donor_id, coins)
+        
+        return Donation(username, coins, gift_name, profile_picture, micros_to_datetime(timestamp))
+        
+    def add_donations(
+        self,
+        batch: Iterable[Tuple[str, float, Optional[str], Optional[str]]],
+        timestamps: Optional[array] = None
+    ) -> int:
+        """
+        Registra un lote de donaciones (username, amount, gift_name, profile_picture)
+        
+        El lote se vuelca al log en columnas y los totales se suman por donador y por
+        regalo antes de tocar el ranking: cada donador del lote actualiza el leaderboard
+        una sola vez.
+        
+        Args:
+            timestamps: Marca de tiempo de cada donación en microsegundos (p. ej. al
+                        reconstruir desde el journal); por defecto, la hora actual
+        
+        Returns:
+            Número de donaciones registradas
+        """
+        rows = list(batch)
+        if not rows:
+            return 0
+        log = self.log
+        timestamp = now_micros() if timestamps is None else timestamps
+        usernames, raw_amounts, gift_names, profile_pictures = (
+            list(map(itemgetter(column), rows)) for column in range(4)
+        )
         
-        return donation
+        try:
+            amounts = array("q", raw_amounts)
+        except TypeError:
+            # Hay montos no enteros: normalizar uno a uno
+            amounts = array("q", map(to_coins, raw_amounts))
+        
+        # Internado por valor distinto del lote, no por fila
+        gift_index = {gift_name: log.intern_gift(gift_name) for gift_name in dict.fromkeys(gift_names)}
+        gift_ids = array("i", map(gift_index.__getitem__, gift_names))
+        donor_index = {}
+        batch_donors = {}
+        donors = self.donors
+        for username in dict.fromkeys(usernames):
+            donor = donors.get(username)
+            if donor is None:
+                donor = donors[username] = DonorStats(username, log.intern_donor(username))
+            donor_index[username] = donor.donor_id
+            batch_donors[donor.donor_id] = donor
+        # La última foto no vacía de cada donador del lote
+        for username, picture in dict(filter(itemgetter(1), zip(usernames, profile_pictures))).items():
+            donors[username].profile_picture = picture
+        donor_ids = array("i", map(donor_index.__getitem__, usernames))
+        
+        # Encadenar cada donación con la anterior de su donador
+        heads = {donor_id: donor.last_index for donor_id, donor in batch_donors.items()}
+        start = len(log)
+        previous = link_previous(donor_ids, start, heads)
+        log.extend(donor_ids, amounts, gift_ids, timestamp, previous)
+        
+        # Agregados del lote por grupo; el ranking se actualiza una vez por donador
+        updates = []
+        for donor_id, total, count in group_sums(donor_ids, amounts):
+            donor = batch_donors[donor_id]
+            donor.total_amount += total
+            donor.donation_count += count
+            donor.last_index = heads[donor_id]
+            donor.last_timestamp = timestamp if timestamps is None else timestamps[donor.last_index - start]
+            updates.append((donor.username, donor.total_amount))
+            if timestamps is None:
+                # Todo el lote comparte timestamp: un bucket por donador
+                self.rate.add(timestamp, donor_id, total, count)
+        self.leaderboard.update_many(updates)
+        if timestamps is not None:
+            self._add_recent_to_rate(timestamps, donor_ids, amounts)
+        for gift_id, total, count in group_sums(gift_ids, amounts):
+            gift_name = log.gift_name(gift_id) or UNKNOWN_GIFT
+            self.gift_totals[gift_name] = self.gift_totals.get(gift_name, 0) + total
+            self.gift_counts[gift_name] = self.gift_counts.get(gift_name, 0) + count
+        self.total_coins += sum(amounts)
+        self.donation_count += len(amounts)
+        largest = max(amounts)
+        if self.largest_index < 0 or largest > log.amounts[self.largest_index]:
+            self.largest_index = start + amounts.index(largest)
+        
+        return len(amounts)
+        
+    def _add_recent_to_rate(self, timestamps: array, donor_ids: array, amounts: array) -> None:
+        """Lleva a las ventanas deslizantes solo las donaciones que aún caben en ellas"""
+        # El log es append-only: las marcas de tiempo vienen en orden
+        first = bisect_left(timestamps, now_micros() - self.rate.horizon)
+        add = self.rate.add
+        for i in range(first, len(timestamps)):
+            add(timestamps[i], donor_ids[i], amounts[i])
+        
+    def get_donation(self, index: int) -> Donation:
+        """Materializa la donación `index` del log"""
+        log = self.log
+        username = log.donor_name(log.donor_ids[index])
+        return Donation(
+            username,
+            log.amounts[index],
+            log.gift_name(log.gift_ids[index]),
+            self.donors[username].profile_picture,
+            micros_to_datetime(log.timestamps[index])
+        )
+        
+    def get_donations(self, username: str) -> List[Donation]:
+        """Donaciones de un donador, de la más antigua a la más reciente"""
+        donor = self.donors.get(username)
+        if donor is None:
+            return []
+        return [self.get_donation(index) for index in reversed(list(self.log.chain(donor.last_index)))]
         
     def get_top_donors(self, limit: int = 5) -> List[DonorStats]:
         """
         Obtiene el top N de donadores ordenados por monto total
+        (a igual monto, primero quien donó antes)
         """
-        sorted_donors = sorted(
-            self.donors.values(),
-            key=lambda d: d.total_amount,
-            reverse=True
-        )
-        return sorted_donors[:limit]
+        return [self.donors[username] for username in self.leaderboard.top(limit)]
         
-    def get_total_donations(self) -> float:
-        """Retorna el total de donaciones acumuladas"""
-        return sum(donor.total_amount for donor in self.donors.values())
+    def get_total_donations(self) -> int:
+        """Retorna el total de donaciones acumuladas (coins)"""
+        return self.total_coins
         
     def get_total_donors(self) -> int:
         """Retorna el número de donadores únicos"""
@@ -123,7 +287,66 @@ class DonationTracker:
     def reset(self) -> None:
         """Limpia todas las donaciones y estadísticas"""
         self.donors.clear()
-        self.all_donations.clear()
+        self.log.clear()
+        self.leaderboard.clear()
+        self.rate.clear()
+        self.total_coins = 0
+        self.donation_count = 0
+        self.gift_totals.clear()
+        self.gift_counts.clear()
+        self.largest_index = -1
+        
+    def get_stats(self) -> dict:
+        """Agregados de la subasta (sin recorrer donaciones ni donadores)"""
+        return {
+            "auctionId": self.auction_id,
+            "totalDonations": self.total_coins,
+            "totalDonors": len(self.donors),
+            "donationCount": self.donation_count,
+            "largestDonation": self.get_donation(self.largest_index).to_dict() if self.largest_index >= 0 else None,
+            "gifts": [
+                {"giftName": gift_name, "totalAmount": total, "count": self.gift_counts[gift_name]}
+                for gift_name, total in self.gift_totals.items()
+            ]
+        }
+        
+    def get_rate(self, window_seconds: int = 60, now: Optional[int] = None) -> dict:
+        """
+        Coins, donaciones y donador más fuerte de los últimos `window_seconds` segundos
+        
+        Ventanas de hasta 5 minutos tienen precisión de segundo; las más largas (hasta
+        una hora), de minuto.
+        """
+        if not 1 <= window_seconds <= self.rate.max_window:
+            raise ValueError(f"La ventana debe estar entre 1 y {self.rate.max_window} segundos")
+        total, count, donors = self.rate.window(now_micros() if now is None else now, window_seconds)
+        top_donor = None
+        if donors:
+            donor_id, amount = donors.most_common(1)[0]
+            donor = self.donors[self.log.donor_name(donor_id)]
+            top_donor = {
+                "username": donor.username,
+                "profilePicture": donor.profile_picture,
+                "totalAmount": amount
+            }
+        return {
+            "auctionId": self.auction_id,
+            "windowSeconds": window_seconds,
+            "totalCoins": total,
+            "donationCount": count,
+            "coinsPerMinute": round(total * 60 / window_seconds, 2),
+            "topDonor": top_donor
+        }
+        
+    def _accumulate(self, index: int, amount: int, gift_name: Optional[str]) -> None:
+        """Actualiza los agregados con una donación nueva"""
+        self.total_coins += amount
+        self.donation_count += 1
+        gift_name = gift_name or UNKNOWN_GIFT
+        self.gift_totals[gift_name] = self.gift_totals.get(gift_name, 0) + amount
+        self.gift_counts[gift_name] = self.gift_counts.get(gift_name, 0) + 1
+        if self.largest_index < 0 or amount > self.log.amounts[self.largest_index]:
+            self.largest_index = index
         
     def to_dict(self) -> dict:
         """Convierte el tracker a diccionario"""
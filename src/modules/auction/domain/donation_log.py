@@ -0,0 +1,189 @@
+"""
+Registro columnar de donaciones
+Guarda cada donación como una fila en arrays tipados en lugar de un objeto Python,
+con donadores y regalos internados como enteros
+"""
+from array import array
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import time
+
+try:
+    import numpy
+except ImportError:  # numpy es opcional: las sumas por grupo tienen respaldo en Python
+    numpy = None
+
+
+def now_micros() -> int:
+    """Marca de tiempo actual en microsegundos desde epoch"""
+    return time.time_ns() // 1000
+
+
+def micros_to_datetime(timestamp: int) -> datetime:
+    """Convierte microsegundos desde epoch a datetime local (como datetime.now())"""
+    seconds, micros = divmod(timestamp, 1_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=micros)
+
+
+class DonationLog:
+    """
+    Log append-only de donaciones en columnas
+
+    Cada donación ocupa 28 bytes: timestamp (int64), monto (int64), donador (int32),
+    regalo (int32) y el índice de la donación anterior del mismo donador (int64).
+    Esa última columna encadena las donaciones de cada donador sin listas por donador:
+    basta guardar el índice de su última donación.
+    """
+
+    __slots__ = (
+        "timestamps", "amounts", "donor_ids", "gift_ids", "previous",
+        "_donor_names", "_donor_index", "_gift_names", "_gift_index"
+    )
+
+    def __init__(self):
+        self.timestamps = array("q")
+        self.amounts = array("q")
+        self.donor_ids = array("i")
+        self.gift_ids = array("i")
+        self.previous = array("q")
+        self._donor_names: List[str] = []
+        self._donor_index: Dict[str, int] = {}
+        self._gift_names: List[Optional[str]] = []
+        self._gift_index: Dict[Optional[str], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def intern_donor(self, username: str) -> int:
+        """ID entero del donador (se crea la primera vez)"""
+        donor_id = self._donor_index.get(username)
+        if donor_id is None:
+            donor_id = self._donor_index[username] = len(self._donor_names)
+            self._donor_names.append(username)
+        return donor_id
+
+    def intern_gift(self, gift_name: Optional[str]) -> int:
+        """ID entero del regalo (se crea la primera vez)"""
+        gift_id = self._gift_index.get(gift_name)
+        if gift_id is None:
+            gift_id = self._gift_index[gift_name] = len(self._gift_names)
+            self._gift_names.append(gift_name)
+        return gift_id
+
+    def donor_name(self, donor_id: int) -> str:
+        return self._donor_names[donor_id]
+
+    def gift_name(self, gift_id: int) -> Optional[str]:
+        return self._gift_names[gift_id]
+
+    def append(self, donor_id: int, amount: int, gift_id: int, timestamp: int, previous: int = -1) -> int:
+        """
+        Añade una donación
+
+        Args:
+            previous: Índice de la donación anterior del mismo donador (-1 si es la primera)
+
+        Returns:
+            Índice de la donación en el log
+        """
+        self.timestamps.append(timestamp)
+        self.amounts.append(amount)
+        self.donor_ids.append(donor_id)
+        self.gift_ids.append(gift_id)
+        self.previous.append(previous)
+        return len(self.amounts) - 1
+
+    def extend(self, donor_ids: array, amounts: array, gift_ids: array, timestamp: Union[int, array], previous: array) -> int:
+        """
+        Añade un lote de donaciones
+
+        Args:
+            timestamp: Marca de tiempo común a todo el lote o una por donación
+
+        Returns:
+            Índice de la primera donación del lote
+        """
+        start = len(self.amounts)
+        if isinstance(timestamp, int):
+            timestamp = array("q", [timestamp]) * len(amounts)
+        self.timestamps.extend(timestamp)
+        self.amounts.extend(amounts)
+        self.donor_ids.extend(donor_ids)
+        self.gift_ids.extend(gift_ids)
+        self.previous.extend(previous)
+        return start
+
+    def chain(self, last_index: int) -> Iterator[int]:
+        """Índices de las donaciones de un donador, de la más reciente a la más antigua"""
+        index = last_index
+        while index >= 0:
+            yield index
+            index = self.previous[index]
+
+    def clear(self) -> None:
+        """Vacía el log"""
+        for column in (self.timestamps, self.amounts, self.donor_ids, self.gift_ids, self.previous):
+            del column[:]
+        self._donor_names.clear()
+        self._donor_index.clear()
+        self._gift_names.clear()
+        self._gift_index.clear()
+
+
+def group_sums(ids: array, amounts: array) -> List[Tuple[int, int, int]]:
+    """
+    Suma y cuenta `amounts` agrupando por `ids`
+
+    Returns:
+        Lista de (id, suma, conteo), un elemento por id distinto
+    """
+    if numpy is not None and len(ids) > 0:
+        keys = numpy.frombuffer(ids, dtype=numpy.int32)
+        values = numpy.frombuffer(amounts, dtype=numpy.int64)
+        order = numpy.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = numpy.flatnonzero(numpy.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        # reduceat en int64: sumas exactas (bincount suma en float64)
+        sums = numpy.add.reduceat(values[order], starts)
+        counts = numpy.diff(numpy.r_[starts, len(sorted_keys)])
+        return list(zip(sorted_keys[starts].tolist(), sums.tolist(), counts.tolist()))
+
+    counts = Counter(ids)
+    totals = dict.fromkeys(counts, 0)
+    for key, value in zip(ids, amounts):
+        totals[key] += value
+    return [(key, totals[key], count) for key, count in counts.items()]
+
+
+def link_previous(donor_ids: array, start: int, heads: Dict[int, int]) -> array:
+    """
+    Columna `previous` de un lote que empieza en el índice `start`
+
+    Args:
+        heads: Índice de la última donación de cada donador del lote (-1 si no tiene);
+               se actualiza con las del lote
+    """
+    if numpy is not None and len(donor_ids) > 0:
+        keys = numpy.frombuffer(donor_ids, dtype=numpy.int32)
+        order = numpy.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        positions = order.astype(numpy.int64) + start
+        first = numpy.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+        linked = numpy.empty(len(keys), dtype=numpy.int64)
+        linked[1:] = positions[:-1]
+        linked[first] = [heads[key] for key in sorted_keys[first].tolist()]
+        previous = numpy.empty(len(keys), dtype=numpy.int64)
+        previous[order] = linked
+        last = numpy.r_[first[1:], True]
+        heads.update(zip(sorted_keys[last].tolist(), positions[last].tolist()))
+        return array("q", previous.tobytes())
+
+    previous = array("q")
+    append = previous.append
+    index = start
+    for donor_id in donor_ids:
+        append(heads[donor_id])
+        heads[donor_id] = index
+        index += 1
+    return previous
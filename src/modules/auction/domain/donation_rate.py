@@ -0,0 +1,125 @@
+"""
+Ventanas deslizantes de donaciones
+Buckets de tiempo en anillo (por segundo y por minuto) que responden "coins por
+minuto" o "donador más fuerte de los últimos N minutos" sin recorrer el historial
+"""
+from collections import Counter
+from typing import Dict, List, Tuple
+
+MICROS = 1_000_000
+
+
+class RateRing:
+    """
+    Anillo de `size` buckets de `resolution` segundos
+
+    Cada bucket guarda su número absoluto (timestamp // resolución): al reutilizar
+    una posición del anillo se detecta que el bucket es de otra vuelta y se vacía.
+    Registrar una donación es O(1); consultar una ventana recorre sus buckets.
+    """
+
+    __slots__ = ("resolution", "size", "_width", "_slots", "_totals", "_counts", "_donors")
+
+    def __init__(self, resolution: int, size: int):
+        self.resolution = resolution
+        self.size = size
+        self._width = resolution * MICROS
+        self._slots: List[int] = [-1] * size
+        self._totals: List[int] = [0] * size
+        self._counts: List[int] = [0] * size
+        self._donors: List[Dict[int, int]] = [{} for _ in range(size)]
+
+    @property
+    def span(self) -> int:
+        """Segundos que cubre el anillo"""
+        return self.resolution * self.size
+
+    def add(self, timestamp: int, donor_id: int, amount: int, count: int = 1) -> bool:
+        """
+        Suma `amount` coins (en `count` donaciones) de un donador al bucket de `timestamp`
+
+        Returns:
+            False si el bucket ya salió del anillo (donación demasiado antigua)
+        """
+        bucket = timestamp // self._width
+        i = bucket % self.size
+        slot = self._slots[i]
+        if slot != bucket:
+            if slot > bucket:
+                return False
+            self._slots[i] = bucket
+            self._totals[i] = 0
+            self._counts[i] = 0
+            self._donors[i] = {}
+        self._totals[i] += amount
+        self._counts[i] += count
+        donors = self._donors[i]
+        donors[donor_id] = donors.get(donor_id, 0) + amount
+        return True
+
+    def window(self, now: int, seconds: int) -> Tuple[int, int, Counter]:
+        """
+        Totales de los buckets que caen en los últimos `seconds` segundos (incluido el actual)
+
+        Returns:
+            (coins, donaciones, coins por donador)
+        """
+        last = now // self._width
+        buckets = min(self.size, max(1, -(-seconds // self.resolution)))
+        total = 0
+        count = 0
+        donors: Counter = Counter()
+        for bucket in range(last - buckets + 1, last + 1):
+            i = bucket % self.size
+            if self._slots[i] == bucket:
+                total += self._totals[i]
+                count += self._counts[i]
+                donors.update(self._donors[i])
+        return total, count, donors
+
+    def clear(self) -> None:
+        for i in range(self.size):
+            self._slots[i] = -1
+            self._totals[i] = 0
+            self._counts[i] = 0
+            self._donors[i] = {}
+
+
+class DonationRate:
+    """
+    Ventanas deslizantes de una subasta
+
+    Dos anillos: segundos (los últimos 5 minutos con precisión de 1 s) y minutos
+    (la última hora con precisión de 1 minuto). Cada consulta usa el anillo más
+    fino que cubre la ventana pedida.
+    """
+
+    __slots__ = ("seconds", "minutes")
+
+    def __init__(self, second_buckets: int = 300, minute_buckets: int = 60):
+        self.seconds = RateRing(1, second_buckets)
+        self.minutes = RateRing(60, minute_buckets)
+
+    @property
+    def max_window(self) -> int:
+        """Ventana más larga que se puede consultar (segundos)"""
+        return self.minutes.span
+
+    @property
+    def horizon(self) -> int:
+        """Microsegundos hacia atrás que aún caben en algún anillo"""
+        return self.max_window * MICROS
+
+    def add(self, timestamp: int, donor_id: int, amount: int, count: int = 1) -> None:
+        """Registra coins de un donador en ambos anillos (O(1))"""
+        self.seconds.add(timestamp, donor_id, amount, count)
+        self.minutes.add(timestamp, donor_id, amount, count)
+
+    def window(self, now: int, seconds: int) -> Tuple[int, int, Counter]:
+        """Totales de los últimos `seconds` segundos, con la resolución del anillo que la cubre"""
+        ring = self.seconds if seconds <= self.seconds.span else self.minutes
+        return ring.window(now, seconds)
+
+    def clear(self) -> None:
+        self.seconds.clear()
+        self.minutes.clear()
@@ -0,0 +1,100 @@
+"""
+Ranking incremental de donadores
+Mantiene el top de una subasta sin reordenar a todos los donadores en cada donación
+"""
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Tuple
+import heapq
+
+
+class Leaderboard:
+    """
+    Top-K incremental ordenado por (total desc, orden de llegada asc)
+
+    Los totales de un donador solo crecen, así que los `capacity` primeros se pueden
+    mantener en una lista ordenada pequeña: quien está fuera solo entra si supera al
+    último, y el que sale es siempre el último. Actualizar cuesta O(log D) en el
+    diccionario más O(capacity) en la lista (constante), y leer el top K es O(K).
+
+    El desempate por orden de llegada reproduce el orden estable del sorted() anterior.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self._totals: Dict[str, float] = {}
+        self._arrival: Dict[str, int] = {}
+        # Lista ordenada de (-total, llegada, username) con los `capacity` mejores
+        self._top: List[Tuple[float, int, str]] = []
+        self._top_keys: Dict[str, Tuple[float, int, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._totals)
+
+    def update(self, username: str, total: float) -> None:
+        """Registra el nuevo total acumulado de un donador"""
+        arrival = self._arrival.setdefault(username, len(self._arrival))
+        previous = self._totals.get(username)
+        self._totals[username] = total
+        if previous is not None and total < previous:
+            # Un total que baja rompe la invariante: reconstruir (caso excepcional)
+            self._rebuild()
+            return
+
+        key = (-total, arrival, username)
+        current = self._top_keys.get(username)
+        if current is not None:
+            del self._top[bisect_left(self._top, current)]
+        elif len(self._top) >= self.capacity and key >= self._top[-1]:
+            # No supera al último del top: queda fuera
+            return
+
+        insort(self._top, key)
+        self._top_keys[username] = key
+        if len(self._top) > self.capacity:
+            evicted = self._top.pop()
+            del self._top_keys[evicted[2]]
+
+    def update_many(self, updates: Iterable[Tuple[str, float]]) -> None:
+        """
+        Registra los nuevos totales de varios donadores (username, total)
+
+        Camino rápido para lotes: quien no supera al último del top solo actualiza su total.
+        """
+        totals = self._totals
+        arrival = self._arrival
+        top_keys = self._top_keys
+        capacity = self.capacity
+        for username, total in updates:
+            previous = totals.get(username)
+            if (
+                previous is not None and total >= previous and username not in top_keys
+                and len(self._top) >= capacity and (-total, arrival[username], username) >= self._top[-1]
+            ):
+                totals[username] = total
+                continue
+            self.update(username, total)
+
+    def top(self, limit: int = 5) -> List[str]:
+        """Usernames de los `limit` primeros, en orden de ranking"""
+        if limit <= self.capacity or len(self._top) == len(self._totals):
+            return [username for _, _, username in self._top[:limit]]
+        # Más allá de la capacidad: selección parcial sobre todos los donadores
+        return heapq.nsmallest(
+            limit,
+            self._totals,
+            key=lambda username: (-self._totals[username], self._arrival[username])
+        )
+
+    def clear(self) -> None:
+        """Vacía el ranking"""
+        self._totals.clear()
+        self._arrival.clear()
+        self._top.clear()
+        self._top_keys.clear()
+
+    def _rebuild(self) -> None:
+        self._top = heapq.nsmallest(
+            self.capacity,
+            ((-total, self._arrival[username], username) for username, total in self._totals.items())
+        )
+        self._top_keys = {key[2]: key for key in self._top}
@@ -1,7 +1,7 @@
 """
 Controlador REST para el módulo de subastas
 """
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
 from typing import List
 from ..application.dtos import (
     CreateAuctionDTO,
@@ -9,7 +9,12 @@ from ..application.dtos import (
     AuctionResponseDTO, 
     UpdateTimeDTO,
     TopDonorsResponseDTO,
-    StartAuctionResponseDTO
+    AuctionStatsDTO,
+    DonationRateDTO,
+    DonationBatchDTO,
+    DonationBatchResultDTO,
+    StartAuctionResponseDTO,
+    CoalescingStatsDTO
 )
 from ..application.service import AuctionService
 from ....shared.websocket_manager import websocket_manager
@@ -132,10 +137,8 @@ class AuctionController:
             - **seconds**: Segundos a añadir (positivo) o restar (negativo)
             """
             try:
-                result = self.service.update_time(auction_id, dto)
-                if result.remainingSeconds is not None:
-                    await websocket_manager.broadcast_time_update(auction_id, result.remainingSeconds)
-                return result
+                # El reloj central notifica el nuevo deadline a los clientes
+                return self.service.update_time(auction_id, dto)
             except ValueError as e:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         
@@ -154,6 +157,53 @@ class AuctionController:
             except ValueError as e:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
                 
+        @self.router.get("/{auction_id}/stats", response_model=AuctionStatsDTO)
+        async def get_stats(auction_id: str):
+            """
+            Obtiene los agregados de donaciones de la subasta
+            
+            Total de coins, donadores, número de donaciones, mayor donación
+            y totales por regalo. Se mantienen al registrar cada donación.
+            """
+            try:
+                return self.service.get_stats(auction_id)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+                
+        @self.router.get("/{auction_id}/rate", response_model=DonationRateDTO)
+        async def get_rate(auction_id: str, window: int = Query(60, ge=1, le=3600, description="Ventana en segundos")):
+            """
+            Donaciones de los últimos `window` segundos
+            
+            Coins, número de donaciones, coins por minuto y el donador que más aportó
+            en la ventana. Precisión de segundo hasta 5 minutos y de minuto hasta 1 hora.
+            """
+            try:
+                return self.service.get_rate(auction_id, window)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+                
+        @self.router.post("/{auction_id}/donations:batch", response_model=DonationBatchResultDTO)
+        async def add_donations_batch(auction_id: str, dto: DonationBatchDTO):
+            """
+            Registra un lote de donaciones en una subasta activa
+            
+            Pensado para backfills, regalos recibidos offline y pruebas de carga.
+            Los overlays reciben un único donation_update por lote.
+            """
+            try:
+                return self.service.add_donations_batch(auction_id, dto)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+                
+        @self.router.get("/{auction_id}/coalescing", response_model=CoalescingStatsDTO)
+        async def get_coalescing_stats(auction_id: str):
+            """Contadores de coalescencia de las actualizaciones de donaciones"""
+            try:
+                return self.service.get_coalescing_stats(auction_id)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+                
         @self.router.patch("/{auction_id}/time", response_model=AuctionResponseDTO)
         async def update_time(auction_id: str, dto: UpdateTimeDTO):
             """
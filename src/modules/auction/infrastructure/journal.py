@@ -0,0 +1,392 @@
+"""
+Journal binario append-only de subastas
+Persiste donaciones y cambios de estado por subasta para reconstruir los
+leaderboards tras un reinicio o un redeploy
+"""
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+import asyncio
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import time
+
+from ..domain.auction import Auction, AuctionStatus
+from ..domain.donation import DonationTracker
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"TCJ1"
+
+# Tipos de registro
+STRING = 1      # <BII tipo, id, longitud> + utf-8: define una cadena internada
+DONATIONS = 2   # <BI tipo, n> + n timestamps q, n montos q, n donador I, n regalo I, n foto I
+STATE = 3       # <BI tipo, longitud> + JSON con el estado de la subasta
+
+_STRING_HEADER = struct.Struct("<BII")
+_BLOCK_HEADER = struct.Struct("<BI")
+# Bytes por donación en un bloque: dos int64 y tres uint32
+_DONATION_SIZE = 8 + 8 + 4 + 4 + 4
+
+# Las columnas se escriben en little-endian
+_SWAP = sys.byteorder != "little"
+
+
+def _column_bytes(column: array) -> bytes:
+    if _SWAP:
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _column_from(typecode: str, buffer) -> array:
+    column = array(typecode)
+    column.frombytes(buffer)
+    if _SWAP:
+        column.byteswap()
+    return column
+
+
+def auction_state(auction: Auction) -> dict:
+    """Estado de una subasta para el journal (el reloj se guarda en tiempo de pared)"""
+    state = auction.to_dict()
+    remaining = auction.remaining_time
+    state["remainingMs"] = round(remaining * 1000) if remaining is not None else None
+    state["recordedAt"] = round(time.time() * 1000)
+    return state
+
+
+def restore_auction(state: dict) -> Auction:
+    """Reconstruye una subasta descontando el tiempo que el servidor estuvo caído si estaba ACTIVE"""
+    auction = Auction.from_dict(state)
+    remaining_ms = state.get("remainingMs")
+    if remaining_ms is not None:
+        remaining = remaining_ms / 1000
+        if auction.status == AuctionStatus.ACTIVE:
+            remaining -= max(0.0, time.time() - state["recordedAt"] / 1000)
+        # El reloj de la subasta es monotónico: se recalcula el deadline en este proceso
+        auction.remaining_seconds = max(0.0, remaining)
+    return auction
+
+
+class AuctionJournal:
+    """
+    Fichero de journal de una subasta
+
+    Las donaciones se acumulan en columnas y se escriben como un único bloque por
+    flush; las cadenas (usuarios, regalos, fotos) se internan y se escriben una vez.
+    Si una escritura falla, los bytes que no llegaron al fichero se conservan y se
+    escriben primero en el siguiente flush: los bloques posteriores pueden referirse a
+    cadenas internadas en ellos, y un registro a medias se completa en lugar de quedar
+    roto en mitad del fichero.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+        self._strings: Dict[str, int] = {}
+        self._next_string_id = 1
+        self._pending_strings = bytearray()
+        self._pending_states: List[bytes] = []
+        # Bytes ya serializados que una escritura fallida no llegó a escribir
+        self._unwritten = b""
+        self._timestamps = array("q")
+        self._amounts = array("q")
+        self._donors = array("I")
+        self._gifts = array("I")
+        self._pictures = array("I")
+
+    @property
+    def has_pending(self) -> bool:
+        return bool(self._unwritten or self._amounts or self._pending_strings or self._pending_states)
+
+    def intern(self, value: Optional[str]) -> int:
+        """ID de una cadena en este fichero (0 = None)"""
+        if value is None:
+            return 0
+        string_id = self._strings.get(value)
+        if string_id is None:
+            string_id = self._strings[value] = self._next_string_id
+            self._next_string_id += 1
+            encoded = value.encode("utf-8")
+            self._pending_strings += _STRING_HEADER.pack(STRING, string_id, len(encoded))
+            self._pending_strings += encoded
+        return string_id
+
+    def append_donation(self, timestamp: int, username: str, amount: int, gift_name: Optional[str], profile_picture: Optional[str]) -> None:
+        self._timestamps.append(timestamp)
+        self._amounts.append(amount)
+        self._donors.append(self.intern(username))
+        self._gifts.append(self.intern(gift_name))
+        self._pictures.append(self.intern(profile_picture))
+
+    def append_state(self, state: dict) -> None:
+        payload = json.dumps(state, separators=(",", ":")).encode("utf-8")
+        self._pending_states.append(_BLOCK_HEADER.pack(STATE, len(payload)) + payload)
+
+    def take_pending(self) -> bytes:
+        """Serializa lo pendiente (cadenas, bloque de donaciones, estados) y vacía los buffers"""
+        chunks = [self._unwritten, bytes(self._pending_strings)]
+        self._unwritten = b""
+        count = len(self._amounts)
+        if count:
+            chunks.append(_BLOCK_HEADER.pack(DONATIONS, count))
+            for column in (self._timestamps, self._amounts, self._donors, self._gifts, self._pictures):
+                chunks.append(_column_bytes(column))
+                del column[:]
+        chunks.extend(self._pending_states)
+        self._pending_strings = bytearray()
+        self._pending_states = []
+        return b"".join(chunks)
+
+    def write(self, data: bytes, fsync: bool = True) -> None:
+        """
+        Escribe al final del fichero (se ejecuta fuera del event loop)
+
+        Si falla, lo que no se escribió queda en `_unwritten` para el siguiente flush.
+        """
+        view = memoryview(data)
+        try:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+                if os.fstat(self._fd).st_size == 0:
+                    # La cabecera viaja con los datos: si falla, se reintenta con ellos
+                    view = memoryview(MAGIC + data)
+            while view:
+                written = os.write(self._fd, view)
+                view = view[written:]
+        except OSError:
+            self._unwritten = bytes(view)
+            raise
+        if fsync:
+            os.fsync(self._fd)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def replay(self) -> Tuple[Optional[dict], Optional[DonationTracker]]:
+        """
+        Lee el fichero con mmap y reconstruye el último estado y el tracker de donaciones
+
+        Un registro incompleto al final (escritura interrumpida) se descarta y el
+        fichero se trunca al último registro válido. Las cadenas se resuelven por el id
+        guardado en su registro; un bloque que usa un id no definido antes (o un id
+        redefinido con otro valor) hace fallar la lectura con ValueError.
+        """
+        size = os.path.getsize(self.path)
+        if size <= len(MAGIC):
+            return None, None
+        strings: Dict[int, Optional[str]] = {0: None}
+        state: Optional[dict] = None
+        blocks = []
+        with open(self.path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{self.path} no es un journal de subastas")
+            view = memoryview(data)
+            offset = len(MAGIC)
+            try:
+                while offset < size:
+                    kind = data[offset]
+                    if kind == STRING:
+                        if offset + _STRING_HEADER.size > size:
+                            break
+                        _, string_id, length = _STRING_HEADER.unpack_from(data, offset)
+                        end = offset + _STRING_HEADER.size + length
+                        if end > size:
+                            break
+                        value = str(view[offset + _STRING_HEADER.size:end], "utf-8")
+                        if strings.get(string_id, value) != value or string_id == 0:
+                            raise ValueError(f"Cadena {string_id} redefinida en {self.path} (offset {offset})")
+                        strings[string_id] = value
+                        self._strings[value] = string_id
+                        self._next_string_id = max(self._next_string_id, string_id + 1)
+                    elif kind in (DONATIONS, STATE):
+                        if offset + _BLOCK_HEADER.size > size:
+                            break
+                        _, count = _BLOCK_HEADER.unpack_from(data, offset)
+                        start = offset + _BLOCK_HEADER.size
+                        end = start + (count * _DONATION_SIZE if kind == DONATIONS else count)
+                        if end > size:
+                            break
+                        if kind == STATE:
+                            state = json.loads(str(view[start:end], "utf-8"))
+                        else:
+                            blocks.append(self._read_block(view, start, count, strings, offset))
+                    else:
+                        raise ValueError(f"Registro desconocido {kind} en {self.path} (offset {offset})")
+                    offset = end
+            finally:
+                view.release()
+
+        if offset < size:
+            logger.warning(f"⚠️ Journal {self.path} truncado en {offset} de {size} bytes (escritura incompleta)")
+            os.truncate(self.path, offset)
+
+        if state is None:
+            return None, None
+        tracker = DonationTracker(state["id"])
+        for timestamps, rows in blocks:
+            tracker.add_donations(rows, timestamps=timestamps)
+        return state, tracker
+
+    def _read_block(self, view: memoryview, start: int, count: int, strings: Dict[int, Optional[str]], offset: int) -> Tuple[array, list]:
+        """Timestamps y filas (usuario, monto, regalo, foto) de un bloque de donaciones"""
+        columns = []
+        for typecode, width in (("q", 8), ("q", 8), ("I", 4), ("I", 4), ("I", 4)):
+            end = start + count * width
+            columns.append(_column_from(typecode, view[start:end]))
+            start = end
+        timestamps, amounts, donors, gifts, pictures = columns
+        try:
+            rows = list(zip(
+                map(strings.__getitem__, donors),
+                amounts,
+                map(strings.__getitem__, gifts),
+                map(strings.__getitem__, pictures)
+            ))
+        except KeyError as e:
+            raise ValueError(f"Cadena {e.args[0]} no definida en {self.path} (bloque en offset {offset})") from None
+        return timestamps, rows
+
+
+class DonationJournal:
+    """
+    Journal de todas las subastas de un proceso (un fichero por subasta)
+
+    Las escrituras se agrupan: registrar una donación solo la añade a un buffer en
+    memoria y una tarea de fondo escribe y hace fsync cada `fsync_interval` segundos,
+    con un fsync por fichero por grupo.
+    """
+
+    def __init__(self, directory: str, fsync_interval: float = 0.05):
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self._journals: Dict[str, AuctionJournal] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _journal(self, auction_id: str) -> AuctionJournal:
+        journal = self._journals.get(auction_id)
+        if journal is None:
+            journal = self._journals[auction_id] = AuctionJournal(
+                os.path.join(self.directory, f"{auction_id}.journal")
+            )
+        return journal
+
+    def record_state(self, auction: Auction) -> None:
+        """Registra el estado actual de una subasta"""
+        self._journal(auction.id).append_state(auction_state(auction))
+
+    def record_donation(
+        self,
+        auction_id: str,
+        timestamp: int,
+        username: str,
+        amount: int,
+        gift_name: Optional[str] = None,
+        profile_picture: Optional[str] = None
+    ) -> None:
+        """Registra una donación (coins enteros, timestamp en microsegundos)"""
+        self._journal(auction_id).append_donation(timestamp, username, amount, gift_name, profile_picture)
+
+    def record_donations(self, auction_id: str, timestamp: int, rows: Sequence[Tuple[str, int, Optional[str], Optional[str]]]) -> None:
+        """Registra un lote de donaciones (username, amount, gift_name, profile_picture)"""
+        journal = self._journal(auction_id)
+        for username, amount, gift_name, profile_picture in rows:
+            journal.append_donation(timestamp, username, amount, gift_name, profile_picture)
+
+    async def discard(self, auction_id: str) -> None:
+        """
+        Elimina el journal de una subasta borrada
+
+        Espera a la escritura en curso: si el executor sigue escribiendo en el fichero,
+        cerrarlo o borrarlo ahora dejaría el descriptor reutilizable y la escritura
+        volvería a crear el fichero, restaurando la subasta en el siguiente arranque.
+        """
+        journal = self._journals.pop(auction_id, None)
+        async with self._flush_lock:
+            if journal is not None:
+                journal.close()
+            try:
+                os.remove(os.path.join(self.directory, f"{auction_id}.journal"))
+            except FileNotFoundError:
+                pass
+
+    def replay(self) -> List[Tuple[Auction, Optional[DonationTracker]]]:
+        """
+        Reconstruye las subastas y sus trackers desde los ficheros del directorio
+
+        Un fichero ilegible o corrupto no impide el arranque: se registra el error, se
+        renombra a `.corrupt` (para inspeccionarlo) y se sigue con las demás subastas.
+        """
+        restored = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".journal"):
+                continue
+            auction_id = name[:-len(".journal")]
+            journal = self._journal(auction_id)
+            try:
+                state, tracker = journal.replay()
+                if state is None:
+                    continue
+                auction = restore_auction(state)
+            except (ValueError, OSError, IndexError, KeyError, TypeError, struct.error) as e:
+                logger.error(f"❌ No se pudo leer el journal {journal.path}, se aparta como .corrupt: {e!r}")
+                self._journals.pop(auction_id, None)
+                journal.close()
+                try:
+                    os.replace(journal.path, f"{journal.path}.corrupt")
+                except OSError as rename_error:
+                    logger.error(f"❌ No se pudo renombrar el journal {journal.path}: {rename_error}")
+                continue
+            restored.append((auction, tracker))
+        return restored
+
+    def start(self) -> None:
+        """Arranca la escritura agrupada en segundo plano (idempotente)"""
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Detiene la tarea de fondo, escribe lo pendiente y cierra los ficheros"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        for journal in self._journals.values():
+            journal.close()
+
+    async def flush(self) -> None:
+        """Escribe y sincroniza lo pendiente de todas las subastas"""
+        async with self._flush_lock:
+            pending = [
+                (journal, journal.take_pending())
+                for journal in self._journals.values()
+                if journal.has_pending
+            ]
+            if pending:
+                await asyncio.get_running_loop().run_in_executor(None, self._write_all, pending)
+
+    @staticmethod
+    def _write_all(pending: List[Tuple[AuctionJournal, bytes]]) -> None:
+        for journal, data in pending:
+            try:
+                journal.write(data)
+            except OSError as e:
+                logger.error(f"❌ Error escribiendo el journal {journal.path} (se reintenta en el siguiente flush): {e}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.fsync_interval)
+            await self.flush()
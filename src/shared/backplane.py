@@ -0,0 +1,230 @@
+"""
+Backplane de publicación/suscripción entre workers
+Permite que un broadcast hecho en un worker llegue a los WebSockets de todos los workers
+"""
+from typing import Callable, Optional, Set
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import struct
+
+from .serialization import encode_json
+
+logger = logging.getLogger(__name__)
+
+# Entrega local: (auction_id, mensaje, coalesce)
+DeliverCallback = Callable[[str, dict, bool], None]
+
+_HEADER = struct.Struct(">I")
+
+
+class Backplane:
+    """
+    Interfaz del backplane
+
+    `publish` entrega el mensaje a los sockets locales y lo propaga al resto de workers,
+    que lo entregan a los suyos mediante el callback recibido en `start`.
+    """
+
+    async def start(self, deliver: DeliverCallback) -> None:
+        raise NotImplementedError
+
+    async def stop(self) -> None:
+        raise NotImplementedError
+
+    def publish(self, auction_id: str, message: dict, coalesce: bool = True) -> None:
+        raise NotImplementedError
+
+
+class InProcessBackplane(Backplane):
+    """Backplane de un solo proceso: entrega directamente a los sockets locales"""
+
+    def __init__(self):
+        self._deliver: Optional[DeliverCallback] = None
+
+    async def start(self, deliver: DeliverCallback) -> None:
+        self._deliver = deliver
+
+    async def stop(self) -> None:
+        self._deliver = None
+
+    def publish(self, auction_id: str, message: dict, coalesce: bool = True) -> None:
+        if self._deliver:
+            self._deliver(auction_id, message, coalesce)
+
+
+class UnixSocketBackplane(Backplane):
+    """
+    Backplane local multiproceso sobre un socket Unix
+
+    El primer worker que obtiene el lock `<path>.lock` hace de broker: escucha en `path`
+    y reenvía cada frame a todos los demás workers conectados (excepto al emisor).
+    Todos los workers, incluido el broker, se conectan como clientes. Si el broker cae,
+    otro worker toma el lock y los demás se reconectan.
+
+    Frames: longitud de 4 bytes (big endian) + JSON {"auctionId", "message", "coalesce"}.
+    """
+
+    def __init__(
+        self,
+        path: str = "/tmp/tiktokcraft-backplane.sock",
+        reconnect_delay: float = 0.5,
+        max_peer_buffer: int = 8 * 1024 * 1024
+    ):
+        self.path = path
+        self.reconnect_delay = reconnect_delay
+        self.max_peer_buffer = max_peer_buffer
+        self._deliver: Optional[DeliverCallback] = None
+        self._task: Optional[asyncio.Task] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected = asyncio.Event()
+        # Rol de broker
+        self._lock_fd: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._peers: Set[asyncio.StreamWriter] = set()
+        self._peer_tasks: Set[asyncio.Task] = set()
+        # Contadores
+        self.published = 0
+        self.received = 0
+        self.lost = 0
+
+    @property
+    def is_broker(self) -> bool:
+        """Indica si este worker es el broker"""
+        return self._server is not None
+
+    async def start(self, deliver: DeliverCallback, timeout: float = 5.0) -> None:
+        """Se une al backplane (como broker o como cliente) y espera la primera conexión"""
+        self._deliver = deliver
+        self._connected = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Backplane sin conexión en {self.path}; se seguirá reintentando")
+
+    async def stop(self) -> None:
+        """Sale del backplane y, si era broker, libera el socket y el lock"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._server:
+            self._server.close()
+            for peer in list(self._peers):
+                peer.close()
+            # Esperar a que los manejadores de cada worker terminen al ver su socket cerrado
+            if self._peer_tasks:
+                await asyncio.wait(self._peer_tasks, timeout=1.0)
+            self._peers.clear()
+            await self._server.wait_closed()
+            self._server = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def publish(self, auction_id: str, message: dict, coalesce: bool = True) -> None:
+        """Entrega localmente al instante y propaga al resto de workers sin bloquear"""
+        if self._deliver:
+            self._deliver(auction_id, message, coalesce)
+        self.published += 1
+        if self._writer is None:
+            self.lost += 1
+            return
+        body = encode_json({"auctionId": auction_id, "message": message, "coalesce": coalesce}).encode("utf-8")
+        self._writer.write(_HEADER.pack(len(body)) + body)
+
+    async def _run(self) -> None:
+        """Mantiene la conexión con el broker (asumiendo el rol si queda libre)"""
+        while True:
+            try:
+                if self._server is None and self._try_acquire_broker_lock():
+                    self._server = await asyncio.start_unix_server(self._handle_peer, path=self.path)
+                    logger.info(f"📡 Broker del backplane escuchando en {self.path} (pid {os.getpid()})")
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except OSError:
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            self._writer = writer
+            self._connected.set()
+            try:
+                while True:
+                    body = await _read_frame(reader)
+                    self._deliver_remote(body)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                logger.warning("⚠️ Conexión con el broker del backplane perdida; reconectando")
+            finally:
+                self._writer = None
+                self._connected.clear()
+                writer.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _try_acquire_broker_lock(self) -> bool:
+        """El lock de fichero garantiza un único broker; se libera solo si el proceso muere"""
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def _deliver_remote(self, body: bytes) -> None:
+        self.received += 1
+        try:
+            frame = json.loads(body)
+            self._deliver(frame["auctionId"], frame["message"], frame.get("coalesce", True))
+        except Exception as e:
+            logger.error(f"❌ Frame de backplane inválido: {e}")
+
+    async def _handle_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Broker: reenvía cada frame de un worker a todos los demás"""
+        task = asyncio.current_task()
+        self._peer_tasks.add(task)
+        self._peers.add(writer)
+        try:
+            while True:
+                body = await _read_frame(reader)
+                frame = _HEADER.pack(len(body)) + body
+                for peer in list(self._peers):
+                    if peer is writer:
+                        continue
+                    if peer.transport.get_write_buffer_size() > self.max_peer_buffer:
+                        # Un worker que no consume no debe hacer crecer la memoria del broker
+                        logger.warning("⚠️ Worker del backplane demasiado lento; se desconecta")
+                        self._peers.discard(peer)
+                        peer.close()
+                        continue
+                    peer.write(frame)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._peers.discard(writer)
+            self._peer_tasks.discard(task)
+            writer.close()
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+    header = await reader.readexactly(_HEADER.size)
+    (size,) = _HEADER.unpack(header)
+    return await reader.readexactly(size)
+
+
+def create_backplane(kind: str, path: Optional[str] = None) -> Backplane:
+    """Crea el backplane configurado: "inprocess" o "unix" """
+    if kind == "inprocess":
+        return InProcessBackplane()
+    if kind == "unix":
+        return UnixSocketBackplane(path) if path else UnixSocketBackplane()
+    raise ValueError(f"Backplane no soportado: {kind}")
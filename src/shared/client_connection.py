@@ -0,0 +1,169 @@
+"""
+Conexión de cliente con cola de salida propia
+Cada conexión tiene una cola acotada que vacía su propia tarea escritora,
+de modo que un cliente lento no bloquea al resto ni a quien hace el broadcast
+"""
+from collections import deque
+from enum import Enum
+from typing import Callable, Deque, Optional, Tuple, Union
+import asyncio
+import itertools
+import logging
+import time
+
+from fastapi import WebSocket
+
+from .serialization import JSON_CODEC
+
+logger = logging.getLogger(__name__)
+
+_connection_ids = itertools.count(1)
+
+
+class OverflowPolicy(Enum):
+    """Qué hacer cuando la cola de salida de un cliente está llena"""
+    DROP_OLDEST = "drop_oldest"  # Descartar el frame más antiguo
+    COALESCE = "coalesce"        # Reemplazar el frame pendiente del mismo tipo (gana el último)
+    DISCONNECT = "disconnect"    # Desconectar al consumidor lento
+
+
+class ClientConnection:
+    """
+    Cliente WebSocket con cola de salida acotada y tarea escritora
+
+    `enqueue` nunca bloquea: si la cola está llena se aplica la política de desbordamiento.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        auction_id: str,
+        max_queue_size: int = 256,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        send_timeout: float = 10.0,
+        on_close: Optional[Callable[["ClientConnection"], None]] = None,
+        codec: str = JSON_CODEC
+    ):
+        self.id = next(_connection_ids)
+        self.websocket = websocket
+        self.auction_id = auction_id
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+        self.send_timeout = send_timeout
+        self._on_close = on_close
+        # Codec negociado por subprotocolo: los frames JSON son texto y los MessagePack binarios
+        self.codec = codec
+        # Cola de frames pendientes: (clave de coalescencia, payload)
+        self._queue: Deque[Tuple[Optional[str], Union[str, bytes]]] = deque()
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self.closed = False
+        # Última señal de vida del cliente (reloj monotónico), para el heartbeat
+        self.last_seen = time.monotonic()
+        # Contadores
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Número de frames pendientes de enviar"""
+        return len(self._queue)
+
+    def touch(self) -> None:
+        """Registra actividad del cliente"""
+        self.last_seen = time.monotonic()
+
+    def start(self) -> None:
+        """Arranca la tarea escritora"""
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write_loop())
+
+    def enqueue(self, payload: Union[str, bytes], key: Optional[str] = None) -> bool:
+        """
+        Encola un frame ya serializado sin bloquear
+
+        Returns:
+            False si el frame se descartó o el cliente fue desconectado
+        """
+        if self.closed:
+            return False
+
+        if len(self._queue) >= self.max_queue_size:
+            if self.overflow_policy == OverflowPolicy.DISCONNECT:
+                logger.warning(f"⚠️ Cliente lento desconectado (conexión {self.id}, subasta {self.auction_id})")
+                self.dropped += 1
+                self.close(code=1013)
+                return False
+
+            if self.overflow_policy == OverflowPolicy.COALESCE and key is not None:
+                # Reemplazar el frame pendiente más reciente del mismo tipo
+                for index in range(len(self._queue) - 1, -1, -1):
+                    if self._queue[index][0] == key:
+                        self._queue[index] = (key, payload)
+                        self.coalesced += 1
+                        return True
+
+            # DROP_OLDEST (o COALESCE sin frame del mismo tipo)
+            self._queue.popleft()
+            self.dropped += 1
+
+        self._queue.append((key, payload))
+        self._ready.set()
+        return True
+
+    def close(self, code: int = 1000) -> None:
+        """Cierra la conexión y detiene la tarea escritora"""
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.clear()
+        if self._writer and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        if self._on_close:
+            self._on_close(self)
+        if code != 1000:
+            asyncio.create_task(self._close_socket(code))
+
+    async def _close_socket(self, code: int) -> None:
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    async def _write_loop(self) -> None:
+        """Vacía la cola enviando cada frame al socket"""
+        try:
+            while True:
+                while not self._queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                _, payload = self._queue.popleft()
+                if isinstance(payload, bytes):
+                    send = self.websocket.send_bytes(payload)
+                else:
+                    send = self.websocket.send_text(payload)
+                await asyncio.wait_for(send, self.send_timeout)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Timeout enviando a la conexión {self.id}; se desconecta")
+            self.close(code=1013)
+        except Exception as e:
+            # Si falla el envío, desconectar el cliente
+            logger.warning(f"Error enviando mensaje a la conexión {self.id}: {e}")
+            self.close()
+
+    def stats(self) -> dict:
+        """Contadores de la conexión"""
+        return {
+            "id": self.id,
+            "auctionId": self.auction_id,
+            "codec": self.codec,
+            "queueDepth": len(self._queue),
+            "idleSeconds": round(time.monotonic() - self.last_seen, 1),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced
+        }
@@ -0,0 +1,92 @@
+"""
+Coalescedor de actualizaciones "gana el último"
+Agrupa ráfagas de eventos por clave para publicar como máximo una vez por intervalo
+"""
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _KeyState:
+    """Estado de coalescencia de una clave"""
+
+    __slots__ = ("last_flush", "timer", "events", "flushes")
+
+    def __init__(self):
+        self.last_flush: Optional[float] = None
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.events = 0
+        self.flushes = 0
+
+
+class Coalescer:
+    """
+    Marca claves como sucias y las publica con flanco de subida y cola
+
+    - El primer evento tras un periodo tranquilo se publica al instante (leading edge).
+    - Los eventos dentro del intervalo solo marcan la clave como sucia.
+    - Al cumplirse el intervalo se publica el estado final (trailing edge).
+
+    `flush(key)` debe leer el estado más reciente en el momento de publicar.
+    """
+
+    def __init__(self, flush: Callable[[Hashable], Awaitable[None]], interval: float = 0.1):
+        self._flush = flush
+        self.interval = interval
+        self._states: Dict[Hashable, _KeyState] = {}
+
+    def mark_dirty(self, key: Hashable) -> None:
+        """Registra un cambio en `key`; se publicará ahora o al final del intervalo"""
+        loop = asyncio.get_running_loop()
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = _KeyState()
+        state.events += 1
+
+        if state.timer is not None:
+            # Ya hay una publicación pendiente que recogerá este cambio
+            return
+
+        now = loop.time()
+        if state.last_flush is None or now - state.last_flush >= self.interval:
+            self._run_flush(key, state, now)
+        else:
+            state.timer = loop.call_at(state.last_flush + self.interval, self._on_timer, key)
+
+    def discard(self, key: Hashable) -> None:
+        """Olvida una clave y cancela su publicación pendiente"""
+        state = self._states.pop(key, None)
+        if state and state.timer:
+            state.timer.cancel()
+
+    def stats(self, key: Hashable) -> dict:
+        """Contadores de eventos recibidos, publicados y absorbidos para una clave"""
+        state = self._states.get(key)
+        events = state.events if state else 0
+        flushes = state.flushes if state else 0
+        return {
+            "events": events,
+            "flushes": flushes,
+            "coalesced": events - flushes,
+            "pending": bool(state and state.timer)
+        }
+
+    def _on_timer(self, key: Hashable) -> None:
+        state = self._states.get(key)
+        if state is None:
+            return
+        state.timer = None
+        self._run_flush(key, state, asyncio.get_running_loop().time())
+
+    def _run_flush(self, key: Hashable, state: _KeyState, now: float) -> None:
+        state.last_flush = now
+        state.flushes += 1
+        asyncio.create_task(self._safe_flush(key))
+
+    async def _safe_flush(self, key: Hashable) -> None:
+        try:
+            await self._flush(key)
+        except Exception as e:
+            logger.error(f"❌ Error publicando actualización coalescida de {key}: {e}")
@@ -0,0 +1,500 @@
+"""
+Fuentes de eventos de TikTok Live para el conector compartido
+Una fuente entrega al conector los regalos de un stream ya normalizados (GiftData):
+  - TikTokLiveSource: el cliente real de TikTokLive
+  - RecordingSource: envuelve otra fuente y graba sus eventos en un fichero NDJSON
+  - ReplaySource: reproduce una grabación a 1×, 10× o a máxima velocidad
+  - SyntheticSource: genera regalos con cardinalidad de donadores y mezcla de regalos configurables
+Las tres últimas permiten pruebas de carga sin red ni streams en vivo.
+"""
+from TikTokLive import TikTokLiveClient
+from TikTokLive.events import ConnectEvent, GiftEvent, DisconnectEvent
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+import asyncio
+import logging
+import os
+import random
+import time
+
+from .serialization import decode_json, encode_json
+
+logger = logging.getLogger(__name__)
+
+# Máximo de usuarios cacheados por proceso (se descarta el más antiguo al llenarse)
+USER_CACHE_SIZE = 50_000
+# Campos de avatar por prioridad (en TikTokLive Python, ImageModel usa m_urls y no url_list)
+AVATAR_FIELDS = ('avatar_thumb', 'avatar_medium', 'avatar_large')
+# Eventos entre cesiones del event loop al reproducir a máxima velocidad
+MAX_SPEED_CHUNK = 256
+
+
+class GiftData(NamedTuple):
+    """Regalo de TikTok Live normalizado (independiente de la versión de TikTokLive)"""
+    donor_id: str
+    username: str
+    profile_picture: str
+    gift_id: int
+    gift_name: str
+    unit_value: int
+    streakable: bool
+    repeat_count: int
+    repeat_end: bool
+    group_id: int
+
+    def to_record(self) -> dict:
+        return {
+            "donorId": self.donor_id,
+            "username": self.username,
+            "profilePicture": self.profile_picture,
+            "giftId": self.gift_id,
+            "giftName": self.gift_name,
+            "diamonds": self.unit_value,
+            "streakable": self.streakable,
+            "repeatCount": self.repeat_count,
+            "repeatEnd": self.repeat_end,
+            "groupId": self.group_id
+        }
+
+    @classmethod
+    def from_record(cls, record: dict) -> "GiftData":
+        return cls(
+            record.get("donorId", ""),
+            record.get("username", ""),
+            record.get("profilePicture", ""),
+            record.get("giftId", 0),
+            record.get("giftName", ""),
+            record.get("diamonds", 0),
+            record.get("streakable", False),
+            record.get("repeatCount", 1),
+            record.get("repeatEnd", True),
+            record.get("groupId", 0)
+        )
+
+
+# Callbacks que recibe una fuente: cada regalo y la conexión establecida
+GiftCallback = Callable[[GiftData], None]
+ConnectCallback = Callable[[], None]
+
+
+class EventSource:
+    """
+    Fuente de eventos de un stream
+
+    `run` se conecta al stream de `unique_id`, llama a `on_connect` al establecer la
+    conexión y a `on_gift` con cada regalo. Retorna cuando el stream termina y lanza
+    una excepción si la conexión falla; el conector reintenta en ambos casos. Al
+    cancelarse debe cerrar lo que haya abierto.
+
+    Las fuentes sin red marcan `exhausted` al entregar su último evento.
+    """
+
+    name = "base"
+    exhausted = False
+
+    async def run(self, unique_id: str, on_gift: GiftCallback, on_connect: ConnectCallback) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Libera recursos de la fuente (al apagar)"""
+
+
+class TikTokLiveSource(EventSource):
+    """
+    Fuente real: un cliente de TikTokLive por stream
+
+    Decodifica cada GiftEvent a GiftData. Los mensajes de TikTokLive son betterproto y
+    cada acceso a un campo es caro, así que lo estable (regalo, usuario) sale de cachés
+    compartidas por todos los streams del proceso.
+    """
+
+    name = "live"
+
+    def __init__(self, client_factory: Callable[..., TikTokLiveClient] = TikTokLiveClient):
+        self.client_factory = client_factory
+        # Catálogo de regalos por id: (valor unitario, nombre, admite combo); se resuelve una vez por proceso
+        self.gift_catalog: Dict[int, Tuple[int, str, bool]] = {}
+        # Nombre visible y avatar por unique_id: los donadores recurrentes no repiten la extracción
+        self.user_profiles: Dict[str, Tuple[str, str]] = {}
+
+    async def run(self, unique_id: str, on_gift: GiftCallback, on_connect: ConnectCallback) -> None:
+        client = self.client_factory(unique_id=f"@{unique_id}")
+
+        # Handler para eventos de regalo (donaciones)
+        @client.on(GiftEvent)
+        async def on_gift_event(event: GiftEvent):
+            try:
+                on_gift(self.decode(event))
+            except Exception as e:
+                logger.error(f"Error procesando donación: {e}")
+                # Imprimir más detalles para debugging
+                try:
+                    logger.error(f"Tipo de evento: {type(event)}")
+                    logger.error(f"Atributos del evento: {dir(event)}")
+                    if hasattr(event, 'gift'):
+                        logger.error(f"Tipo de regalo: {type(event.gift)}")
+                        logger.error(f"Atributos del regalo: {dir(event.gift)}")
+                    if hasattr(event, 'user'):
+                        logger.error(f"Tipo de usuario: {type(event.user)}")
+                        logger.error(f"Atributos del usuario: {dir(event.user)}")
+                        # Intentar serializar el usuario completo
+                        if hasattr(event.user, '__dict__'):
+                            logger.error(f"Dict del usuario: {event.user.__dict__}")
+                except Exception as debug_error:
+                    logger.error(f"Error en debugging: {debug_error}")
+
+        # Handler para conexión exitosa
+        @client.on(ConnectEvent)
+        async def on_connect_event(event: ConnectEvent):
+            logger.info(f"✅ Conectado exitosamente al stream de @{unique_id}")
+
+        # Handler para desconexión
+        @client.on(DisconnectEvent)
+        async def on_disconnect_event(event: DisconnectEvent):
+            logger.info(f"⚠️ Desconectado del stream de @{unique_id}")
+
+        try:
+            task = await client.start()
+            on_connect()
+            # La tarea del cliente termina cuando se cierra el WebSocket de TikTok
+            await task
+        finally:
+            await self._close_client(client)
+
+    def decode(self, event: GiftEvent) -> GiftData:
+        """Normaliza un GiftEvent leyendo cada campo una sola vez"""
+        gift = event.gift
+        gift_id = getattr(gift, 'id', 0)
+        unit_value, gift_name, streakable = self.gift_catalog.get(gift_id) or self._cache_gift(gift_id, gift)
+        user = event.user
+        donor_id = getattr(user, 'unique_id', '') or ''
+        profile = self.user_profiles.get(donor_id) if donor_id else None
+        if profile is None:
+            profile = self._cache_user(donor_id, user)
+        return GiftData(
+            donor_id,
+            profile[0],
+            profile[1],
+            gift_id,
+            gift_name,
+            unit_value,
+            streakable,
+            getattr(event, 'repeat_count', 0) or 1,
+            bool(getattr(event, 'repeat_end', 0)),
+            getattr(event, 'group_id', 0)
+        )
+
+    def _cache_gift(self, gift_id: int, gift) -> Tuple[int, str, bool]:
+        """Resuelve (valor unitario, nombre, admite combo) de un regalo y lo guarda en el catálogo"""
+        # El valor puede venir en distintos campos según la versión de TikTokLive
+        unit_value = getattr(gift, 'diamond_count', 0) or getattr(gift, 'diamonds', 0) or getattr(gift, 'value', 1)
+        info = (int(unit_value), getattr(gift, 'name', None) or 'Regalo desconocido', bool(getattr(gift, 'streakable', False)))
+        if gift_id:
+            self.gift_catalog[gift_id] = info
+        logger.info("🎁 Regalo %s (ID: %s): %s diamonds", info[1], gift_id, info[0])
+        return info
+
+    def _cache_user(self, unique_id: str, user) -> Tuple[str, str]:
+        """Extrae nombre visible y foto de perfil del usuario y los guarda por unique_id"""
+        username = getattr(user, 'nickname', '') or unique_id or 'Usuario desconocido'
+        profile_picture = ''
+        for field in AVATAR_FIELDS:
+            try:
+                avatar = getattr(user, field, None)
+                urls = getattr(avatar, 'm_urls', None) if avatar else None
+                if urls:
+                    profile_picture = str(urls[0])
+                    break
+            except Exception as e:
+                logger.error("❌ Error extrayendo %s: %s", field, e)
+        if not profile_picture:
+            logger.warning("⚠️ No se pudo extraer avatar para %s, se usará uno generado", username)
+        profile = (username, profile_picture)
+        if unique_id:
+            if len(self.user_profiles) >= USER_CACHE_SIZE:
+                del self.user_profiles[next(iter(self.user_profiles))]
+            self.user_profiles[unique_id] = profile
+        return profile
+
+    @staticmethod
+    async def _close_client(client: TikTokLiveClient) -> None:
+        """Cierra un cliente de TikTokLive (disconnect en 6.x, stop en versiones anteriores)"""
+        try:
+            if hasattr(client, 'disconnect'):
+                await client.disconnect(close_client=True)
+            else:
+                await client.stop()
+        except Exception as e:
+            logger.debug("Error cerrando el cliente de TikTokLive: %s", e)
+
+
+class RecordingSource(EventSource):
+    """
+    Graba en NDJSON los eventos de otra fuente mientras los entrega
+
+    Cada línea es un objeto con `t` (epoch en segundos), `type` (connect, gift,
+    disconnect) y `streamer`; los regalos llevan además los campos de GiftData. El
+    fichero se abre en modo append y se vuelca a disco como mucho cada `flush_interval`.
+    """
+
+    name = "record"
+
+    def __init__(self, inner: EventSource, path: str, flush_interval: float = 1.0):
+        self.inner = inner
+        self.path = path
+        self.flush_interval = flush_interval
+        self.recorded = 0
+        self._file = None
+        self._last_flush = 0.0
+
+    @property
+    def exhausted(self) -> bool:
+        return self.inner.exhausted
+
+    async def run(self, unique_id: str, on_gift: GiftCallback, on_connect: ConnectCallback) -> None:
+        def record_gift(gift: GiftData) -> None:
+            record = gift.to_record()
+            record["t"] = round(time.time(), 3)
+            record["type"] = "gift"
+            record["streamer"] = unique_id
+            self._write(record)
+            on_gift(gift)
+
+        def record_connect() -> None:
+            self._write({"t": round(time.time(), 3), "type": "connect", "streamer": unique_id})
+            on_connect()
+
+        try:
+            await self.inner.run(unique_id, record_gift, record_connect)
+        finally:
+            self._write({"t": round(time.time(), 3), "type": "disconnect", "streamer": unique_id})
+            self._flush()
+
+    def close(self) -> None:
+        self.inner.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, record: dict) -> None:
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(encode_json(record) + "\n")
+        self.recorded += 1
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+            self._last_flush = time.monotonic()
+
+
+class _PacedSource(EventSource):
+    """
+    Base de las fuentes sin red: entrega eventos con su marca de tiempo relativa
+
+    Con `speed` 1 se respetan los tiempos, con 10 van diez veces más rápido y con 0
+    se entregan sin esperas (cediendo el event loop cada MAX_SPEED_CHUNK eventos).
+    Al agotarse los eventos la fuente queda conectada sin emitir nada (o vuelve a
+    empezar con `loop`), para que el conector no lo tome como una caída.
+    """
+
+    def __init__(self, speed: float = 1.0, loop: bool = False):
+        self.speed = speed
+        self.loop = loop
+        self.emitted = 0
+        self.exhausted = False
+
+    def events(self, unique_id: str):
+        """Iterador de (segundos desde el inicio, GiftData)"""
+        raise NotImplementedError
+
+    async def run(self, unique_id: str, on_gift: GiftCallback, on_connect: ConnectCallback) -> None:
+        on_connect()
+        while True:
+            await self._play(unique_id, on_gift)
+            if not self.loop:
+                break
+        self.exhausted = True
+        # Stream sin más eventos: permanecer "conectado" hasta que se cancele
+        await asyncio.Event().wait()
+
+    async def _play(self, unique_id: str, on_gift: GiftCallback) -> None:
+        speed = self.speed
+        start = time.monotonic()
+        pending = 0
+        for offset, gift in self.events(unique_id):
+            if speed > 0:
+                delay = start + offset / speed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            else:
+                pending += 1
+                if pending >= MAX_SPEED_CHUNK:
+                    pending = 0
+                    await asyncio.sleep(0)
+            self.emitted += 1
+            try:
+                on_gift(gift)
+            except Exception as e:
+                logger.error(f"Error procesando donación: {e}")
+
+
+class ReplaySource(_PacedSource):
+    """
+    Reproduce una grabación NDJSON de RecordingSource
+
+    Por defecto se reproducen todos los regalos del fichero en el stream que se
+    conecte; con `match_streamer` solo los grabados para ese mismo streamer.
+    """
+
+    name = "replay"
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False, match_streamer: bool = False):
+        super().__init__(speed, loop)
+        self.path = path
+        self.match_streamer = match_streamer
+
+    def events(self, unique_id: str):
+        start = None
+        with open(self.path, "rb") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                record = decode_json(line)
+                if record.get("type") != "gift":
+                    continue
+                if self.match_streamer and record.get("streamer") != unique_id:
+                    continue
+                t = record.get("t", 0.0)
+                if start is None:
+                    start = t
+                yield t - start, GiftData.from_record(record)
+
+
+class GiftSpec(NamedTuple):
+    """Regalo de la mezcla sintética"""
+    gift_id: int
+    name: str
+    diamonds: int
+    weight: float
+    streakable: bool
+
+
+# Mezcla por defecto: muchos regalos baratos en combo y pocos caros
+DEFAULT_GIFT_MIX = "Rose:1:60:combo,Finger Heart:5:20:combo,Doughnut:30:15,Lion:29999:5"
+
+
+def parse_gift_mix(spec: str) -> List[GiftSpec]:
+    """
+    Convierte "Rose:1:60:combo,Doughnut:30:15" en la mezcla de regalos
+
+    Cada regalo es nombre:diamonds:peso, con ":combo" si admite combos.
+    """
+    gifts = []
+    for index, part in enumerate(p for p in spec.split(",") if p.strip()):
+        fields = [field.strip() for field in part.split(":")]
+        if len(fields) < 3:
+            raise ValueError(f"Regalo sintético no válido: {part} (se espera nombre:diamonds:peso[:combo])")
+        gifts.append(GiftSpec(
+            index + 1,
+            fields[0],
+            int(fields[1]),
+            float(fields[2]),
+            len(fields) > 3 and fields[3].lower() == "combo"
+        ))
+    return gifts
+
+
+class SyntheticSource(_PacedSource):
+    """
+    Genera regalos sintéticos
+
+    - `rate`: GiftEvents por segundo a velocidad 1 (los eventos intermedios de un combo cuentan).
+    - `donors`: número de donadores distintos (elegidos de forma uniforme).
+    - `gifts`: mezcla de regalos con su peso; los de combo generan de 1 a `max_combo`
+      eventos con el contador acumulado y uno final, como TikTok.
+    - `limit`: total de eventos (None = sin fin).
+    """
+
+    name = "synthetic"
+
+    def __init__(
+        self,
+        rate: float = 50.0,
+        speed: float = 1.0,
+        donors: int = 2_000,
+        gifts: Optional[List[GiftSpec]] = None,
+        max_combo: int = 30,
+        limit: Optional[int] = None,
+        seed: Optional[int] = None
+    ):
+        super().__init__(speed)
+        self.rate = rate
+        self.donors = donors
+        self.gifts = gifts or parse_gift_mix(DEFAULT_GIFT_MIX)
+        self.max_combo = max_combo
+        self.limit = limit
+        self.seed = seed
+
+    def events(self, unique_id: str):
+        rng = random.Random(self.seed)
+        gifts = self.gifts
+        weights = [gift.weight for gift in gifts]
+        interval = 1 / self.rate if self.rate > 0 else 0.0
+        produced = 0
+        group_id = 0
+        limit = self.limit
+        while limit is None or produced < limit:
+            donor = rng.randrange(self.donors)
+            gift = rng.choices(gifts, weights)[0]
+            group_id += 1
+            donor_id = f"donador_{donor}"
+            username = f"Donador {donor}"
+            picture = f"https://p16-sign.tiktokcdn.com/avatar/{donor}.webp"
+            if gift.streakable:
+                length = rng.randint(1, self.max_combo)
+                counts = [(count, False) for count in range(1, length + 1)] + [(length, True)]
+            else:
+                counts = [(1, True)]
+            for count, end in counts:
+                if limit is not None and produced >= limit:
+                    return
+                yield produced * interval, GiftData(
+                    donor_id, username, picture, gift.gift_id, gift.name, gift.diamonds,
+                    gift.streakable, count, end, group_id
+                )
+                produced += 1
+
+
+def create_event_source(
+    kind: str,
+    record_path: Optional[str] = None,
+    speed: float = 1.0,
+    synthetic_rate: float = 50.0,
+    synthetic_donors: int = 2_000,
+    synthetic_gifts: str = DEFAULT_GIFT_MIX
+) -> EventSource:
+    """Crea la fuente configurada: "live", "record", "replay" o "synthetic" """
+    if kind == "live":
+        return TikTokLiveSource()
+    if kind == "record":
+        if not record_path:
+            raise ValueError("La fuente record necesita la ruta del fichero de grabación")
+        return RecordingSource(TikTokLiveSource(), record_path)
+    if kind == "replay":
+        if not record_path:
+            raise ValueError("La fuente replay necesita la ruta del fichero de grabación")
+        return ReplaySource(record_path, speed=speed)
+    if kind == "synthetic":
+        return SyntheticSource(
+            rate=synthetic_rate,
+            speed=speed,
+            donors=synthetic_donors,
+            gifts=parse_gift_mix(synthetic_gifts)
+        )
+    raise ValueError(f"Fuente de eventos no soportada: {kind}")
@@ -0,0 +1,125 @@
+"""
+Rachas (combos) de regalos de TikTok Live
+TikTok envía un GiftEvent por cada repetición de un regalo streakable, con el
+contador acumulado (repeat_count), y uno final con repeat_end. Este módulo los
+agrupa para registrar una sola donación por combo completado.
+"""
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Tuple
+
+# Clave de una racha: (usuario, id de regalo, group_id del combo)
+StreakKey = Tuple[Hashable, int, int]
+
+
+class GiftStreak:
+    """Estado de un combo en curso (o recién cerrado)"""
+
+    __slots__ = ("key", "username", "gift_name", "unit_value", "profile_picture", "count", "last_seen", "ended")
+
+    def __init__(self, key: StreakKey, username: str, gift_name: str, unit_value: int, profile_picture: str, last_seen: float):
+        self.key = key
+        self.username = username
+        self.gift_name = gift_name
+        self.unit_value = unit_value
+        self.profile_picture = profile_picture
+        self.count = 0
+        self.last_seen = last_seen
+        self.ended = False
+
+    @property
+    def total(self) -> int:
+        """Coins del combo hasta ahora"""
+        return self.count * self.unit_value
+
+
+class GiftStreakTracker:
+    """
+    Máquina de estados de combos de un stream
+
+    - Un combo se abre con su primer evento, avanza con cada repeat_count mayor y se
+      cierra con repeat_end: solo entonces se emite la donación (count × valor unitario).
+    - Un combo sin evento final durante `timeout` segundos se cierra con el último
+      contador visto (los regalos sí se enviaron).
+    - Como mucho `max_open` combos abiertos: al superarlo se cierra el más antiguo.
+    - Se recuerdan los últimos `max_open` combos cerrados para ignorar cualquier evento
+      posterior (duplicado o tardío): un repeat_end que llega mucho después del cierre
+      por inactividad no abre otro combo ni se cuenta dos veces.
+
+    Los combos abiertos están en un OrderedDict ordenado por última actividad, así que
+    expirar es O(combos vencidos).
+    """
+
+    def __init__(self, timeout: float = 10.0, max_open: int = 10_000):
+        self.timeout = timeout
+        self.max_open = max_open
+        self._open: "OrderedDict[StreakKey, GiftStreak]" = OrderedDict()
+        self._closed: "OrderedDict[StreakKey, None]" = OrderedDict()
+        self._evicted: List[GiftStreak] = []
+
+    def __len__(self) -> int:
+        return len(self._open)
+
+    def observe(
+        self,
+        key: StreakKey,
+        repeat_count: int,
+        ended: bool,
+        now: float,
+        username: str,
+        gift_name: str,
+        unit_value: int,
+        profile_picture: str
+    ) -> Optional[GiftStreak]:
+        """
+        Procesa un evento de un regalo streakable
+
+        Returns:
+            El combo actualizado (con `ended` si se cerró), o None si el evento no
+            aporta nada (combo ya cerrado o contador repetido)
+        """
+        if key in self._closed:
+            return None
+        streak = self._open.get(key)
+        if streak is None:
+            streak = GiftStreak(key, username, gift_name, unit_value, profile_picture, now)
+            self._open[key] = streak
+            if len(self._open) > self.max_open:
+                self._evicted.append(self._close(next(iter(self._open)), now))
+        else:
+            self._open.move_to_end(key)
+            streak.last_seen = now
+        if repeat_count <= streak.count and not ended:
+            return None
+        streak.count = max(streak.count, repeat_count)
+        if ended:
+            self._close(key, now)
+        return streak
+
+    def expire(self, now: float) -> List[GiftStreak]:
+        """Cierra los combos sin actividad durante `timeout` y los desalojados por capacidad"""
+        expired, self._evicted = self._evicted, []
+        deadline = now - self.timeout
+        while self._open:
+            key, streak = next(iter(self._open.items()))
+            if streak.last_seen > deadline:
+                break
+            expired.append(self._close(key, now))
+        return expired
+
+    def drain(self, now: float) -> List[GiftStreak]:
+        """Cierra todos los combos abiertos (p. ej. al cerrar la conexión con el stream)"""
+        drained, self._evicted = self._evicted, []
+        drained.extend(self._close(key, now) for key in list(self._open))
+        return drained
+
+    def open_streaks(self) -> List[GiftStreak]:
+        """Combos abiertos, sin cerrarlos"""
+        return list(self._open.values())
+
+    def _close(self, key: StreakKey, now: float) -> GiftStreak:
+        streak = self._open.pop(key)
+        streak.ended = True
+        self._closed[key] = None
+        if len(self._closed) > self.max_open:
+            self._closed.popitem(last=False)
+        return streak
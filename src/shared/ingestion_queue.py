@@ -0,0 +1,146 @@
+"""
+Cola acotada de ingesta con consumidor por micro-lotes
+Desacopla a quien recibe eventos (p. ej. el conector de TikTok Live) de quien los
+aplica: el productor solo encola y un consumidor los procesa por lotes.
+"""
+from typing import Any, Callable, Deque, List, Optional, Tuple
+from collections import deque
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionQueue:
+    """
+    Cola acotada de eventos con un consumidor que los aplica en micro-lotes
+
+    - `offer` no bloquea: encola el evento o devuelve False si la cola está llena
+      (el productor decide qué hacer con el excedente).
+    - El consumidor toma hasta `batch_size` eventos; si el lote no se llena, espera
+      `linger` segundos a que lleguen más antes de aplicarlo.
+    - `handler(batch)` recibe la lista de eventos del lote y es síncrono: se ejecuta
+      en el event loop sin ceder el control a mitad de lote.
+    - `drain` aplica en el momento, en orden de llegada, el lote en espera y todo lo
+      encolado (antes de un cambio de estado que dejaría de aceptar esos eventos).
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], None],
+        maxsize: int = 10_000,
+        batch_size: int = 256,
+        linger: float = 0.005
+    ):
+        self._handler = handler
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.linger = linger
+        self._queue: "asyncio.Queue[Tuple[float, Any]]" = asyncio.Queue(maxsize)
+        self._task: Optional[asyncio.Task] = None
+        # Lote que el consumidor ya sacó de la cola y aún no aplicó (durante el linger)
+        self._inflight: List[Tuple[float, Any]] = []
+        # Contadores de presión
+        self.enqueued = 0
+        self.rejected = 0
+        self.processed = 0
+        self.batches = 0
+        self.high_water = 0
+        self.max_lag = 0.0
+        self._recent_sizes: Deque[int] = deque(maxlen=64)
+
+    def offer(self, item: Any) -> bool:
+        """Encola un evento sin bloquear; False si la cola está llena"""
+        loop = asyncio.get_running_loop()
+        try:
+            self._queue.put_nowait((loop.time(), item))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self.enqueued += 1
+        depth = self._queue.qsize()
+        if depth > self.high_water:
+            self.high_water = depth
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._consume())
+        return True
+
+    async def stop(self) -> None:
+        """Aplica lo que quede en la cola y detiene el consumidor"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.drain()
+
+    def drain(self) -> int:
+        """Aplica ya, sin esperar al consumidor, el lote en espera y todo lo encolado"""
+        drained = len(self._inflight) + self._queue.qsize()
+        self._apply(self._release())
+        while not self._queue.empty():
+            self._apply(self._take(self.batch_size))
+        return drained
+
+    def stats(self) -> dict:
+        """Profundidad, marca de agua y contadores de la cola"""
+        recent = self._recent_sizes
+        return {
+            "depth": self._queue.qsize(),
+            "maxSize": self.maxsize,
+            "highWater": self.high_water,
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "processed": self.processed,
+            "batches": self.batches,
+            "avgBatchSize": round(sum(recent) / len(recent), 1) if recent else 0,
+            "maxLagMs": round(self.max_lag * 1000, 2),
+            "batchSize": self.batch_size,
+            "lingerMs": round(self.linger * 1000, 2)
+        }
+
+    def _take(self, limit: int) -> List[Tuple[float, Any]]:
+        """Saca de la cola hasta `limit` eventos sin esperar"""
+        batch = []
+        queue = self._queue
+        while len(batch) < limit and not queue.empty():
+            batch.append(queue.get_nowait())
+        return batch
+
+    def _release(self) -> List[Tuple[float, Any]]:
+        batch, self._inflight = self._inflight, []
+        return batch
+
+    def _apply(self, batch: List[Tuple[float, Any]]) -> None:
+        if not batch:
+            return
+        # Espera del evento más antiguo del lote (desde que se encoló)
+        lag = asyncio.get_running_loop().time() - batch[0][0]
+        if lag > self.max_lag:
+            self.max_lag = lag
+        self.batches += 1
+        self.processed += len(batch)
+        self._recent_sizes.append(len(batch))
+        try:
+            self._handler([item for _, item in batch])
+        except Exception as e:
+            logger.exception("❌ Error aplicando un lote de %s eventos: %s", len(batch), e)
+
+    async def _consume(self) -> None:
+        queue = self._queue
+        while True:
+            self._inflight = [await queue.get()]
+            self._inflight.extend(self._take(self.batch_size - 1))
+            if len(self._inflight) < self.batch_size and self.linger > 0:
+                # Lote incompleto: dar margen a que llegue el resto de la ráfaga
+                try:
+                    await asyncio.sleep(self.linger)
+                except asyncio.CancelledError:
+                    # No perder lo ya sacado de la cola si se detiene a mitad de espera
+                    self._apply(self._release())
+                    raise
+                # Si entretanto hubo un drain, el lote en espera ya se aplicó y está vacío
+                self._inflight.extend(self._take(self.batch_size - len(self._inflight)))
+            self._apply(self._release())
@@ -0,0 +1,56 @@
+"""
+Buffer circular de reenvío por subasta
+Guarda los últimos frames numerados para que un cliente que se reconecta
+reciba solo lo que se perdió en lugar de un estado completo
+"""
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+import secrets
+
+
+class ReplayBuffer:
+    """
+    Últimos `capacity` mensajes de una subasta con su número de secuencia
+
+    `epoch` identifica la historia de secuencias: cambia si la secuencia se reinicia
+    (p. ej. el worker que publica se reinició), de modo que un `since` de otra
+    historia nunca se interpreta contra esta.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.epoch = secrets.token_hex(4)
+        self.last_seq = 0
+        self._frames: Deque[Tuple[int, dict]] = deque(maxlen=capacity)
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def append(self, seq: int, message: dict) -> None:
+        """Registra un mensaje ya numerado"""
+        if seq <= self.last_seq:
+            # La secuencia se reinició: empieza una historia nueva
+            self.epoch = secrets.token_hex(4)
+            self._frames.clear()
+        elif self.last_seq and seq != self.last_seq + 1:
+            # Faltan mensajes intermedios: lo anterior ya no sirve para reenviar sin huecos
+            self._frames.clear()
+        self._frames.append((seq, message))
+        self.last_seq = seq
+
+    def since(self, seq: int, epoch: Optional[str] = None) -> Optional[List[dict]]:
+        """
+        Mensajes posteriores a `seq`
+
+        Returns:
+            La lista (vacía si el cliente está al día) o None si el hueco ya no está
+            en el buffer y hace falta un snapshot completo
+        """
+        if epoch != self.epoch or seq <= 0 or seq > self.last_seq:
+            return None
+        if seq == self.last_seq:
+            return []
+        if not self._frames or seq < self._frames[0][0] - 1:
+            return None
+        start = seq - self._frames[0][0] + 1
+        return [message for _, message in list(self._frames)[start:]]
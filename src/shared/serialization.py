@@ -0,0 +1,154 @@
+"""
+Serialización de mensajes en tiempo real
+Usa orjson si está instalado y, si no, el módulo json estándar.
+Los clientes pueden optar por MessagePack binario negociándolo como subprotocolo WebSocket.
+"""
+import json
+import struct
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack es opcional: hay un codificador propio de respaldo
+    msgpack = None
+
+
+# Codecs de frame
+JSON_CODEC = "json"
+MSGPACK_CODEC = "msgpack"
+
+# Subprotocolos WebSocket (Sec-WebSocket-Protocol) -> codec
+SUBPROTOCOLS = {
+    "tiktokcraft.json": JSON_CODEC,
+    "tiktokcraft.msgpack": MSGPACK_CODEC,
+}
+
+
+def encode_json(message: dict) -> str:
+    """Serializa un mensaje a texto JSON compacto (una sola vez por broadcast)"""
+    if orjson is not None:
+        return orjson.dumps(message).decode("utf-8")
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+def decode_json(data) -> dict:
+    """Deserializa texto o bytes JSON"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def encode_msgpack(message: dict) -> bytes:
+    """Serializa un mensaje a MessagePack (frame binario)"""
+    if msgpack is not None:
+        return msgpack.packb(message, use_bin_type=True)
+    out = bytearray()
+    _pack(message, out)
+    return bytes(out)
+
+
+def encode(message: dict, codec: str = JSON_CODEC):
+    """Serializa un mensaje con el codec indicado: str para JSON, bytes para MessagePack"""
+    if codec == MSGPACK_CODEC:
+        return encode_msgpack(message)
+    return encode_json(message)
+
+
+def negotiate_subprotocol(requested) -> tuple:
+    """
+    Elige el primer subprotocolo soportado de los pedidos por el cliente
+
+    Returns:
+        (subprotocolo aceptado o None, codec)
+    """
+    for subprotocol in requested or []:
+        codec = SUBPROTOCOLS.get(subprotocol)
+        if codec:
+            return subprotocol, codec
+    return None, JSON_CODEC
+
+
+def _pack(obj, out: bytearray) -> None:
+    """Codificador MessagePack mínimo para los tipos que usan los mensajes"""
+    if obj is None:
+        out.append(0xc0)
+    elif obj is True:
+        out.append(0xc3)
+    elif obj is False:
+        out.append(0xc2)
+    elif isinstance(obj, str):
+        data = obj.encode("utf-8")
+        size = len(data)
+        if size < 32:
+            out.append(0xa0 | size)
+        elif size <= 0xff:
+            out += struct.pack(">BB", 0xd9, size)
+        elif size <= 0xffff:
+            out += struct.pack(">BH", 0xda, size)
+        else:
+            out += struct.pack(">BI", 0xdb, size)
+        out += data
+    elif isinstance(obj, int):
+        _pack_int(obj, out)
+    elif isinstance(obj, float):
+        out += struct.pack(">Bd", 0xcb, obj)
+    elif isinstance(obj, dict):
+        size = len(obj)
+        if size < 16:
+            out.append(0x80 | size)
+        elif size <= 0xffff:
+            out += struct.pack(">BH", 0xde, size)
+        else:
+            out += struct.pack(">BI", 0xdf, size)
+        for key, value in obj.items():
+            _pack(key, out)
+            _pack(value, out)
+    elif isinstance(obj, (list, tuple)):
+        size = len(obj)
+        if size < 16:
+            out.append(0x90 | size)
+        elif size <= 0xffff:
+            out += struct.pack(">BH", 0xdc, size)
+        else:
+            out += struct.pack(">BI", 0xdd, size)
+        for item in obj:
+            _pack(item, out)
+    elif isinstance(obj, (bytes, bytearray)):
+        size = len(obj)
+        if size <= 0xff:
+            out += struct.pack(">BB", 0xc4, size)
+        elif size <= 0xffff:
+            out += struct.pack(">BH", 0xc5, size)
+        else:
+            out += struct.pack(">BI", 0xc6, size)
+        out += obj
+    else:
+        raise TypeError(f"Tipo no serializable a MessagePack: {type(obj).__name__}")
+
+
+def _pack_int(value: int, out: bytearray) -> None:
+    if 0 <= value < 0x80:
+        out.append(value)
+    elif -32 <= value < 0:
+        out.append(value & 0xff)
+    elif value >= 0:
+        if value <= 0xff:
+            out += struct.pack(">BB", 0xcc, value)
+        elif value <= 0xffff:
+            out += struct.pack(">BH", 0xcd, value)
+        elif value <= 0xffffffff:
+            out += struct.pack(">BI", 0xce, value)
+        else:
+            out += struct.pack(">BQ", 0xcf, value)
+    elif value >= -0x80:
+        out += struct.pack(">Bb", 0xd0, value)
+    elif value >= -0x8000:
+        out += struct.pack(">Bh", 0xd1, value)
+    elif value >= -0x80000000:
+        out += struct.pack(">Bi", 0xd2, value)
+    else:
+        out += struct.pack(">Bq", 0xd3, value)
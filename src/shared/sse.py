@@ -0,0 +1,111 @@
+"""
+Server-Sent Events para overlays que solo reciben
+Cada subasta con suscriptores SSE tiene un stream compartido de frames ya codificados:
+un broadcast se codifica una vez y todos los suscriptores leen los mismos bytes
+"""
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+import asyncio
+
+from .serialization import encode_json
+
+
+def encode_sse(message: dict, epoch: Optional[str] = None) -> bytes:
+    """
+    Codifica un mensaje como evento SSE
+
+    El `id` es "<epoch>-<seq>": el navegador lo devuelve en Last-Event-ID al reconectar.
+    """
+    lines = []
+    if epoch and "seq" in message:
+        lines.append(f"id: {epoch}-{message['seq']}\n")
+    lines.append(f"data: {encode_json(message)}\n\n")
+    return "".join(lines).encode("utf-8")
+
+
+def parse_event_id(event_id: Optional[str]) -> Tuple[Optional[str], int]:
+    """Separa un Last-Event-ID "<epoch>-<seq>" en (epoch, seq); (None, 0) si no es válido"""
+    if not event_id:
+        return None, 0
+    epoch, _, seq = event_id.rpartition("-")
+    try:
+        return epoch or None, int(seq)
+    except ValueError:
+        return None, 0
+
+
+class SseStream:
+    """Frames SSE recientes de una subasta, compartidos por todos sus suscriptores"""
+
+    def __init__(self, capacity: int = 256):
+        self._frames: Deque[Tuple[int, bytes]] = deque(maxlen=capacity)
+        self.last_seq = 0
+        self.subscribers = 0
+        self._event = asyncio.Event()
+
+    def append(self, seq: int, frame: bytes) -> None:
+        """Añade un frame y despierta a los suscriptores que esperan"""
+        if seq <= self.last_seq:
+            # La secuencia se reinició: los frames anteriores son de otra historia
+            self._frames.clear()
+        self._frames.append((seq, frame))
+        self.last_seq = seq
+        self._event.set()
+        self._event = asyncio.Event()
+
+    async def wait_after(self, cursor: int, timeout: float) -> Optional[List[Tuple[int, bytes]]]:
+        """
+        Frames posteriores a `cursor`, esperando hasta `timeout` segundos si no hay ninguno
+
+        Returns:
+            Los frames (lista vacía si venció el timeout) o None si el suscriptor se quedó
+            tan atrás que sus frames ya salieron del stream
+        """
+        if self.last_seq <= cursor:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        if cursor > self.last_seq:
+            # La secuencia se reinició en el servidor
+            return None
+        if self._frames and cursor < self._frames[0][0] - 1:
+            return None
+        return [(seq, frame) for seq, frame in self._frames if seq > cursor]
+
+
+class SseBroadcaster:
+    """Registro de streams SSE por subasta (solo existen mientras haya suscriptores)"""
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self._streams: Dict[str, SseStream] = {}
+        self.subscriber_count = 0
+
+    def subscribe(self, auction_id: str) -> SseStream:
+        stream = self._streams.get(auction_id)
+        if stream is None:
+            stream = self._streams[auction_id] = SseStream(self.capacity)
+        stream.subscribers += 1
+        self.subscriber_count += 1
+        return stream
+
+    def unsubscribe(self, auction_id: str) -> None:
+        stream = self._streams.get(auction_id)
+        if stream is None:
+            return
+        stream.subscribers -= 1
+        self.subscriber_count -= 1
+        if stream.subscribers <= 0:
+            del self._streams[auction_id]
+
+    def publish(self, auction_id: str, message: dict, epoch: Optional[str] = None) -> None:
+        """Codifica el mensaje una sola vez si la subasta tiene suscriptores SSE"""
+        stream = self._streams.get(auction_id)
+        if stream is None or "seq" not in message:
+            return
+        stream.append(message["seq"], encode_sse(message, epoch))
+
+    def get_subscribers_count(self, auction_id: str) -> int:
+        stream = self._streams.get(auction_id)
+        return stream.subscribers if stream else 0
@@ -0,0 +1,181 @@
+"""
+Logging no bloqueante y estructurado
+Los registros se encolan con un QueueHandler y un hilo (QueueListener) los formatea
+y escribe: el event loop no hace I/O ni serializa JSON al loguear.
+Los eventos del camino caliente (regalos, donaciones) se registran como una línea JSON
+y se pueden muestrear por categoría bajo carga.
+"""
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from typing import Dict, List, Optional
+
+from .serialization import encode_json
+
+# Formatos de salida
+TEXT_FORMAT = "text"
+JSON_FORMAT = "json"
+
+_TEXT_PATTERN = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+class StructuredMessage:
+    """Mensaje de un evento estructurado; el JSON se genera al formatear, en el hilo del listener"""
+
+    __slots__ = ("event", "fields")
+
+    def __init__(self, event: str, fields: dict):
+        self.event = event
+        self.fields = fields
+
+    def to_dict(self) -> dict:
+        return {"event": self.event, **self.fields}
+
+    def __str__(self) -> str:
+        return encode_json(self.to_dict())
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro; los eventos estructurados aportan sus campos"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        message = record.msg
+        if isinstance(message, StructuredMessage) and not record.args:
+            entry.update(message.to_dict())
+        else:
+            entry["message"] = record.getMessage()
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return encode_json(entry)
+
+
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler para una cola en el mismo proceso
+
+    El QueueHandler estándar formatea el mensaje antes de encolarlo (para poder
+    serializarlo entre procesos). Aquí el registro se encola tal cual y el formateo
+    ocurre en el hilo del listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Handler de salida que usa el listener (distinguible de los handlers ajenos)"""
+
+
+class LogSampler:
+    """
+    Muestreo por categoría
+
+    Con `rates = {"gift": 100}`, en cada segundo se registran los primeros `burst`
+    eventos de la categoría y, a partir de ahí, 1 de cada 100. Las categorías sin
+    tasa se registran siempre.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, int]] = None, burst: int = 10):
+        self.rates = dict(rates or {})
+        self.burst = burst
+        self._windows: Dict[str, List[int]] = {}
+
+    def allow(self, category: str) -> int:
+        """
+        Indica si registrar el evento
+
+        Returns:
+            0 si se descarta; si no, la tasa de muestreo aplicada (1 = sin muestreo)
+        """
+        rate = self.rates.get(category, 1)
+        if rate <= 1:
+            return 1
+        second = int(time.monotonic())
+        window = self._windows.get(category)
+        if window is None or window[0] != second:
+            window = self._windows[category] = [second, 0]
+        window[1] += 1
+        over = window[1] - self.burst
+        if over <= 0:
+            return 1
+        return rate if over % rate == 0 else 0
+
+
+def parse_sampling(spec: str) -> Dict[str, int]:
+    """Convierte "gift=100,donation=10" en {"gift": 100, "donation": 10}"""
+    rates = {}
+    for part in spec.split(","):
+        if "=" not in part:
+            continue
+        category, rate = part.split("=", 1)
+        rates[category.strip()] = max(1, int(rate))
+    return rates
+
+
+sampler = LogSampler()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(level: str = "info", fmt: str = TEXT_FORMAT, sampling: str = "", burst: int = 10) -> None:
+    """
+    Configura el logger raíz con un QueueHandler y arranca el hilo escritor (idempotente)
+
+    Args:
+        level: Nivel mínimo (debug, info, warning...)
+        fmt: "text" o "json" (un objeto JSON por línea)
+        sampling: Tasas de muestreo por categoría, p. ej. "gift=100,donation=100"
+        burst: Eventos por segundo y categoría que se registran antes de muestrear
+    """
+    global _listener
+    if fmt not in (TEXT_FORMAT, JSON_FORMAT):
+        raise ValueError(f"Formato de log no soportado: {fmt}")
+    sampler.rates = parse_sampling(sampling)
+    sampler.burst = burst
+
+    stream = _StdoutHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if fmt == JSON_FORMAT else logging.Formatter(_TEXT_PATTERN))
+    if _listener is not None:
+        _listener.stop()
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(records, stream, respect_handler_level=False)
+
+    root = logging.getLogger()
+    root.handlers = [h for h in root.handlers if not isinstance(h, (_LocalQueueHandler, _StdoutHandler))]
+    root.addHandler(_LocalQueueHandler(records))
+    root.setLevel(level.upper())
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Vacía la cola, detiene el hilo escritor y deja la escritura directa para lo que quede del apagado"""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    root = logging.getLogger()
+    root.handlers = [h for h in root.handlers if not isinstance(h, _LocalQueueHandler)]
+    root.handlers.extend(_listener.handlers)
+    _listener = None
+
+
+def log_event(logger: logging.Logger, category: str, event: str, level: int = logging.INFO, **fields) -> None:
+    """
+    Registra un evento estructurado (una línea JSON) si el nivel está activo y el muestreo lo deja pasar
+
+    Si el evento se muestreó, incluye "sampled": N (representa ~N eventos).
+    """
+    if not logger.isEnabledFor(level):
+        return
+    rate = sampler.allow(category)
+    if not rate:
+        return
+    if rate > 1:
+        fields["sampled"] = rate
+    logger.log(level, StructuredMessage(event, fields))
@@ -2,253 +2,376 @@
 Adaptador compartido para conectar con TikTok Live
 Captura eventos de donaciones en tiempo real
 """
-from TikTokLive import TikTokLiveClient
-from TikTokLive.events import ConnectEvent, GiftEvent, DisconnectEvent
-from typing import Callable, Optional, Dict
+from typing import Callable, Optional, Dict, List, Set
 import asyncio
 import logging
+import random
+import time
+
+from .event_sources import EventSource, GiftData, TikTokLiveSource
+from .gift_streaks import GiftStreak, GiftStreakTracker
+from .structured_logging import log_event
 
 logger = logging.getLogger(__name__)
 
 
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """
+    Espera antes del reintento `attempt` (0, 1, 2...): exponencial con jitter
+
+    Se usa la mitad del tope fija y la otra mitad aleatoria, para que varias sesiones
+    caídas a la vez no reintenten en el mismo instante sin llegar a reintentar en 0 s.
+    """
+    cap = min(maximum, base * (2 ** attempt))
+    return cap / 2 + random.uniform(0, cap / 2)
+
+
+class UpstreamClient:
+    """
+    Conexión única con el stream de un streamer, compartida por todas sus sesiones
+
+    Cada regalo pasa por la máquina de combos una sola vez; las donaciones
+    resultantes se reparten a las sesiones registradas.
+    """
+
+    def __init__(self, unique_id: str, streaks: GiftStreakTracker):
+        self.unique_id = unique_id
+        self.sessions: Set[str] = set()
+        self.streaks = streaks
+        self.task: Optional[asyncio.Task] = None
+        self.connected = False
+        self.attempts = 0
+        # Fallos seguidos desde la última conexión exitosa (exponente del backoff)
+        self.failures = 0
+        self.reconnects = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "uniqueId": self.unique_id,
+            "sessions": len(self.sessions),
+            "connected": self.connected,
+            "attempts": self.attempts,
+            "reconnects": self.reconnects,
+            "openStreaks": len(self.streaks)
+        }
+
+
 class TikTokLiveConnector:
     """
     Conector compartido para TikTok Live que captura eventos de donaciones
     Puede ser utilizado por múltiples módulos del sistema
+
+    Mantiene un cliente por streamer (unique_id) aunque varias sesiones lo escuchen:
+    las sesiones se cuentan por referencia y la última en desconectarse cierra la
+    conexión. Un supervisor por streamer reconecta con backoff exponencial y jitter
+    si la conexión falla o se cae.
+
+    Los eventos llegan de una fuente intercambiable (ver event_sources): el cliente
+    real de TikTokLive, una grabación o un generador sintético para pruebas de carga.
     """
-    
-    def __init__(self):
-        self.clients: Dict[str, TikTokLiveClient] = {}
+
+    def __init__(
+        self,
+        streak_timeout: float = 10.0,
+        max_open_streaks: int = 10_000,
+        reconnect_base: float = 2.0,
+        reconnect_max: float = 120.0,
+        source: Optional[EventSource] = None
+    ):
+        # Conexiones por streamer y streamer de cada sesión
+        self.upstreams: Dict[str, UpstreamClient] = {}
+        self.session_streamers: Dict[str, str] = {}
         self.donation_callbacks: Dict[str, Callable] = {}
-        
+        # Callbacks opcionales de "combo en curso" por sesión
+        self.combo_callbacks: Dict[str, Callable] = {}
+        self.streak_timeout = streak_timeout
+        self.max_open_streaks = max_open_streaks
+        self.reconnect_base = reconnect_base
+        self.reconnect_max = reconnect_max
+        self.source = source or TikTokLiveSource()
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def configure(
+        self,
+        streak_timeout: Optional[float] = None,
+        max_open_streaks: Optional[int] = None,
+        reconnect_base: Optional[float] = None,
+        reconnect_max: Optional[float] = None
+    ) -> None:
+        """Ajusta combos y reconexión (antes de conectar sesiones)"""
+        if streak_timeout is not None:
+            self.streak_timeout = streak_timeout
+        if max_open_streaks is not None:
+            self.max_open_streaks = max_open_streaks
+        if reconnect_base is not None:
+            self.reconnect_base = reconnect_base
+        if reconnect_max is not None:
+            self.reconnect_max = reconnect_max
+
+    def set_event_source(self, source: EventSource) -> None:
+        """Inyecta la fuente de eventos (antes de conectar sesiones)"""
+        self.source = source
+
     async def connect(
         self,
         username: str,
         session_id: str,
-        on_donation: Callable[[str, float, str, str], None]
+        on_donation: Callable[[str, float, str, str], None],
+        on_combo: Optional[Callable[[str, str, int, int, str], None]] = None
     ) -> bool:
         """
         Conecta al stream de TikTok Live de un usuario
-        
+
+        Si otra sesión ya escucha al mismo streamer, se reutiliza su conexión.
+
         Args:
             username: Nombre del streamer en TikTok (sin @)
             session_id: ID único de la sesión (ej: auction_id, event_id, etc.)
             on_donation: Callback que se ejecuta cuando hay una donación
                         Recibe (username, amount, gift_name, profile_picture_url)
-        
+                        Los regalos en combo se registran una vez, al completarse
+            on_combo: Callback opcional con cada avance de un combo en curso
+                      Recibe (username, gift_name, count, total, profile_picture_url)
+
         Returns:
-            True si la conexión fue exitosa, False en caso contrario
+            True si la sesión quedó registrada (la conexión se establece en segundo plano)
         """
         try:
-            # Limpiar el username (quitar @ si está presente)
-            clean_username = username.lstrip('@')
-            
-            # Crear cliente de TikTok Live
-            client = TikTokLiveClient(unique_id=f"@{clean_username}")
-            
-            # Registrar callback de donación
-            self.donation_callbacks[session_id] = on_donation
-            
-            # Handler para eventos de regalo (donaciones)
-            @client.on(GiftEvent)
-            async def on_gift(event: GiftEvent):
-                try:
-                    # Obtener información del regalo y usuario
-                    gift = event.gift
-                    user = event.user
-                    
-                    # Obtener atributos del regalo de forma segura
-                    gift_name = getattr(gift, 'name', 'Regalo desconocido')
-                    gift_id = getattr(gift, 'id', 0)
-                    
-                    # Obtener el valor del regalo (diamond_count puede estar en diferentes lugares)
-                    diamond_count = getattr(gift, 'diamond_count', 0)
-                    if diamond_count == 0:
-                        diamond_count = getattr(gift, 'diamonds', 0)
-                    if diamond_count == 0:
-                        diamond_count = getattr(gift, 'value', 1)
-                    
-                    # Obtener la cantidad de regalos enviados
-                    count = getattr(event, 'count', 1)
-                    if count == 0:
-                        count = getattr(gift, 'count', 1)
-                    
-                    # Calcular el valor total en coins
-                    total_value = count * diamond_count
-                    
-                    # Log detallado del cálculo
-                    logger.info(f"💎 DONACIÓN RECIBIDA:")
-                    logger.info(f"   Regalo: {gift_name} (ID: {gift_id})")
-                    logger.info(f"   Valor unitario: {diamond_count} diamonds")
-                    logger.info(f"   Cantidad: {count}")
-                    logger.info(f"   Total calculado: {total_value} coins ({count} × {diamond_count})")
-                    
-                    # Obtener nickname del usuario
-                    username = getattr(user, 'nickname', 'Usuario desconocido')
-                    unique_id = getattr(user, 'unique_id', '')
-                    if not username or username == 'Usuario desconocido':
-                        username = unique_id if unique_id else 'Usuario desconocido'
-                    
-                    # Obtener foto de perfil del usuario
-                    # En TikTokLive Python, los objetos ImageModel usan m_urls (no url_list como en TypeScript)
-                    profile_picture = ''
-                    
-                    # Intentar extraer desde avatar_thumb (prioridad 1)
-                    try:
-                        if hasattr(user, 'avatar_thumb') and user.avatar_thumb:
-                            avatar = user.avatar_thumb
-                            
-                            # ImageModel usa m_urls en lugar de url_list
-                            if hasattr(avatar, 'm_urls') and avatar.m_urls:
-                                urls = avatar.m_urls
-                                if urls and len(urls) > 0:
-                                    profile_picture = str(urls[0])
-                                    logger.info(f"✅ Avatar extraído de avatar_thumb: {profile_picture[:80]}...")
-                    except Exception as e:
-                        logger.error(f"❌ Error extrayendo avatar_thumb: {e}")
-                    
-                    # Intentar extraer desde avatar_medium (prioridad 2)
-                    if not profile_picture:
-                        try:
-                            if hasattr(user, 'avatar_medium') and user.avatar_medium:
-                                avatar = user.avatar_medium
-                                if hasattr(avatar, 'm_urls') and avatar.m_urls:
-                                    profile_picture = str(avatar.m_urls[0])
-                                    logger.info(f"✅ Avatar extraído de avatar_medium: {profile_picture[:80]}...")
-                        except Exception as e:
-                            logger.error(f"❌ Error extrayendo avatar_medium: {e}")
-                    
-                    # Intentar extraer desde avatar_large (prioridad 3)
-                    if not profile_picture:
-                        try:
-                            if hasattr(user, 'avatar_large') and user.avatar_large:
-                                avatar = user.avatar_large
-                                if hasattr(avatar, 'm_urls') and avatar.m_urls:
-                                    profile_picture = str(avatar.m_urls[0])
-                                    logger.info(f"✅ Avatar extraído de avatar_large: {profile_picture[:80]}...")
-                        except Exception as e:
-                            logger.error(f"❌ Error extrayendo avatar_large: {e}")
-                    
-                    # Log de warning si no se pudo extraer
-                    if not profile_picture:
-                        logger.warning(f"⚠️ No se pudo extraer avatar para {username}")
-                        logger.warning(f"⚠️ Usando avatar generado automáticamente")
-                    
-                    logger.info(f"👤 Usuario: {username} (@{unique_id})")
-                    if profile_picture:
-                        logger.info(f"🖼️  Avatar: {profile_picture[:80]}...")
-                    
-                    # Ejecutar callback si hay valor
-                    if session_id in self.donation_callbacks and total_value > 0:
-                        logger.info(f"✅ Registrando {total_value} coins para {username}")
-                        self.donation_callbacks[session_id](
-                            username,
-                            float(total_value),
-                            gift_name,
-                            profile_picture
-                        )
-                    else:
-                        if total_value == 0:
-                            logger.warning(f"⚠️ Donación con valor 0 ignorada")
-                        if session_id not in self.donation_callbacks:
-                            logger.warning(f"⚠️ No hay callback registrado para sesión {session_id}")
-                            
-                except Exception as e:
-                    logger.error(f"Error procesando donación: {e}")
-                    # Imprimir más detalles para debugging
-                    try:
-                        logger.error(f"Tipo de evento: {type(event)}")
-                        logger.error(f"Atributos del evento: {dir(event)}")
-                        if hasattr(event, 'gift'):
-                            logger.error(f"Tipo de regalo: {type(event.gift)}")
-                            logger.error(f"Atributos del regalo: {dir(event.gift)}")
-                        if hasattr(event, 'user'):
-                            logger.error(f"Tipo de usuario: {type(event.user)}")
-                            logger.error(f"Atributos del usuario: {dir(event.user)}")
-                            # Intentar serializar el usuario completo
-                            if hasattr(event.user, '__dict__'):
-                                logger.error(f"Dict del usuario: {event.user.__dict__}")
-                    except Exception as debug_error:
-                        logger.error(f"Error en debugging: {debug_error}")
-            
-            # Handler para conexión exitosa
-            @client.on(ConnectEvent)
-            async def on_connect(event: ConnectEvent):
-                logger.info(f"✅ Conectado exitosamente al stream de @{clean_username}")
-            
-            # Handler para desconexión
-            @client.on(DisconnectEvent)
-            async def on_disconnect(event: DisconnectEvent):
-                logger.info(f"⚠️ Desconectado del stream de @{clean_username}")
-            
-            # Guardar cliente
-            self.clients[session_id] = client
-            
-            # Iniciar conexión en segundo plano (no bloqueante)
-            async def start_client():
-                try:
-                    logger.info(f"🔄 Intentando conectar con TikTok Live: @{clean_username}")
-                    await client.start()
-                except Exception as e:
-                    logger.error(f"❌ Error en la conexión con TikTok Live (@{clean_username}): {e}")
-                    logger.error(f"   Razones posibles:")
-                    logger.error(f"   - El usuario no está en transmisión en vivo")
-                    logger.error(f"   - El nombre de usuario es incorrecto")
-                    logger.error(f"   - Problemas de red o timeout")
-                    logger.error(f"   - Restricciones de privacidad del streamer")
-                    # Limpiar cliente fallido
-                    if session_id in self.clients:
-                        del self.clients[session_id]
-                    if session_id in self.donation_callbacks:
-                        del self.donation_callbacks[session_id]
-            
-            asyncio.create_task(start_client())
-            
-            logger.info(f"📡 Conexión iniciada con @{clean_username} (sesión: {session_id[:8]}...)")
+            upstream = self.attach(username, session_id, on_donation, on_combo)
+            if upstream.task is None or upstream.task.done():
+                upstream.task = asyncio.create_task(self._supervise(upstream))
+            self._start_sweeper()
+
+            logger.info(
+                f"📡 Sesión {session_id[:8]}... suscrita a @{upstream.unique_id} "
+                f"({len(upstream.sessions)} sesión(es) en esta conexión)"
+            )
             return True
-            
+
         except Exception as e:
             logger.error(f"❌ Error al inicializar conexión con TikTok Live: {e}")
             return False
-    
+
+    def attach(
+        self,
+        username: str,
+        session_id: str,
+        on_donation: Callable[[str, float, str, str], None],
+        on_combo: Optional[Callable[[str, str, int, int, str], None]] = None
+    ) -> UpstreamClient:
+        """Registra una sesión en la conexión de su streamer (sin arrancarla)"""
+        # Limpiar el username (quitar @ si está presente); TikTok no distingue mayúsculas
+        unique_id = username.lstrip('@').lower()
+        previous = self.session_streamers.get(session_id)
+        if previous is not None and previous != unique_id:
+            self._detach(session_id)
+
+        upstream = self.upstreams.get(unique_id)
+        if upstream is None:
+            upstream = self.upstreams[unique_id] = UpstreamClient(
+                unique_id, GiftStreakTracker(self.streak_timeout, self.max_open_streaks)
+            )
+        upstream.sessions.add(session_id)
+        self.session_streamers[session_id] = unique_id
+        self.donation_callbacks[session_id] = on_donation
+        if on_combo:
+            self.combo_callbacks[session_id] = on_combo
+        else:
+            self.combo_callbacks.pop(session_id, None)
+        return upstream
+
     async def disconnect(self, session_id: str) -> None:
         """
-        Desconecta del stream de TikTok Live
-        
+        Desconecta una sesión del stream de TikTok Live
+
+        La conexión con el streamer se cierra solo cuando se va su última sesión.
+
         Args:
             session_id: ID de la sesión asociada
         """
         try:
-            if session_id in self.clients:
-                client = self.clients[session_id]
-                await client.stop()
-                del self.clients[session_id]
-                
-            if session_id in self.donation_callbacks:
-                del self.donation_callbacks[session_id]
-                
+            upstream = self._detach(session_id)
+            if upstream is not None and not upstream.sessions:
+                await self._close_upstream(upstream)
             logger.info(f"Desconectado de TikTok Live para sesión {session_id}")
-            
+
         except Exception as e:
             logger.error(f"Error desconectando de TikTok Live: {e}")
-    
+
     async def disconnect_all(self) -> None:
         """Desconecta todos los streams activos"""
-        session_ids = list(self.clients.keys())
+        session_ids = list(self.session_streamers.keys())
         for session_id in session_ids:
             await self.disconnect(session_id)
-    
+        if self._sweeper:
+            self._sweeper.cancel()
+            self._sweeper = None
+        self.source.close()
+
+    def _detach(self, session_id: str) -> Optional[UpstreamClient]:
+        """Quita una sesión de su conexión; devuelve la conexión (que puede quedar sin sesiones)"""
+        unique_id = self.session_streamers.pop(session_id, None)
+        upstream = self.upstreams.get(unique_id) if unique_id else None
+        if upstream is not None:
+            # Los combos en curso cuentan para la sesión que se va con el último contador visto
+            for streak in upstream.streaks.open_streaks():
+                self._emit_to(session_id, streak.username, streak.total, streak.gift_name, streak.profile_picture, streak.count)
+            upstream.sessions.discard(session_id)
+        self.combo_callbacks.pop(session_id, None)
+        self.donation_callbacks.pop(session_id, None)
+        return upstream
+
+    async def _close_upstream(self, upstream: UpstreamClient) -> None:
+        """Detiene el supervisor y cierra la conexión de un streamer sin sesiones"""
+        if self.upstreams.get(upstream.unique_id) is upstream:
+            del self.upstreams[upstream.unique_id]
+        task, upstream.task = upstream.task, None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        logger.info(f"🔌 Conexión con @{upstream.unique_id} cerrada (sin sesiones)")
+
+    async def _supervise(self, upstream: UpstreamClient) -> None:
+        """
+        Mantiene la conexión con un streamer mientras tenga sesiones
+
+        Si la conexión falla o se cae, espera con backoff exponencial y jitter y vuelve
+        a conectar; el backoff se reinicia tras cada conexión exitosa.
+        """
+        while upstream.sessions:
+            upstream.attempts += 1
+            try:
+                logger.info(f"🔄 Intentando conectar con TikTok Live: @{upstream.unique_id} ({self.source.name})")
+                await self.source.run(
+                    upstream.unique_id,
+                    lambda gift: self._handle_gift(upstream.unique_id, gift),
+                    lambda: self._on_connected(upstream)
+                )
+                logger.warning(f"⚠️ El stream de @{upstream.unique_id} cerró la conexión")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Error en la conexión con TikTok Live (@{upstream.unique_id}): {e}")
+                logger.error(f"   Razones posibles: no está en vivo, usuario incorrecto, red o privacidad")
+            finally:
+                upstream.connected = False
+            if not upstream.sessions:
+                break
+            delay = backoff_delay(upstream.failures, self.reconnect_base, self.reconnect_max)
+            upstream.failures += 1
+            upstream.reconnects += 1
+            logger.info(f"⏳ Reintentando @{upstream.unique_id} en {delay:.1f}s (intento {upstream.failures})")
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _on_connected(upstream: UpstreamClient) -> None:
+        """La fuente conectó: el backoff vuelve a empezar desde el intento 0"""
+        upstream.connected = True
+        upstream.failures = 0
+
+    def _handle_gift(self, unique_id: str, gift: GiftData) -> None:
+        """
+        Procesa un regalo del stream de `unique_id`
+
+        Los regalos no streakable se registran al momento. Los streakable pasan por la
+        máquina de combos del stream: los eventos intermedios solo avanzan el contador
+        (y emiten, si se pidió, un aviso de combo en curso) y el final registra la donación
+        en todas las sesiones del streamer.
+        """
+        upstream = self.upstreams.get(unique_id)
+        if upstream is None:
+            return
+        username = gift.username
+        profile_picture = gift.profile_picture
+
+        if not gift.streakable:
+            self._emit(upstream, username, gift.repeat_count * gift.unit_value, gift.gift_name, profile_picture)
+            return
+
+        key = (gift.donor_id or username, gift.gift_id, gift.group_id)
+        now = time.monotonic()
+        streaks = upstream.streaks
+        streak = streaks.observe(
+            key, gift.repeat_count, gift.repeat_end, now,
+            username, gift.gift_name, gift.unit_value, profile_picture
+        )
+        if streak is not None:
+            if streak.ended:
+                self._emit_donation(upstream, streak)
+            else:
+                for session_id in upstream.sessions:
+                    on_combo = self.combo_callbacks.get(session_id)
+                    if on_combo:
+                        on_combo(username, gift.gift_name, streak.count, streak.total, profile_picture)
+        for expired in streaks.expire(now):
+            self._emit_donation(upstream, expired)
+
+    def _emit_donation(self, upstream: UpstreamClient, streak: GiftStreak) -> None:
+        """Registra un combo cerrado como una donación"""
+        self._emit(upstream, streak.username, streak.total, streak.gift_name, streak.profile_picture, streak.count)
+
+    def _emit(self, upstream: UpstreamClient, username: str, total_value: int, gift_name: str, profile_picture: str, count: int = 1) -> None:
+        """Reparte una donación a todas las sesiones del streamer"""
+        if total_value <= 0:
+            logger.warning("⚠️ Donación con valor 0 ignorada")
+            return
+        # La línea por donación la escribe quien la registra; aquí solo en DEBUG y muestreada
+        log_event(
+            logger, "gift", "gift", logging.DEBUG,
+            streamer=upstream.unique_id, sessions=len(upstream.sessions),
+            username=username, gift=gift_name, count=count, amount=total_value
+        )
+        # Copia: un callback puede desconectar su sesión
+        for session_id in list(upstream.sessions):
+            self._emit_to(session_id, username, total_value, gift_name, profile_picture, count)
+
+    def _emit_to(self, session_id: str, username: str, total_value: int, gift_name: str, profile_picture: str, count: int = 1) -> None:
+        """Ejecuta el callback de donación de una sesión (un fallo no afecta a las demás)"""
+        callback = self.donation_callbacks.get(session_id)
+        if callback is None or total_value <= 0:
+            return
+        try:
+            callback(username, float(total_value), gift_name, profile_picture)
+        except Exception as e:
+            logger.error("❌ Error en el callback de donación de la sesión %s: %s", session_id, e)
+
+    def _start_sweeper(self) -> None:
+        """Arranca el cierre periódico de combos sin evento final (idempotente)"""
+        if self._sweeper and not self._sweeper.done():
+            return
+        self._sweeper = asyncio.create_task(self._sweep())
+
+    async def _sweep(self) -> None:
+        """Cierra los combos vencidos aunque el stream no reciba más regalos"""
+        while True:
+            await asyncio.sleep(min(1.0, self.streak_timeout))
+            now = time.monotonic()
+            for upstream in list(self.upstreams.values()):
+                try:
+                    for streak in upstream.streaks.expire(now):
+                        self._emit_donation(upstream, streak)
+                except Exception as e:
+                    logger.error(f"❌ Error cerrando combos de @{upstream.unique_id}: {e}")
+
     def is_connected(self, session_id: str) -> bool:
         """Verifica si hay una conexión activa para una sesión"""
-        return session_id in self.clients
-    
+        unique_id = self.session_streamers.get(session_id)
+        return unique_id is not None and self.upstreams[unique_id].connected
+
     def get_active_connections(self) -> int:
-        """Retorna el número de conexiones activas"""
-        return len(self.clients)
-    
+        """Retorna el número de conexiones activas con TikTok (una por streamer)"""
+        return sum(1 for upstream in self.upstreams.values() if upstream.connected)
+
     def get_connected_sessions(self) -> list[str]:
-        """Retorna la lista de sesiones conectadas"""
-        return list(self.clients.keys())
+        """Retorna la lista de sesiones registradas"""
+        return list(self.session_streamers.keys())
+
+    def get_stats(self) -> List[dict]:
+        """Estado de cada conexión por streamer (sesiones, reintentos, combos abiertos)"""
+        return [upstream.to_dict() for upstream in self.upstreams.values()]
 
 
 # Instancia global compartida del conector
@@ -0,0 +1,388 @@
+"""
+Clientes de TikTok Live en procesos aparte
+El decodificado de protobuf y el WebSocket de cada stream se ejecutan en procesos
+worker; el proceso web solo recibe regalos ya normalizados (GiftData) por un pipe, así
+que un streamer con mucho tráfico no retrasa los timers ni las respuestas de los demás.
+"""
+from typing import Callable, Dict, List, Optional
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import time
+
+from .event_sources import ConnectCallback, EventSource, GiftCallback, create_event_source
+from .tiktok_connector import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# Espera máxima entre reinicios de un worker que cae en bucle
+RESTART_BACKOFF_MAX = 60.0
+# Al apagar: espera común a que los workers terminen solos y, tras matarlos, a que salgan
+STOP_TIMEOUT = 2.0
+KILL_TIMEOUT = 1.0
+
+# Mensajes worker -> web (se envían en lotes, una lista por vuelta del event loop del worker)
+CONNECTED = "c"
+GIFT = "g"
+CLOSED = "x"
+HEARTBEAT = "h"
+
+
+class _Stream:
+    """Stream abierto en un worker, visto desde el proceso web"""
+
+    __slots__ = ("unique_id", "on_gift", "on_connect", "done")
+
+    def __init__(self, unique_id: str, on_gift: GiftCallback, on_connect: ConnectCallback, done: asyncio.Future):
+        self.unique_id = unique_id
+        self.on_gift = on_gift
+        self.on_connect = on_connect
+        self.done = done
+
+
+class _WorkerHandle:
+    """Proceso worker, su extremo del pipe y los streams que aloja"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process: Optional[multiprocessing.Process] = None
+        self.conn = None
+        self.streams: Dict[int, _Stream] = {}
+        self.alive = False
+        self.restarts = 0
+        self.events = 0
+        self.last_heartbeat = 0.0
+        self.started_at = 0.0
+        # Caídas seguidas (sin llegar a estar sano RESTART_BACKOFF_MAX) y cuándo reintentar
+        self.failures = 0
+        self.restart_at = 0.0
+
+    def to_dict(self, now: float) -> dict:
+        return {
+            "index": self.index,
+            "pid": self.process.pid if self.process else None,
+            "alive": self.alive,
+            "streams": len(self.streams),
+            "events": self.events,
+            "restarts": self.restarts,
+            "heartbeatAgeSeconds": round(max(0.0, now - self.last_heartbeat), 1) if self.alive else None
+        }
+
+
+class ProcessPoolSource(EventSource):
+    """
+    Fuente que aloja las fuentes reales en `workers` procesos
+
+    - Cada stream se abre en el worker con menos streams; el worker ejecuta la fuente
+      `kind` (live, record, replay, synthetic) y devuelve los regalos por el pipe.
+    - `source_factory` (una función importable, sin argumentos) sustituye a `kind` para
+      alojar otras fuentes en los workers.
+    - Los workers envían un heartbeat cada `heartbeat_interval`. Un worker que termina
+      o deja de responder durante `heartbeat_timeout` se reinicia con backoff exponencial
+      (de `heartbeat_interval` hasta RESTART_BACKOFF_MAX); sus streams fallan con
+      ConnectionError y el conector los reabre con su backoff.
+    """
+
+    name = "process"
+
+    def __init__(
+        self,
+        workers: int = 1,
+        kind: str = "live",
+        options: Optional[dict] = None,
+        heartbeat_interval: float = 1.0,
+        heartbeat_timeout: float = 10.0,
+        log_level: str = "info",
+        source_factory: Optional[Callable[[], EventSource]] = None
+    ):
+        self.kind = kind
+        self.options = dict(options or {})
+        self.source_factory = source_factory
+        if source_factory is None:
+            # Validar la configuración aquí: un error dentro del worker solo se vería como reinicios
+            create_event_source(kind, **self.options).close()
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.log_level = log_level
+        self._workers = [_WorkerHandle(index) for index in range(workers)]
+        self._ids = itertools.count(1)
+        self._monitor: Optional[asyncio.Task] = None
+        # spawn: el proceso web tiene hilos (logging, uvicorn) y no es seguro hacer fork
+        self._context = multiprocessing.get_context("spawn")
+
+    def start(self) -> None:
+        """Arranca los workers y el monitor de salud (idempotente, dentro del event loop)"""
+        if self._monitor is not None:
+            return
+        for worker in self._workers:
+            self._spawn(worker)
+        self._monitor = asyncio.get_running_loop().create_task(self._monitor_loop())
+
+    def close(self) -> None:
+        """
+        Detiene los workers
+
+        Se pide a todos que paren antes de esperar a ninguno, y la espera tiene un único
+        plazo común: el apagado tarda como mucho STOP_TIMEOUT + KILL_TIMEOUT en total,
+        no por worker.
+        """
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+        for worker in self._workers:
+            if worker.alive:
+                try:
+                    worker.conn.send(("stop",))
+                except OSError:
+                    pass
+            self._lost(worker, "apagado")
+        processes = [worker.process for worker in self._workers if worker.process is not None]
+        remaining = self._join_all(processes, STOP_TIMEOUT)
+        for process in remaining:
+            process.kill()
+        self._join_all(remaining, KILL_TIMEOUT)
+
+    @staticmethod
+    def _join_all(processes: List[multiprocessing.Process], timeout: float) -> List[multiprocessing.Process]:
+        """Espera a varios procesos con un plazo común; devuelve los que siguen vivos"""
+        deadline = time.monotonic() + timeout
+        for process in processes:
+            process.join(timeout=max(0.0, deadline - time.monotonic()))
+        return [process for process in processes if process.is_alive()]
+
+    async def run(self, unique_id: str, on_gift: GiftCallback, on_connect: ConnectCallback) -> None:
+        self.start()
+        candidates = [worker for worker in self._workers if worker.alive]
+        if not candidates:
+            raise ConnectionError("No hay workers de TikTok disponibles")
+        worker = min(candidates, key=lambda w: (len(w.streams), w.index))
+        stream_id = next(self._ids)
+        stream = _Stream(unique_id, on_gift, on_connect, asyncio.get_running_loop().create_future())
+        worker.streams[stream_id] = stream
+        try:
+            worker.conn.send(("open", stream_id, unique_id))
+            await stream.done
+        finally:
+            # Si el stream sigue registrado es que se canceló aquí: avisar al worker
+            if worker.streams.pop(stream_id, None) is not None and worker.alive:
+                try:
+                    worker.conn.send(("close", stream_id))
+                except OSError:
+                    pass
+
+    def stats(self) -> List[dict]:
+        """Estado de cada worker (pid, streams, eventos, reinicios, antigüedad del heartbeat)"""
+        now = time.monotonic()
+        return [worker.to_dict(now) for worker in self._workers]
+
+    def _spawn(self, worker: _WorkerHandle) -> None:
+        parent_conn, child_conn = self._context.Pipe()
+        options = dict(self.options)
+        if self.kind == "record" and len(self._workers) > 1 and options.get("record_path"):
+            # Un fichero por worker: varios procesos no pueden intercalar líneas en el mismo
+            options["record_path"] = f"{options['record_path']}.{worker.index}"
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self.kind, options, self.heartbeat_interval, self.log_level, self.source_factory),
+            name=f"tiktok-worker-{worker.index}",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        worker.process = process
+        worker.conn = parent_conn
+        worker.alive = True
+        worker.started_at = time.monotonic()
+        # Margen de arranque: el worker importa TikTokLive antes del primer heartbeat
+        worker.last_heartbeat = time.monotonic() + self.heartbeat_timeout
+        asyncio.get_running_loop().add_reader(parent_conn.fileno(), self._on_readable, worker)
+        logger.info(f"🧵 Worker de TikTok {worker.index} iniciado (pid {process.pid})")
+
+    def _on_readable(self, worker: _WorkerHandle) -> None:
+        conn = worker.conn
+        try:
+            while worker.alive and conn.poll():
+                for message in conn.recv():
+                    self._dispatch(worker, message)
+        except (EOFError, OSError) as e:
+            self._lost(worker, f"pipe cerrado ({e.__class__.__name__})")
+
+    def _dispatch(self, worker: _WorkerHandle, message: tuple) -> None:
+        kind = message[0]
+        if kind == HEARTBEAT:
+            worker.last_heartbeat = time.monotonic()
+            return
+        stream = worker.streams.get(message[1])
+        if stream is None:
+            return
+        if kind == GIFT:
+            worker.events += 1
+            try:
+                stream.on_gift(message[2])
+            except Exception as e:
+                logger.error(f"Error procesando donación: {e}")
+        elif kind == CONNECTED:
+            stream.on_connect()
+        elif kind == CLOSED:
+            del worker.streams[message[1]]
+            if not stream.done.done():
+                error = message[2]
+                if error:
+                    stream.done.set_exception(ConnectionError(error))
+                else:
+                    stream.done.set_result(None)
+
+    def _lost(self, worker: _WorkerHandle, reason: str) -> None:
+        """Marca un worker como caído y hace fallar sus streams (el monitor lo reinicia)"""
+        if not worker.alive:
+            return
+        worker.alive = False
+        try:
+            asyncio.get_running_loop().remove_reader(worker.conn.fileno())
+        except (OSError, ValueError, RuntimeError):
+            pass
+        worker.conn.close()
+        streams, worker.streams = worker.streams, {}
+        for stream in streams.values():
+            if not stream.done.done():
+                stream.done.set_exception(ConnectionError(f"Worker de TikTok {worker.index} caído: {reason}"))
+        if reason != "apagado":
+            now = time.monotonic()
+            if now - worker.started_at > RESTART_BACKOFF_MAX:
+                # Estuvo sano un buen rato: no es un fallo en bucle
+                worker.failures = 0
+            delay = backoff_delay(worker.failures, self.heartbeat_interval, RESTART_BACKOFF_MAX)
+            worker.failures += 1
+            worker.restart_at = now + delay
+            logger.error(
+                f"❌ Worker de TikTok {worker.index} caído ({reason}); se reinicia en {delay:.1f}s "
+                f"y {len(streams)} stream(s) se reconectarán"
+            )
+
+    async def _monitor_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            now = time.monotonic()
+            for worker in self._workers:
+                if worker.alive:
+                    if not worker.process.is_alive():
+                        self._lost(worker, f"terminó con código {worker.process.exitcode}")
+                    elif now - worker.last_heartbeat > self.heartbeat_timeout:
+                        self._lost(worker, "sin heartbeat")
+                        worker.process.kill()
+                if not worker.alive:
+                    if worker.process is not None and worker.process.is_alive():
+                        worker.process.kill()
+                    if worker.process is not None:
+                        worker.process.join(timeout=0.1)
+                    if now < worker.restart_at:
+                        # Backoff: un worker que cae en bucle no se reinicia en cada vuelta
+                        continue
+                    worker.restarts += 1
+                    try:
+                        self._spawn(worker)
+                    except Exception as e:
+                        worker.restart_at = now + backoff_delay(worker.failures, self.heartbeat_interval, RESTART_BACKOFF_MAX)
+                        worker.failures += 1
+                        logger.error(f"❌ No se pudo reiniciar el worker de TikTok {worker.index}: {e}")
+
+
+class _Worker:
+    """Lado del proceso worker: ejecuta los streams pedidos y envía sus eventos al proceso web"""
+
+    def __init__(self, conn, source: EventSource, heartbeat_interval: float):
+        self.conn = conn
+        self.source = source
+        self.heartbeat_interval = heartbeat_interval
+        self.streams: Dict[int, asyncio.Task] = {}
+        self.outbox: list = []
+        self.stopped = asyncio.Event()
+
+    async def serve(self) -> None:
+        loop = asyncio.get_running_loop()
+        loop.add_reader(self.conn.fileno(), self._on_command)
+        heartbeat = loop.create_task(self._heartbeat())
+        await self.stopped.wait()
+        heartbeat.cancel()
+        for task in list(self.streams.values()):
+            task.cancel()
+        await asyncio.gather(*self.streams.values(), return_exceptions=True)
+        self.source.close()
+
+    def _on_command(self) -> None:
+        try:
+            while self.conn.poll():
+                command = self.conn.recv()
+                action = command[0]
+                if action == "open":
+                    _, stream_id, unique_id = command
+                    self.streams[stream_id] = asyncio.get_running_loop().create_task(self._run(stream_id, unique_id))
+                elif action == "close":
+                    task = self.streams.pop(command[1], None)
+                    if task:
+                        task.cancel()
+                elif action == "stop":
+                    self._stop()
+                    return
+        except (EOFError, OSError):
+            # El proceso web terminó
+            self._stop()
+
+    def _stop(self) -> None:
+        asyncio.get_running_loop().remove_reader(self.conn.fileno())
+        self.stopped.set()
+
+    async def _run(self, stream_id: int, unique_id: str) -> None:
+        error = None
+        try:
+            await self.source.run(
+                unique_id,
+                lambda gift: self._send((GIFT, stream_id, gift)),
+                lambda: self._send((CONNECTED, stream_id))
+            )
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+        self.streams.pop(stream_id, None)
+        self._send((CLOSED, stream_id, error))
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._send((HEARTBEAT,))
+            await asyncio.sleep(self.heartbeat_interval)
+
+    def _send(self, message: tuple) -> None:
+        # Los mensajes de una misma vuelta del loop viajan juntos en un solo envío
+        if not self.outbox:
+            asyncio.get_running_loop().call_soon(self._flush)
+        self.outbox.append(message)
+
+    def _flush(self) -> None:
+        batch, self.outbox = self.outbox, []
+        try:
+            self.conn.send(batch)
+        except OSError:
+            self._stop()
+
+
+def _worker_main(
+    conn,
+    kind: str,
+    options: dict,
+    heartbeat_interval: float,
+    log_level: str,
+    source_factory: Optional[Callable[[], EventSource]] = None
+) -> None:
+    """Punto de entrada del proceso worker"""
+    logging.basicConfig(
+        level=log_level.upper(),
+        format="%(asctime)s %(levelname)s %(processName)s %(name)s: %(message)s",
+        force=True
+    )
+    source = source_factory() if source_factory else create_event_source(kind, **options)
+    try:
+        asyncio.run(_Worker(conn, source, heartbeat_interval).serve())
+    except KeyboardInterrupt:
+        pass
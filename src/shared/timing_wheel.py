@@ -0,0 +1,136 @@
+"""
+Timing wheel jerárquico para programar miles de deadlines
+Agrupa los vencimientos en slots; programar, cancelar y reprogramar son O(1)
+"""
+import math
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class _TimerEntry:
+    """Entrada programada en la rueda"""
+
+    __slots__ = ("key", "tick", "payload", "bucket")
+
+    def __init__(self, key: Hashable, tick: int, payload: Any):
+        self.key = key
+        self.tick = tick
+        self.payload = payload
+        self.bucket: Optional[Dict[Hashable, "_TimerEntry"]] = None
+
+
+class TimingWheel:
+    """
+    Rueda de tiempos jerárquica (estilo Linux): `levels` niveles de `slots` slots
+
+    El nivel 0 tiene resolución `resolution` segundos; cada nivel superior cubre
+    `slots` veces más tiempo. Los slots de niveles altos se redistribuyen hacia
+    abajo (cascada) cuando el nivel inferior da la vuelta completa.
+    El coste de avanzar un tick depende solo de lo que vence en él, no del
+    número total de entradas programadas.
+    """
+
+    def __init__(self, resolution: float = 0.05, slots: int = 64, levels: int = 4, start: float = 0.0):
+        if slots & (slots - 1):
+            raise ValueError("El número de slots debe ser potencia de 2")
+        self.resolution = resolution
+        self.start = start
+        self._bits = slots.bit_length() - 1
+        self._mask = slots - 1
+        self._levels = levels
+        self._wheels: List[List[Dict[Hashable, _TimerEntry]]] = [
+            [{} for _ in range(slots)] for _ in range(levels)
+        ]
+        self._entries: Dict[Hashable, _TimerEntry] = {}
+        self._current_tick = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    @property
+    def current_time(self) -> float:
+        """Instante hasta el que se ha avanzado la rueda"""
+        return self.start + self._current_tick * self.resolution
+
+    def next_tick_time(self) -> float:
+        """Instante del próximo tick de la rueda"""
+        return self.start + (self._current_tick + 1) * self.resolution
+
+    def schedule(self, key: Hashable, when: float, payload: Any = None, now: Optional[float] = None) -> None:
+        """
+        Programa (o reprograma) `key` para vencer en el instante `when`
+
+        Con `now`, una rueda vacía salta primero al tick actual: tras un periodo sin
+        entradas nadie la avanza, y el siguiente `advance` tendría que recorrer (y
+        cascadear) todos los ticks inactivos de golpe.
+        """
+        if now is not None and not self._entries:
+            self.advance(now)
+        self.cancel(key)
+        tick = math.ceil((when - self.start) / self.resolution)
+        entry = _TimerEntry(key, max(tick, self._current_tick + 1), payload)
+        self._entries[key] = entry
+        self._place(entry)
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancela `key` si estaba programada"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        del entry.bucket[key]
+        entry.bucket = None
+        return True
+
+    def advance(self, now: float) -> List[Tuple[Hashable, Any]]:
+        """
+        Avanza la rueda hasta `now` y devuelve en un solo lote
+        todas las entradas vencidas como pares (key, payload)
+        """
+        # Tolerancia para que el redondeo en coma flotante no deje un tick atrás
+        target = math.floor((now - self.start) / self.resolution + 1e-9)
+        expired: List[Tuple[Hashable, Any]] = []
+        if not self._entries:
+            # Rueda vacía: se puede saltar directamente al tick objetivo
+            self._current_tick = max(self._current_tick, target)
+            return expired
+        while self._current_tick < target:
+            self._current_tick += 1
+            self._cascade()
+            bucket = self._wheels[0][self._current_tick & self._mask]
+            if bucket:
+                for key, entry in bucket.items():
+                    del self._entries[key]
+                    entry.bucket = None
+                    expired.append((key, entry.payload))
+                bucket.clear()
+        return expired
+
+    def _place(self, entry: _TimerEntry) -> None:
+        """Ubica la entrada en el nivel cuyo rango cubre su distancia al tick actual"""
+        delta = entry.tick - self._current_tick
+        for level in range(self._levels):
+            if delta < (1 << (self._bits * (level + 1))) or level == self._levels - 1:
+                if level == self._levels - 1 and delta >= (1 << (self._bits * self._levels)):
+                    # Fuera de rango: se aparca en el último slot alcanzable y se recoloca en la cascada
+                    tick = self._current_tick + (1 << (self._bits * self._levels)) - 1
+                else:
+                    tick = entry.tick
+                bucket = self._wheels[level][(tick >> (self._bits * level)) & self._mask]
+                bucket[entry.key] = entry
+                entry.bucket = bucket
+                return
+
+    def _cascade(self) -> None:
+        """Redistribuye los slots de niveles superiores al completar una vuelta"""
+        for level in range(1, self._levels):
+            if (self._current_tick >> (self._bits * (level - 1))) & self._mask:
+                return
+            index = (self._current_tick >> (self._bits * level)) & self._mask
+            bucket = self._wheels[level][index]
+            if bucket:
+                entries = list(bucket.values())
+                bucket.clear()
+                for entry in entries:
+                    self._place(entry)
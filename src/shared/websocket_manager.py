@@ -2,51 +2,263 @@
 Manager de WebSocket para comunicación en tiempo real
 """
 from fastapi import WebSocket
-from typing import Dict, List
-import json
+from typing import Dict, List, Optional
 import asyncio
+import logging
+import time
+
+from .backplane import Backplane
+from .client_connection import ClientConnection, OverflowPolicy
+from .replay_buffer import ReplayBuffer
+from .serialization import encode, negotiate_subprotocol
+from .sse import SseBroadcaster
+
+logger = logging.getLogger(__name__)
 
 
 class ConnectionManager:
     """Gestiona las conexiones WebSocket activas"""
     
-    def __init__(self):
-        # Diccionario: auction_id -> lista de WebSockets conectados
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+    def __init__(
+        self,
+        max_queue_size: int = 256,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        send_timeout: float = 10.0,
+        ping_interval: float = 25.0,
+        idle_timeout: float = 60.0,
+        replay_size: int = 256
+    ):
+        # Diccionario: auction_id -> {id de conexión: cliente} (alta y baja O(1), orden de llegada)
+        self.active_connections: Dict[str, Dict[int, ClientConnection]] = {}
+        # Índice id(websocket) -> cliente para localizar una conexión sin recorrer la subasta
+        self._by_websocket: Dict[int, ClientConnection] = {}
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+        self.send_timeout = send_timeout
+        # Heartbeat: ping cada ping_interval; se cierra la conexión sin tráfico durante idle_timeout
+        self.ping_interval = ping_interval
+        self.idle_timeout = idle_timeout
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        # Últimos frames numerados por subasta, para reanudar reconexiones con ?since=
+        self.replay_size = replay_size
+        self._replay: Dict[str, ReplayBuffer] = {}
+        # Suscriptores Server-Sent Events: reciben los mismos eventos, codificados una vez como SSE
+        self.sse = SseBroadcaster(replay_size)
+        # Contadores incrementales (lectura O(1) desde /health)
+        self.connection_count = 0
+        self.total_opened = 0
+        self.total_reaped = 0
+        # Backplane para propagar los broadcasts a los sockets de otros workers
+        self.backplane: Optional[Backplane] = None
+        self._backplane_running = False
+        
+    def configure(
+        self,
+        max_queue_size: Optional[int] = None,
+        overflow_policy: Optional[OverflowPolicy] = None,
+        send_timeout: Optional[float] = None,
+        ping_interval: Optional[float] = None,
+        idle_timeout: Optional[float] = None,
+        replay_size: Optional[int] = None
+    ) -> None:
+        """Ajusta la cola de salida de las nuevas conexiones, el heartbeat y el buffer de reenvío"""
+        if max_queue_size is not None:
+            self.max_queue_size = max_queue_size
+        if overflow_policy is not None:
+            self.overflow_policy = overflow_policy
+        if send_timeout is not None:
+            self.send_timeout = send_timeout
+        if ping_interval is not None:
+            self.ping_interval = ping_interval
+        if idle_timeout is not None:
+            self.idle_timeout = idle_timeout
+        if replay_size is not None:
+            self.replay_size = replay_size
+            self.sse.capacity = replay_size
+        
+    def set_backplane(self, backplane: Backplane) -> None:
+        """Inyecta el backplane de publicación entre workers"""
+        self.backplane = backplane
+        
+    async def start_backplane(self) -> None:
+        """Se une al backplane; desde entonces cada broadcast llega a todos los workers"""
+        if self.backplane and not self._backplane_running:
+            await self.backplane.start(self._fan_out)
+            self._backplane_running = True
+            
+    async def stop_backplane(self) -> None:
+        """Sale del backplane"""
+        if self.backplane and self._backplane_running:
+            self._backplane_running = False
+            await self.backplane.stop()
+        
+    def start_heartbeat(self) -> None:
+        """Arranca el barrido periódico de ping y cierre de conexiones inactivas (0 = desactivado)"""
+        if self.ping_interval > 0 and not self._heartbeat_task:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+            
+    async def stop_heartbeat(self) -> None:
+        """Detiene el heartbeat"""
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+            
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            try:
+                self.sweep(time.monotonic())
+            except Exception as e:
+                logger.error(f"❌ Error en el heartbeat WebSocket: {e}")
+                
+    def sweep(self, now: float) -> int:
+        """
+        Envía un ping a cada conexión y cierra las que no han dado señales en idle_timeout
+        
+        Returns:
+            Número de conexiones cerradas por inactividad
+        """
+        reaped = 0
+        frames = {}
+        for connection in list(self._by_websocket.values()):
+            if now - connection.last_seen > self.idle_timeout:
+                logger.warning(
+                    f"⚠️ Conexión {connection.id} sin respuesta durante {self.idle_timeout:.0f}s; se cierra"
+                )
+                connection.close(code=1001)
+                reaped += 1
+                continue
+            payload = frames.get(connection.codec)
+            if payload is None:
+                payload = frames[connection.codec] = encode(
+                    {"type": "ping", "serverTime": int(time.time() * 1000)}, connection.codec
+                )
+            connection.enqueue(payload, "ping")
+        self.total_reaped += reaped
+        return reaped
+        
+    def touch(self, websocket: WebSocket) -> None:
+        """Registra actividad del cliente (pong o cualquier otro mensaje)"""
+        connection = self._find(websocket)
+        if connection:
+            connection.touch()
+        
+    async def connect(self, websocket: WebSocket, auction_id: str) -> ClientConnection:
+        """
+        Conecta un cliente WebSocket a una subasta específica
         
-    async def connect(self, websocket: WebSocket, auction_id: str):
-        """Conecta un cliente WebSocket a una subasta específica"""
-        await websocket.accept()
+        El cliente puede pedir frames MessagePack con Sec-WebSocket-Protocol: tiktokcraft.msgpack;
+        sin subprotocolo se usa JSON.
+        """
+        subprotocol, codec = negotiate_subprotocol(websocket.scope.get("subprotocols"))
+        await websocket.accept(subprotocol=subprotocol)
+        connection = ClientConnection(
+            websocket,
+            auction_id,
+            max_queue_size=self.max_queue_size,
+            overflow_policy=self.overflow_policy,
+            send_timeout=self.send_timeout,
+            on_close=self._remove,
+            codec=codec
+        )
         if auction_id not in self.active_connections:
-            self.active_connections[auction_id] = []
-        self.active_connections[auction_id].append(websocket)
+            self.active_connections[auction_id] = {}
+        self.active_connections[auction_id][connection.id] = connection
+        self._by_websocket[id(websocket)] = connection
+        self.connection_count += 1
+        self.total_opened += 1
+        connection.start()
+        return connection
         
     def disconnect(self, websocket: WebSocket, auction_id: str):
         """Desconecta un cliente WebSocket"""
-        if auction_id in self.active_connections:
-            if websocket in self.active_connections[auction_id]:
-                self.active_connections[auction_id].remove(websocket)
+        connection = self._find(websocket)
+        if connection:
+            connection.close()
+            
+    def _remove(self, connection: ClientConnection) -> None:
+        """Quita una conexión cerrada del registro (O(1))"""
+        if self._by_websocket.pop(id(connection.websocket), None) is None:
+            return
+        self.connection_count -= 1
+        group = self.active_connections.get(connection.auction_id)
+        if group is not None:
+            group.pop(connection.id, None)
             # Limpiar si no quedan conexiones
-            if not self.active_connections[auction_id]:
-                del self.active_connections[auction_id]
+            if not group:
+                del self.active_connections[connection.auction_id]
+                
+    def _find(self, websocket: WebSocket) -> Optional[ClientConnection]:
+        """Busca el cliente asociado a un WebSocket (O(1))"""
+        return self._by_websocket.get(id(websocket))
                 
-    async def send_personal_message(self, message: dict, websocket: WebSocket):
-        """Envía un mensaje a un cliente específico"""
-        await websocket.send_json(message)
+    async def send_personal_message(self, message: dict, websocket: WebSocket, auction_id: Optional[str] = None):
+        """Envía un mensaje a un cliente específico (por su cola, respetando el orden)"""
+        connection = self._find(websocket)
+        if connection:
+            connection.enqueue(encode(message, connection.codec))
+        else:
+            await websocket.send_text(encode(message))
+        
+    async def broadcast(self, message: dict, auction_id: str, coalesce: bool = True):
+        """
+        Encola un mensaje para todos los clientes conectados a una subasta
         
-    async def broadcast(self, message: dict, auction_id: str):
-        """Envía un mensaje a todos los clientes conectados a una subasta"""
+        No bloquea: cada cliente lo envía desde su propia tarea escritora.
+        Con coalesce=False el frame nunca reemplaza a otro pendiente del mismo tipo
+        (p. ej. deltas, que no son idempotentes).
+        Con backplane, el mensaje se entrega también a los clientes de los demás workers.
+        Cada mensaje recibe el siguiente `seq` de la subasta y se guarda para reenvío.
+        """
+        message["seq"] = self._replay_buffer(auction_id).last_seq + 1
+        if self._backplane_running:
+            self.backplane.publish(auction_id, message, coalesce)
+        else:
+            self._fan_out(auction_id, message, coalesce)
+            
+    def _fan_out(self, auction_id: str, message: dict, coalesce: bool = True) -> None:
+        """Guarda el mensaje para reenvío y lo encola en los clientes de este worker"""
+        if "seq" in message:
+            buffer = self._replay_buffer(auction_id)
+            buffer.append(message["seq"], message)
+            self.sse.publish(auction_id, message, buffer.epoch)
         if auction_id in self.active_connections:
-            # Crear una copia de la lista para evitar problemas si se desconecta durante el broadcast
-            connections = self.active_connections[auction_id].copy()
-            for connection in connections:
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    # Si falla el envío, desconectar el cliente
-                    print(f"Error enviando mensaje: {e}")
-                    self.disconnect(connection, auction_id)
+            # Serializar una sola vez por codec y encolar el mismo frame para todos los suscriptores
+            frames = {}
+            key = message.get("type") if coalesce else None
+            # Crear una copia de la lista: un cliente lento puede desconectarse durante el broadcast
+            for connection in list(self.active_connections[auction_id].values()):
+                payload = frames.get(connection.codec)
+                if payload is None:
+                    payload = frames[connection.codec] = encode(message, connection.codec)
+                connection.enqueue(payload, key)
                     
+    def _replay_buffer(self, auction_id: str) -> ReplayBuffer:
+        buffer = self._replay.get(auction_id)
+        if buffer is None:
+            buffer = self._replay[auction_id] = ReplayBuffer(self.replay_size)
+        return buffer
+        
+    def get_stream_position(self, auction_id: str) -> dict:
+        """Último seq y epoch de la subasta; el cliente los usa para reconectar con ?since="""
+        buffer = self._replay_buffer(auction_id)
+        return {"seq": buffer.last_seq, "epoch": buffer.epoch}
+        
+    def get_replay(self, auction_id: str, since: int, epoch: Optional[str] = None) -> Optional[List[dict]]:
+        """Mensajes posteriores a `since`, o None si hace falta un snapshot completo"""
+        buffer = self._replay.get(auction_id)
+        if buffer is None:
+            return None
+        return buffer.since(since, epoch)
+        
+    def discard_replay(self, auction_id: str) -> None:
+        """Olvida el historial de una subasta eliminada"""
+        self._replay.pop(auction_id, None)
+        
     async def broadcast_time_update(self, auction_id: str, remaining_seconds: int):
         """Envía actualización de tiempo a todos los clientes"""
         message = {
@@ -58,6 +270,15 @@ class ConnectionManager:
         }
         await self.broadcast(message, auction_id)
         
+    async def broadcast_clock_sync(self, auction_id: str, clock_data: dict):
+        """Envía el deadline autoritativo y la hora del servidor a todos los clientes"""
+        message = {
+            "type": "clock_sync",
+            "auctionId": auction_id,
+            "data": clock_data
+        }
+        await self.broadcast(message, auction_id)
+        
     async def broadcast_status_change(self, auction_id: str, status: str):
         """Envía cambio de estado a todos los clientes"""
         message = {
@@ -78,9 +299,61 @@ class ConnectionManager:
         }
         await self.broadcast(message, auction_id)
         
+    async def broadcast_donation_delta(self, auction_id: str, delta: dict):
+        """Envía solo los cambios del leaderboard (filas, posiciones y totales) con su seq"""
+        message = {
+            "type": "donation_delta",
+            "auctionId": auction_id,
+            "data": delta
+        }
+        await self.broadcast(message, auction_id, coalesce=False)
+        
+    async def broadcast_rate_update(self, auction_id: str, rate: dict):
+        """Envía la ventana deslizante de donaciones (coins/minuto y donador más fuerte)"""
+        message = {
+            "type": "rate_update",
+            "auctionId": auction_id,
+            "data": rate
+        }
+        await self.broadcast(message, auction_id)
+        
+    async def broadcast_combo_progress(self, auction_id: str, combo: dict):
+        """Envía el avance de un combo de regalos en curso (aviso visual, no cuenta como donación)"""
+        message = {
+            "type": "combo_progress",
+            "auctionId": auction_id,
+            "data": combo
+        }
+        await self.broadcast(message, auction_id)
+        
+    def has_subscribers(self, auction_id: str) -> bool:
+        """Indica si algún cliente (WebSocket o SSE, en cualquier worker) puede recibir la subasta"""
+        if self._backplane_running:
+            # Los clientes de los demás workers no son visibles desde aquí
+            return True
+        return bool(self.active_connections.get(auction_id)) or self.sse.get_subscribers_count(auction_id) > 0
+        
     def get_connections_count(self, auction_id: str) -> int:
         """Obtiene el número de conexiones activas para una subasta"""
-        return len(self.active_connections.get(auction_id, []))
+        return len(self.active_connections.get(auction_id, {}))
+        
+    def get_counters(self) -> dict:
+        """Contadores globales mantenidos de forma incremental"""
+        return {
+            "connections": self.connection_count,
+            "auctions": len(self.active_connections),
+            "opened": self.total_opened,
+            "reaped": self.total_reaped,
+            "sseSubscribers": self.sse.subscriber_count
+        }
+        
+    def get_connection_stats(self, auction_id: Optional[str] = None) -> List[dict]:
+        """Profundidad de cola y contadores de descarte por conexión"""
+        if auction_id is not None:
+            connections = self.active_connections.get(auction_id, {}).values()
+        else:
+            connections = self._by_websocket.values()
+        return [connection.stats() for connection in connections]
 
 
 # Instancia global del manager
@@ -0,0 +1,174 @@
+"""
+Pruebas del journal de donaciones (no necesitan el servidor)
+Ejecuta: python test_journal.py  (o con pytest)
+"""
+from array import array
+import asyncio
+import errno
+import os
+import tempfile
+
+from src.modules.auction.domain.auction import Auction, AuctionStatus
+from src.modules.auction.infrastructure import journal as journal_module
+from src.modules.auction.infrastructure.journal import (
+    AuctionJournal, DonationJournal, DONATIONS, MAGIC, STATE, STRING, _BLOCK_HEADER, _STRING_HEADER, auction_state
+)
+
+
+def _auction(auction_id: str = "subasta") -> Auction:
+    return Auction(
+        id=auction_id,
+        name_streamer="streamer",
+        titulo_subasta="Subasta de prueba",
+        timer_minutes=5,
+        status=AuctionStatus.DRAFT
+    )
+
+
+def _replay(directory: str) -> dict:
+    """Trackers restaurados por id de subasta"""
+    return {auction.id: tracker for auction, tracker in DonationJournal(directory).replay()}
+
+
+def _flush_failing(journal: DonationJournal, fake_write) -> None:
+    """Hace un flush con os.write sustituido por `fake_write`"""
+    original = journal_module.os.write
+    journal_module.os.write = fake_write
+    try:
+        asyncio.run(journal.flush())
+    finally:
+        journal_module.os.write = original
+
+
+def test_failed_write_is_retried():
+    """Una escritura fallida (ENOSPC) no pierde las cadenas internadas ni las donaciones"""
+    print("🔍 Reintento tras un OSError al escribir el journal...")
+    with tempfile.TemporaryDirectory() as directory:
+        journal = DonationJournal(directory)
+        journal.record_state(_auction())
+        journal.record_donation("subasta", 1, "ana", 10, "Rose", "ana.webp")
+
+        def no_space(fd, data):
+            raise OSError(errno.ENOSPC, "No space left on device")
+
+        _flush_failing(journal, no_space)
+        # Donaciones nuevas que reutilizan las cadenas del flush fallido
+        journal.record_donation("subasta", 2, "ana", 5, "Rose", "ana.webp")
+        journal.record_donation("subasta", 3, "beto", 7, "Rose", None)
+        asyncio.run(journal.stop())
+
+        tracker = _replay(directory)["subasta"]
+        assert tracker.donation_count == 3
+        assert tracker.get_donor_stats("ana").total_amount == 15
+        assert tracker.get_donor_stats("beto").total_amount == 7
+    print("✅ Las donaciones del flush fallido se escribieron en el siguiente")
+
+
+def test_partial_write_is_completed():
+    """Un os.write que se corta a mitad de registro se completa en el siguiente flush"""
+    print("🔍 Escritura parcial del journal...")
+    with tempfile.TemporaryDirectory() as directory:
+        journal = DonationJournal(directory)
+        journal.record_state(_auction())
+        journal.record_donation("subasta", 1, "ana", 10, "Rose", None)
+        original = os.write
+        calls = []
+
+        def half_then_fail(fd, data):
+            calls.append(len(data))
+            if len(calls) == 1:
+                return original(fd, bytes(data[:len(data) // 2]))
+            raise OSError(errno.EIO, "I/O error")
+
+        _flush_failing(journal, half_then_fail)
+        journal.record_donation("subasta", 2, "beto", 3, "Rose", None)
+        asyncio.run(journal.stop())
+
+        tracker = _replay(directory)["subasta"]
+        assert tracker.donation_count == 2
+        assert tracker.get_donor_stats("beto").total_amount == 3
+    print("✅ El registro cortado se completó sin romper el fichero")
+
+
+def _write_raw(path: str, strings: list, donors: list) -> None:
+    """Journal escrito a mano: cadenas (id, valor) en el orden dado y un bloque de donaciones"""
+    journal = AuctionJournal(path)
+    journal.append_state(auction_state(_auction()))
+    data = bytearray(MAGIC)
+    for string_id, value in strings:
+        encoded = value.encode("utf-8")
+        data += _STRING_HEADER.pack(STRING, string_id, len(encoded)) + encoded
+    data += _BLOCK_HEADER.pack(DONATIONS, len(donors))
+    data += array("q", range(1, len(donors) + 1)).tobytes()
+    data += array("q", [1] * len(donors)).tobytes()
+    data += array("I", donors).tobytes()
+    data += array("I", [0] * len(donors)).tobytes()
+    data += array("I", [0] * len(donors)).tobytes()
+    data += journal.take_pending()
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def test_string_ids_are_read_from_records():
+    """Las cadenas se resuelven por su id guardado, no por su posición en el fichero"""
+    print("🔍 Ids de cadena con huecos y desordenados...")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "subasta.journal")
+        _write_raw(path, [(5, "beto"), (2, "ana")], [2, 5, 5])
+        journal = AuctionJournal(path)
+        _, tracker = journal.replay()
+        assert tracker.get_donor_stats("ana").total_amount == 1
+        assert tracker.get_donor_stats("beto").total_amount == 2
+        # Una cadena nueva no reutiliza un id ya presente en el fichero
+        assert journal.intern("carla") == 6
+
+        _write_raw(path, [(1, "ana")], [1, 2])
+        try:
+            AuctionJournal(path).replay()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Un id de cadena no definido debería ser un error")
+    print("✅ Ids de cadena resueltos por su registro")
+
+
+def test_corrupt_file_is_set_aside():
+    """Un journal corrupto se aparta como .corrupt y no impide restaurar los demás"""
+    print("🔍 Journal corrupto al arrancar...")
+    with tempfile.TemporaryDirectory() as directory:
+        journal = DonationJournal(directory)
+        journal.record_state(_auction("buena"))
+        journal.record_donation("buena", 1, "ana", 10, "Rose", None)
+        asyncio.run(journal.stop())
+        _write_raw(os.path.join(directory, "rota.journal"), [(1, "ana")], [1, 7])
+        # Estado sin id: KeyError al reconstruir el tracker
+        with open(os.path.join(directory, "sin_id.journal"), "wb") as file:
+            file.write(MAGIC + _BLOCK_HEADER.pack(STATE, 2) + b"{}")
+
+        restored = _replay(directory)
+        assert list(restored) == ["buena"]
+        assert restored["buena"].get_donor_stats("ana").total_amount == 10
+        assert sorted(os.listdir(directory)) == ["buena.journal", "rota.journal.corrupt", "sin_id.journal.corrupt"]
+    print("✅ El journal corrupto se apartó y el resto se restauró")
+
+
+def run_all_tests():
+    tests = [
+        test_failed_write_is_retried,
+        test_partial_write_is_completed,
+        test_string_ids_are_read_from_records,
+        test_corrupt_file_is_set_aside,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__} falló: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} pruebas correctas")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if run_all_tests() else 1)